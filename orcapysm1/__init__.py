@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Package Name : orcapysm1
+
+Description :
+
+    Python Scripts to Automate OrcaFlex Simulation
+    For Spread Moored Vessels
+
+    The stages are run from the command line (python -m orcapysm1 --help)
+    or called as functions, for example from a process pool :
+
+        from orcapysm1 import build, cases, post_static, post_dynamic
+
+        build.build('Input.xlsx')
+        post_static.post_static('Input.xlsx')
+        cases.generate_cases('Input.xlsx')
+        post_dynamic.case_results(fileName, lines, vesName)
+
+    Modules :
+
+        common          File names, BASENAME and direction conventions
+        check           Input sheets, preflight check and caches
+        build           Step 2 : Intact model and statics
+        post_static     Step 3 : Intact static results
+        loads           Mean wind and current loads of the case matrices
+        cases           Step 4 : Intact and damage dynamic case files
+        symmetry        Mirror image cases of symmetric moorings
+        plan            Run cost model and dry run planner
+        run             Adaptive duration runs on a process pool
+        post_dynamic    Intact dynamic results and envelope
+        pipeline        Overlapped generate, run and post process stages
+        conditions      Vessel loading conditions on one process pool
+        envelope        Governing case envelope
+        motions         Vessel offsets and fairlead excursions
+        extremes        Extreme value fits with bootstrap intervals
+        range_graph     Touchdown, anchor uplift, along line tensions
+        spectra         Low / wave frequency split of the responses
+        plots           Downsampled time history and envelope charts
+        stream          Single pass statistics of long time histories
+        cache           Result cache of the post processing, per case
+        mesh            Segment length convergence study
+        tune            Implicit solver settings benchmark
+        sweep           Quasi-static offset sweep
+        daemon          Resident worker
+        workqueue       Shared file system work queue for many nodes
+        archive         Compact result archives of the solved case files
+        telemetry       Solver performance telemetry, outlier cases
+        cli             Command line
+
+    Nothing is imported here, so that importing the package (and --help)
+    does not load pandas or OrcFxAPI.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+''' python -m orcapysm1 : command line of the OrcaPySM1 stages '''
+import sys
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.archive
+
+Description :
+
+    Compact Result Archive of the Dynamic Simulation Files
+
+        python -m orcapysm1 archive [--delete-sim] [--workers N]
+
+    A solved dynamic simulation file holds the results of every node of
+    every line, while post processing only needs a few dozen variables.
+    For each solved case in INTACT / DAMAGE the time histories of
+
+        End A / End B Effective Tension and GX / GY / GZ forces of the lines
+        Vessel X, Y, Z and Rotations 1, 2, 3 at oeVessel((0,0,0))
+
+    are written (as DTYPE) to a compressed NumPy archive next to the
+    simulation file, <case>.npz, in chunks of CHUNK_DURATION seconds:
+
+        TIMES_nnn, VALUES_nnn   Sample times and values (samples x NAMES)
+        META                    JSON : variable NAMES, case row, SHA-256 of
+                                the simulation file, OrcaFlex version,
+                                simulation start / stop time, chunks
+
+    The chunks are fetched with OrcFxAPI.Period windows (orcapysm1.stream),
+    each one written to the archive (a zip of .npy members, as np.savez)
+    as soon as it is read, and read back one at a time (np.load reads the
+    members of an archive on demand), so neither writing nor reading needs
+    the whole history in memory. With deleteSim the simulation file is
+    deleted once its archive has been written and read back.
+
+    Only the simulation files whose dynamic analysis has completed (model
+    state SimulationStopped) are archived, the files of the cases stage
+    that hold only the statics are left as they are. A case that fails is
+    reported with its ERROR, the other cases are archived.
+
+    The post-dynamic stage reads the archive of a case when its simulation
+    file has been deleted (case_results).
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pandas as pd
+import os
+import json
+import time
+import hashlib
+import zipfile
+import concurrent.futures
+from . import check
+from . import stream
+from .common import INPUT_FILE, basename, case_file, progress
+
+''' ---------------------------------------------------------------------------
+    Archive Settings
+--------------------------------------------------------------------------- '''
+CHUNK_DURATION = stream.CHUNK_DURATION      # Seconds of history per chunk
+DTYPE = 'float32'                           # Storage type of the values
+DELETE_SIM = False
+
+LINE_VARS = [('Effective Tension', 'End A'), ('End GX force', 'End A'), ('End GY force', 'End A'),
+             ('End GZ force', 'End A'), ('Effective Tension', 'End B'), ('End GX force', 'End B'),
+             ('End GY force', 'End B'), ('End GZ force', 'End B')]
+VES_VARS = ['X', 'Y', 'Z', 'Rotation 1', 'Rotation 2', 'Rotation 3']
+
+N_WORKERS = os.cpu_count()
+
+
+def archive_file(fileName):
+    ''' Archive of a simulation file '''
+    return os.path.splitext(fileName)[0]+'.npz'
+
+
+def variable_names(lines, vesName):
+    ''' Names of the archived variables, LINE|VARIABLE|END and
+    VESSEL|VARIABLE, in the order of the archive columns '''
+    names = ['|'.join([str(line), var, end]) for line in lines for var, end in LINE_VARS]
+    names += ['|'.join([str(vesName), var]) for var in VES_VARS]
+    return names
+
+
+def file_sha256(fileName, blockSize=1 << 20):
+    ''' SHA-256 of a file, read in blocks '''
+    h = hashlib.sha256()
+    with open(fileName, 'rb') as f:
+        for block in iter(lambda: f.read(blockSize), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def to_json(value):
+    ''' JSON value of the numpy scalars of a case row '''
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+def result_specs(model_0, lines, vesName):
+    ''' TimeHistorySpecification list of the archived variables, in the
+    order of variable_names '''
+    import OrcFxAPI
+
+    specs = list()
+    for line in lines:
+        for var, end in LINE_VARS:
+            oe = OrcFxAPI.oeEndA if end == 'End A' else OrcFxAPI.oeEndB
+            specs.append(OrcFxAPI.TimeHistorySpecification(model_0[line], var, oe))
+    VOE = OrcFxAPI.oeVessel((0,0,0))
+    for var in VES_VARS:
+        specs.append(OrcFxAPI.TimeHistorySpecification(model_0[vesName], var, VOE))
+    return specs
+
+
+def write_member(zf, name, array):
+    ''' Write an array to the member name.npy of an open archive '''
+    with zf.open(name+'.npy', 'w', force_zip64=True) as f:
+        np.lib.format.write_array(f, np.asanyarray(array), allow_pickle=False)
+
+
+def archive_case(fileName, lines, vesName, case=None, deleteSim=DELETE_SIM,
+                 chunkDuration=CHUNK_DURATION):
+    ''' Write the archive of one solved simulation file, returns the sizes
+    of the simulation file and of its archive. A file whose simulation has
+    not completed is not archived (STATUS NOT RUN) '''
+    import OrcFxAPI
+
+    model_0 = OrcFxAPI.Model(fileName)
+
+    # Statics only (cases stage) or stopped part way : nothing to archive
+    if model_0.state != OrcFxAPI.ModelState.SimulationStopped:
+        return {'STATUS': 'NOT RUN', 'SIM_SIZE': os.path.getsize(fileName)}
+
+    specs = result_specs(model_0, lines, vesName)
+
+    ''' -----------------------------------------------------------------------
+    Time Histories in Chunks
+    -------------------------------------------------------------------------'''
+    startTime = model_0.simulationStartTime
+    stopTime = model_0.simulationStopTime
+
+    # Written to a temporary name first, a partial archive is never left
+    archFile = archive_file(fileName)
+    tmpFile = archFile[:-4]+'.tmp.npz'
+    zf = zipfile.ZipFile(tmpFile, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+
+    nChunks = 0
+    tLast = -np.inf
+    t0 = startTime
+    while t0 < stopTime:
+        t1 = min(t0+chunkDuration, stopTime)
+        period = OrcFxAPI.Period(t0, t1)
+
+        # Both ends of a Period are inclusive, skip the samples already used
+        times = model_0.SampleTimes(period)
+        keep = times > tLast
+        if keep.any():
+            write_member(zf, 'TIMES_%03d' % nChunks, np.asarray(times[keep], dtype=float))
+            write_member(zf, 'VALUES_%03d' % nChunks, np.asarray(
+                OrcFxAPI.GetMultipleTimeHistories(specs, period)[keep], dtype=DTYPE))
+            tLast = times[keep][-1]
+            nChunks += 1
+        t0 = t1
+
+    META = {'NAMES': variable_names(lines, vesName),
+            'CASE': {k: to_json(v) for k, v in dict(case or {}).items()},
+            'SIM_FILE': os.path.basename(fileName),
+            'SIM_SHA256': file_sha256(fileName),
+            'SIM_SIZE': os.path.getsize(fileName),
+            'ORCAFLEX_VERSION': OrcFxAPI.DLLVersion(),
+            'START_TIME': startTime,
+            'STOP_TIME': stopTime,
+            'CHUNK_DURATION': chunkDuration,
+            'N_CHUNKS': nChunks,
+            'DTYPE': DTYPE,
+            'CREATED': time.strftime('%Y-%m-%d %H:%M:%S')}
+
+    write_member(zf, 'META', np.array(json.dumps(META)))
+    zf.close()
+    os.replace(tmpFile, archFile)
+
+    simSize = META['SIM_SIZE']
+    if deleteSim:
+        # Read back before the simulation file is deleted
+        if read_meta(archFile)['SIM_SHA256'] == META['SIM_SHA256']:
+            del model_0
+            os.remove(fileName)
+
+    return {'STATUS': 'ARCHIVED', 'SIM_SIZE': simSize, 'ARCHIVE_SIZE': os.path.getsize(archFile)}
+
+
+def read_meta(archFile):
+    ''' Metadata of an archive '''
+    with np.load(archFile) as Z:
+        return json.loads(str(Z['META']))
+
+
+def read_archive(archFile, names=None, startTime=None, stopTime=None):
+    ''' Sample times and values (samples x names) of an archive, only the
+    chunks within startTime and stopTime are read '''
+    with np.load(archFile) as Z:
+        META = json.loads(str(Z['META']))
+        cols = slice(None) if names is None else [META['NAMES'].index(n) for n in names]
+        TIMES = list()
+        VALUES = list()
+        for k in range(META['N_CHUNKS']):
+            times = Z['TIMES_%03d' % k]
+            if startTime is not None and times[-1] < startTime:
+                continue
+            if stopTime is not None and times[0] > stopTime:
+                break
+            keep = np.ones(len(times), dtype=bool)
+            if startTime is not None:
+                keep &= times >= startTime
+            if stopTime is not None:
+                keep &= times <= stopTime
+            TIMES.append(times[keep])
+            VALUES.append(Z['VALUES_%03d' % k][keep][:, cols].astype(float))
+    if not TIMES:
+        return np.zeros(0), np.zeros((0, len(META['NAMES']) if names is None else len(names)))
+    return np.concatenate(TIMES), np.concatenate(VALUES)
+
+
+def chunks(archFile, names=None, startTime=-np.inf):
+    ''' Sample times and values (samples x names) of an archive from
+    startTime, one chunk at a time '''
+    with np.load(archFile) as Z:
+        META = json.loads(str(Z['META']))
+        cols = slice(None) if names is None else [META['NAMES'].index(n) for n in names]
+        for k in range(META['N_CHUNKS']):
+            times = Z['TIMES_%03d' % k]
+            keep = times >= startTime
+            if keep.any():
+                yield times[keep], Z['VALUES_%03d' % k][keep][:, cols].astype(float)
+
+
+def archive_statistics(archFile, names=None, startTime=-np.inf):
+    ''' Running statistics (orcapysm1.stream) of the archived variables
+    names from startTime, fed one chunk at a time '''
+    stats = None
+    tLast = -np.inf
+    for times, chunk in chunks(archFile, names, startTime):
+        if stats is None:
+            stats = stream.RunningStats(chunk.shape[1])
+        stats.update(chunk, times[-1]-max(tLast, times[0]))
+        tLast = times[-1]
+    return stats
+
+
+def result_chunks(fileName, lines, vesName, chunkDuration=CHUNK_DURATION):
+    ''' Sample times and values (samples x variable_names) of a case, one
+    chunk at a time, from the simulation file or from its archive '''
+    archFile = archive_file(fileName)
+    if not os.path.exists(fileName) and os.path.exists(archFile):
+        yield from chunks(archFile, variable_names(lines, vesName))
+        return
+
+    import OrcFxAPI
+
+    model_0 = OrcFxAPI.Model(fileName)
+    specs = result_specs(model_0, lines, vesName)
+
+    stopTime = model_0.simulationStopTime
+    tLast = -np.inf
+    t0 = model_0.simulationStartTime
+    while t0 < stopTime:
+        t1 = min(t0+chunkDuration, stopTime)
+        period = OrcFxAPI.Period(t0, t1)
+
+        # Both ends of a Period are inclusive, skip the samples already used
+        times = model_0.SampleTimes(period)
+        keep = times > tLast
+        if keep.any():
+            yield times[keep], np.asarray(OrcFxAPI.GetMultipleTimeHistories(specs, period)[keep], dtype=float)
+            tLast = times[keep][-1]
+        t0 = t1
+
+
+def statistics_results(stats, nLines, stormDurationHours=3):
+    ''' Running statistics of the variable_names of nLines lines in the
+    layout of post_dynamic.case_results '''
+    nL = nLines*len(LINE_VARS)
+    mpmMax, mpmMin = stats.rayleigh_mpm(stormDurationHours)
+
+    LINE = dict()
+    VES = dict()
+    for k, vals in [('MPV_MAX',mpmMax),('MPV_MIN',mpmMin),('MAX',stats.max),('MIN',stats.min),('RMS',stats.rms)]:
+        LINE[k] = vals[:nL].reshape(nLines,len(LINE_VARS))
+        VES[k] = vals[nL:]
+    return LINE, VES
+
+
+def case_results(archFile, lines, vesName, stormDurationHours=3):
+    ''' Statistics of a case from its archive, in the layout of
+    post_dynamic.case_results : dicts LINE (nLines x 8) and VES (6) of
+    MPV_MAX, MPV_MIN, MAX, MIN and RMS. The MPM are the Rayleigh estimates
+    of the running statistics, as with streamed statistics '''
+
+    # Whole archived history, as orcapysm1.stream.stream_statistics
+    stats = archive_statistics(archFile, variable_names(lines, vesName))
+    return statistics_results(stats, len(lines), stormDurationHours)
+
+
+def archive_cases(inputFile=INPUT_FILE, deleteSim=DELETE_SIM, nWorkers=N_WORKERS):
+    ''' Archive all the solved intact and damage simulation files in
+    parallel, returns the table of the STATUS and the sizes '''
+
+    # All the Input sheets, parsed once
+    INPUT = check.read_input(inputFile)
+
+    BASENAME = basename(INPUT)
+    vesName = INPUT['Ves_Gen'].VAL['NAME']
+    DF_ML = INPUT['Moor_Lines']
+
+    CASES = list()
+    for family, sheet in [('INTACT', 'IntactCases'), ('DAMAGE', 'DamageCases')]:
+        for ic, case in check.case_records(INPUT, sheet):
+            fileName = case_file(BASENAME, family, case['CASE_ID'])
+            if not os.path.exists(fileName):
+                continue
+            lines = [l for l in DF_ML.index if l != case.get('DAM_LIN')]
+            CASES.append((case['CASE_ID'], family, fileName, lines, dict(case, FAMILY=family)))
+
+    ''' -----------------------------------------------------------------------
+    Archive the Cases in Parallel
+    -------------------------------------------------------------------------'''
+    ROWS = list()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=nWorkers) as pool:
+        futures = dict()
+        for caseId, family, fileName, lines, case in CASES:
+            futures[pool.submit(archive_case, fileName, lines, vesName, case, deleteSim)] = (caseId, family, fileName)
+        for future in concurrent.futures.as_completed(futures):
+            caseId, family, fileName = futures[future]
+            try:
+                RES = future.result()
+            except Exception as e:
+                RES = {'STATUS': 'FAILED', 'ERROR': repr(e)}
+            ROWS.append(dict(CASE_ID=caseId, FAMILY=family, ARCHIVE=archive_file(fileName), **RES))
+            progress(family, caseId, RES['STATUS'], RES.get('ERROR', ''))
+
+    DF_ARC = pd.DataFrame(ROWS, columns=['CASE_ID', 'FAMILY', 'ARCHIVE', 'STATUS', 'ERROR', 'SIM_SIZE', 'ARCHIVE_SIZE'])
+    DF_ARC['RATIO'] = DF_ARC.SIM_SIZE/DF_ARC.ARCHIVE_SIZE
+    return DF_ARC
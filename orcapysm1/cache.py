@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.cache
+
+Description :
+
+    Incremental Post Processing : Result Cache of the Simulation Files
+
+    The post processing of a case is a function of its simulation file and
+    of the statistics settings only. call() runs such a function once and
+    keeps its return value in CACHE_DIR, keyed by
+
+        Fingerprint     Size, modification time and a BLAKE2 hash of the
+                        first, middle and last HASH_BLOCK bytes of the file
+        Function        Module and name of the function
+        Settings        All the other arguments (lines, storm duration,
+                        stream statistics, ...) and CACHE_VERSION
+
+    Rerunning a post processing stage after a few cases were run again only
+    recomputes those cases, the other ones are read from the cache and
+    merged before the results are written. A case whose simulation file was
+    replaced by its archive (orcapysm1.archive) is keyed by the archive.
+
+    The module constants of the statistics (stream.MAX_PEAKS, chunk
+    durations, ...) are not part of the key : after changing them, run the
+    stage with --no-cache or delete CACHE_DIR.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import os
+import json
+import uuid
+import pickle
+import hashlib
+
+CACHE_DIR = 'post_cache'
+CACHE_VERSION = 3         # Raised when the statistics change (3 : sampled peaks)
+HASH_BLOCK = 1 << 20        # Bytes hashed at the start, middle and end
+USE_CACHE = True
+
+
+def fingerprint(fileName, block=HASH_BLOCK):
+    ''' Size, modification time and partial hash of a file '''
+    st = os.stat(fileName)
+    h = hashlib.blake2b(digest_size=16)
+    with open(fileName, 'rb') as f:
+        for offset in sorted(set([0, max(st.st_size//2-block//2, 0), max(st.st_size-block, 0)])):
+            f.seek(offset)
+            h.update(f.read(block))
+    return {'SIZE': st.st_size, 'MTIME': st.st_mtime_ns, 'HASH': h.hexdigest()}
+
+
+def source_file(fileName):
+    ''' File holding the results of a case : the simulation file, or its
+    archive when the simulation file was deleted '''
+    from . import archive
+    archFile = archive.archive_file(fileName)
+    if not os.path.exists(fileName) and os.path.exists(archFile):
+        return archFile
+    return fileName
+
+
+def cache_key(function, fileName, args, kwargs):
+    ''' Key of a call from the fingerprint of the file and the settings '''
+    source = source_file(fileName)
+    data = {'FUNCTION': function.__module__+'.'+function.__qualname__,
+            'FILE': os.path.abspath(fileName),
+            'SOURCE': fingerprint(source),
+            'ARGS': args, 'KWARGS': kwargs, 'VERSION': CACHE_VERSION}
+    text = json.dumps(data, sort_keys=True, default=lambda o: o.tolist() if hasattr(o, 'tolist') else str(o))
+    return hashlib.blake2b(text.encode(), digest_size=20).hexdigest()
+
+
+def call(function, fileName, *args, useCache=USE_CACHE, cacheDir=CACHE_DIR, **kwargs):
+    ''' function(fileName, *args, **kwargs), read from the cache when the
+    file and the arguments are unchanged '''
+    if not useCache:
+        return function(fileName, *args, **kwargs)
+
+    cacheFile = os.path.join(cacheDir, cache_key(function, fileName, args, kwargs)+'.pkl')
+    try:
+        with open(cacheFile, 'rb') as f:
+            return pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        pass
+
+    result = function(fileName, *args, **kwargs)
+
+    # Written to a private temporary file first, then renamed
+    os.makedirs(cacheDir, exist_ok=True)
+    tmpFile = cacheFile+'.'+uuid.uuid4().hex+'.tmp'
+    with open(tmpFile, 'wb') as f:
+        pickle.dump(result, f)
+    os.replace(tmpFile, cacheFile)
+    return result
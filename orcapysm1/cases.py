@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.cases
+
+Description :
+
+    Step 4 : Intact and Damage Dynamic Case Files
+
+        python -m orcapysm1 cases [--shared-buildup] [--mirror]
+
+    Reads the Input Excel Work Book and the Intact Static Simulation File.
+    One simulation file is generated for each of the Intact Dynamic
+    Analysis Cases in the INTACT folder. The Damage Cases are generated in
+    a separate folder DAMAGE, with the damaged line (DAM_LIN) removed from
+    the intact model.
+
+    With mirrorCases (--mirror) and a mooring symmetric about the vessel xz
+    plane, the mirror image cases are not generated, they are listed in
+    MIRROR_MANIFEST and post processed from their source cases
+    (orcapysm1.symmetry).
+
+    The solver settings selected by orcapysm1.tune (solver_settings.csv)
+    are applied to every case file, so a new tuning only needs this stage
+    again, not the build stage.
+
+    The statics wall time, iterations and warnings of each case are added
+    to the telemetry table (orcapysm1.telemetry).
+
+    The case matrices are streamed from the sheets or from their CSV /
+    Parquet files (orcapysm1.check.case_records), one case at a time.
+
+    These Generated Files can be Batch Processed (or run with
+    python -m orcapysm1 run) and the final simulation results can be
+    further post processed.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import pandas as pd
+import os
+import shutil
+from . import check
+from . import telemetry
+from . import symmetry
+from . import tune
+from .common import (INPUT_FILE, INTACT_DIR, DAMAGE_DIR, BUILDUP_MANIFEST, MIRROR_MANIFEST,
+                     SOLVER_SETTINGS, basename, statics_file, case_file, case_direction, progress)
+
+''' ---------------------------------------------------------------------------
+    Shared Build-up Stage (OrcaFlex Restart Analyses)
+--------------------------------------------------------------------------- '''
+# When sharedBuildup is True, the cases with the same BUILDUP_KEYS (same
+# model, sea state and direction) share one parent simulation of the
+# build-up stage. Each case is then written as a restart text data file
+# (.yml) that continues from the parent and sets its own wind and current
+# speeds (Vw, Vc) for the main stage. The parent / child list is written
+# to BUILDUP_MANIFEST and used by orcapysm1.run to run each parent once
+# before its children.
+# Wave data can not be changed in a restart, keep the wave parameters and
+# the DIRECTION in BUILDUP_KEYS. Add Vw and Vc to the keys for a build-up
+# with the wind and current speeds of each case.
+SHARED_BUILDUP = False
+BUILDUP_KEYS = ['DAM_LIN','WAVE_TYPE','Hs','Tp','GAMMA','DIRECTION']
+RESTART_PARENT_KEY = 'RestartingFrom'
+
+# Low / wave frequency dividing period of the vessel primary motion
+# (seconds), also the LF / WF split of orcapysm1.spectra
+DIVIDING_PERIOD = 40.0
+
+
+def save_restart_case(model_0, BASENAME, family, case, direction, fileName,
+                      BUILDUP_PARENTS, BUILDUP_GROUPS):
+    ''' Save a case as a restart of the shared build-up parent of its
+    group. BUILDUP_PARENTS maps the group key to the parent file and
+    BUILDUP_GROUPS collects the manifest rows '''
+    caseData = dict(case)
+    caseData['DIRECTION'] = direction
+    key = (family,)+tuple(str(caseData.get(k, '')) for k in BUILDUP_KEYS)
+
+    gen = model_0.general
+    mainStage = gen.StageDuration[1]
+
+    # Parent : Statics and Build-up stage only, saved once per group
+    if key not in BUILDUP_PARENTS:
+        parentFile = os.path.join(os.path.dirname(fileName), BASENAME+'_'+family+'_BUILDUP_'+
+                                  str(caseData['CASE_ID']).replace(' ', '_')+'.sim')
+        gen.StageCount = 1
+        model_0.CalculateStatics()
+        model_0.SaveSimulation(parentFile)
+        gen.StageCount = 2
+        gen.StageDuration[1] = mainStage
+        BUILDUP_PARENTS[key] = parentFile
+
+    parentFile = BUILDUP_PARENTS[key]
+
+    # Child : Restart text data file with the main stage
+    childFile = os.path.splitext(fileName)[0]+'.yml'
+    with open(childFile, 'w') as f:
+        f.write('%YAML 1.1\n')
+        f.write('---\n')
+        f.write(RESTART_PARENT_KEY+': '+os.path.basename(parentFile)+'\n')
+        f.write('General:\n')
+        f.write('  StageDuration:\n')
+        f.write('    - '+str(mainStage)+'\n')
+        f.write('Environment:\n')
+        f.write('  WindSpeed: '+str(caseData['Vw'])+'\n')
+        f.write('  RefCurrentSpeed: '+str(caseData['Vc'])+'\n')
+
+    BUILDUP_GROUPS.append({'CASE_ID': caseData['CASE_ID'], 'FAMILY': family,
+                           'PARENT': parentFile, 'CHILD': childFile,
+                           'SIM': fileName})
+
+
+def dynamic_setup(vessel_0):
+    ''' Vessel settings of the dynamic analyses '''
+    vessel_0.IncludedInStatics = '6 DOF'
+    vessel_0.PrimaryMotion = 'Calculated (6 DOF)'
+    vessel_0.SuperimposedMotion = 'None'
+    vessel_0.IncludeAppliedLoads = 'No'
+    vessel_0.IncludeWaveLoad1stOrder = 'Yes'
+    vessel_0.IncludeWaveDriftLoad2ndOrder = 'Yes'
+    vessel_0.IncludeWaveDriftDamping = 'Yes'
+    vessel_0.IncludeSumFrequencyLoad = 'No'
+    vessel_0.IncludeAddedMassAndDamping = 'Yes'
+    vessel_0.IncludeManoeuvringLoad = 'Yes'
+    vessel_0.IncludeOtherDamping = 'Yes'
+    vessel_0.IncludeCurrentLoad = 'Yes'
+    vessel_0.IncludeWindLoad = 'Yes'
+    vessel_0.PrimaryMotionIsTreatedAs = 'Both low and wave frequency'
+    vessel_0.PrimaryMotionDividingPeriod = DIVIDING_PERIOD
+    vessel_0.CalculationMode = 'Filtering'
+    vessel_0.CalculateHydrostaticStiffnessAnglesBy = 'Orientation'
+
+
+def set_environment(model_0, case, direction, setGamma=True):
+    ''' Wave, wind and current of a case row, all in the same direction '''
+    env = model_0.environment
+
+    # Wave Params
+    env.NumberOfWaveTrains = 1
+    env.WaveType = case['WAVE_TYPE']
+    env.WaveDirection = direction
+
+    if env.WaveType == 'JONSWAP' or env.WaveType == 'ISSC':
+        env.WaveHs = case['Hs']
+        env.WaveTp = case['Tp']
+        if setGamma:
+            env.WaveGamma = case['GAMMA']
+    else:
+        env.WaveHeight = case['Hs']
+        env.WavePeriod = case['Tp']
+
+    # Wind Params
+    env.WindDirection = direction
+    env.WindSpeed = case['Vw']
+
+    # Current Params
+    env.RefCurrentSpeed = case['Vc']
+    env.RefCurrentDirection = direction
+
+
+def case_model(INPUT, family, ic, case=None, solverSettings=SOLVER_SETTINGS):
+    ''' Intact statics model set up for the case ic of the family INTACT /
+    DAMAGE (or the case row itself), with the solver settings of
+    orcapysm1.tune, returns the model, the case row and its direction '''
+    if case is None:
+        if family == 'INTACT':
+            case = check.case_row(INPUT, 'IntactCases', ic)
+        else:
+            case = check.case_row(INPUT, 'DamageCases', ic)
+
+    vesName = INPUT['Ves_Gen'].VAL['NAME']
+
+    # Opening the Intact Static File
+    model_0 = check.load_simulation(statics_file(basename(INPUT)))
+    tune.apply_settings(model_0.general, solverSettings)
+
+    if family == 'DAMAGE':
+        model_0.DestroyObject(case['DAM_LIN'])
+
+    vessel_0 = model_0[vesName]
+    dynamic_setup(vessel_0)
+
+    # Computing Direction
+    DIRECTION = case_direction(case['DIR_REF'], case['DIR_CONV'], case['DIR'],
+                               INPUT['General'].VAL['GXDIR'], vessel_0.InitialHeading)
+
+    set_environment(model_0, case, DIRECTION, setGamma=(family == 'INTACT'))
+
+    return model_0, case, DIRECTION
+
+
+def generate_case(inputFile, family, ic, solverSettings=SOLVER_SETTINGS):
+    ''' Generate the simulation file of one case, the case ic (row number)
+    of the family INTACT / DAMAGE, returns the file name '''
+    INPUT = check.read_input(inputFile)
+
+    model_0, case, DIRECTION = case_model(INPUT, family, ic, solverSettings=solverSettings)
+
+    fileName = case_file(basename(INPUT), family, case['CASE_ID'])
+    os.makedirs(os.path.dirname(fileName), exist_ok=True)
+
+    model_0.CalculateStatics()
+
+    model_0.SaveSimulation(fileName)
+
+    return fileName
+
+
+def generate_cases(inputFile=INPUT_FILE, sharedBuildup=SHARED_BUILDUP,
+                   mirrorCases=symmetry.MIRROR_CASES, solverSettings=SOLVER_SETTINGS):
+    ''' Generate the intact and damage dynamic case files, returns the list
+    of the generated files '''
+
+    # Preflight check of all the Input sheets, before any OrcaFlex work
+    check.preflight(inputFile)
+
+    # All the Input sheets, parsed once
+    INPUT = check.read_input(inputFile)
+
+    if os.path.exists(DAMAGE_DIR):
+        shutil.rmtree(DAMAGE_DIR)
+
+    os.mkdir(DAMAGE_DIR)
+
+    BUILDUP_PARENTS = dict()
+    BUILDUP_GROUPS = list()
+    FILES = list()
+    STATICS = list()
+
+    ''' -----------------------------------------------------------------------
+    Load the Data from existing Intact Static File
+    -------------------------------------------------------------------------'''
+    DF_GN = INPUT['General']
+    GXDIR = DF_GN.VAL['GXDIR']
+
+    DF_VES_GEN = INPUT['Ves_Gen']
+    vesName = DF_VES_GEN.VAL['NAME']
+
+    BASENAME = basename(INPUT)
+    staticsFile = statics_file(BASENAME)
+
+    # Mirror image cases, not generated
+    MIRRORS = set()
+    if mirrorCases:
+        DF_MC = symmetry.mirror_pairs(INPUT, BASENAME)
+        MIRRORS = {(str(DF_MC.CASE_ID[i]), DF_MC.FAMILY[i]) for i in range(len(DF_MC))}
+        for reason in symmetry.mirror_setup(INPUT)[3]:
+            progress('Not symmetric :', reason)
+
+    model_0 = check.load_simulation(staticsFile)
+    tune.apply_settings(model_0.general, solverSettings)
+
+    ''' -----------------------------------------------------------------------
+    Intact Dynamic Setup
+    -------------------------------------------------------------------------'''
+    vessel_0 = model_0[vesName]
+    dynamic_setup(vessel_0)
+
+    # Loop for each Case of the intact Case Matrix, streamed
+    for ic, case in check.case_records(INPUT, 'IntactCases'):
+
+        # Computing Direction
+        DIRECTION = case_direction(case['DIR_REF'], case['DIR_CONV'], case['DIR'],
+                                   GXDIR, vessel_0.InitialHeading)
+
+        set_environment(model_0, case, DIRECTION)
+
+        # Save the File
+        fileName = case_file(BASENAME, 'INTACT', case['CASE_ID'])
+        if (str(case['CASE_ID']), 'INTACT') in MIRRORS:
+            if os.path.exists(fileName):
+                os.remove(fileName)
+            continue
+        FILES.append(fileName)
+
+        if sharedBuildup:
+            save_restart_case(model_0, BASENAME, 'INTACT', case, DIRECTION, fileName,
+                              BUILDUP_PARENTS, BUILDUP_GROUPS)
+            continue
+
+        STATICS.append(dict(CASE_ID=case['CASE_ID'], FAMILY='INTACT', **telemetry.timed_statics(model_0)))
+
+        model_0.SaveSimulation(fileName)
+
+    ''' -----------------------------------------------------------------------
+    DAMAGE Dynamic Setup
+    -------------------------------------------------------------------------'''
+
+    # Loop for each Case of the damage Case Matrix, streamed
+    for ic, case in check.case_records(INPUT, 'DamageCases'):
+
+        if (str(case['CASE_ID']), 'DAMAGE') in MIRRORS:
+            continue
+
+        del model_0
+        model_0, case, DIRECTION = case_model(INPUT, 'DAMAGE', ic, case, solverSettings)
+
+        fileName = case_file(BASENAME, 'DAMAGE', case['CASE_ID'])
+        FILES.append(fileName)
+
+        if sharedBuildup:
+            save_restart_case(model_0, BASENAME, 'DAMAGE', case, DIRECTION, fileName,
+                              BUILDUP_PARENTS, BUILDUP_GROUPS)
+            continue
+
+        STATICS.append(dict(CASE_ID=case['CASE_ID'], FAMILY='DAMAGE', **telemetry.timed_statics(model_0)))
+
+        model_0.SaveSimulation(fileName)
+
+    telemetry.record(STATICS, 'generate')
+
+    if sharedBuildup:
+        pd.DataFrame(BUILDUP_GROUPS).to_csv(BUILDUP_MANIFEST, index=False)
+    elif os.path.exists(BUILDUP_MANIFEST):
+        os.remove(BUILDUP_MANIFEST)
+
+    if mirrorCases:
+        DF_MC.to_csv(MIRROR_MANIFEST, index=False)
+    elif os.path.exists(MIRROR_MANIFEST):
+        os.remove(MIRROR_MANIFEST)
+
+    return FILES
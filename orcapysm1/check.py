@@ -0,0 +1,408 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.check
+
+Description :
+
+    Preflight Validation of the Input Excel Work Book
+
+    All the sheets of Input.xlsx are read in one pass and every sheet and
+    cross reference used by the stages is checked before any OrcaFlex work
+    is done. All the errors are reported at once, for example:
+
+        ENDA_CONN fairlead IDs missing in Ves_FL
+        LINE_TYPEj IDs missing in Line_Types, BUOYj IDs missing in Clump_Buoy
+        N_SECS / N_BUOYS inconsistent with the populated columns
+        DAM_LIN which is not a mooring line
+        Unknown DIR_REF / DIR_CONV / WAVE_TYPE in the case matrices
+        Duplicate IDs and CASE_IDs
+
+    The build and cases stages call preflight() at the start. The check is
+    also run on its own with : python -m orcapysm1 check
+
+    The stages read the Input sheets with read_input() and the intact
+    statics simulation with load_simulation(). Both keep the parsed file in
+    memory until it changes on disk, so that the resident worker
+    (orcapysm1.daemon) does not read them again for every request.
+
+    Case Matrices from CSV / Parquet Files :
+
+    Large case matrices (for example sampled from a metocean hindcast) may
+    be kept out of the work book. The optional General variables
+    INTACT_CASES and DAMAGE_CASES give a .csv or .parquet file (relative to
+    the folder of the work book) with the columns of the IntactCases /
+    DamageCases sheet, which is then used in place of the sheet. The stages read the case matrices through
+    case_chunks() / case_records(), CASE_CHUNK rows at a time, so that the
+    memory used does not grow with the number of cases. Parquet files need
+    pyarrow.
+
+    Loading Conditions :
+
+    The optional sheet Load_Conds lists the vessel loading conditions, one
+    row per COND with the Ves_Gen variables (DRAFT, MASS, LCG, VCG, Kxx
+    ...) which differ from the Ves_Gen sheet. read_input('Input.xlsx::COND')
+    gives the sheets with the values of the condition COND, and its own
+    vessel TAG (hence its own file names). See orcapysm1.conditions.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pandas as pd
+import os
+from .common import INPUT_FILE, split_input
+
+MAX_SECS = 4
+MAX_BUOYS = 3
+
+DIR_REFS = ['GLOBX', 'NORTH', 'EAST', 'SOUTH', 'WEST', 'VESX+', 'VESX-']
+DIR_CONVS = ['ANTICLOCKWISE', 'CLOCKWISE']
+WAVE_TYPES = ['Airy', 'Dean stream', "Stokes' 5th", 'Cnoidal', 'JONSWAP', 'ISSC',
+              'Ochi-Hubble', 'Torsethaugen', 'Gaussian swell']
+SPECTRA = ['JONSWAP', 'ISSC', 'Ochi-Hubble', 'Torsethaugen', 'Gaussian swell']
+
+INPUT_CACHE = dict()
+SIM_CACHE = dict()
+
+CASE_CHUNK = 10000          # Rows of a case matrix file read at a time
+
+''' ---------------------------------------------------------------------------
+    Layout of the Sheets : Header Row, Index Column, Number of Columns, Rows
+--------------------------------------------------------------------------- '''
+SHEETS = {'General': (1, True, 2, None),
+          'Ves_Gen': (1, True, 2, None),
+          'Ves_Area': (2, True, 10, 3),
+          'Ves_Curr': (1, False, 7, None),
+          'Ves_Wind': (1, False, 7, None),
+          'Ves_FL': (2, True, 4, None),
+          'Line_Types': (3, True, 13, None),
+          'Clump_Buoy': (3, True, 5, None),
+          'Moor_Lines': (3, True, 29, None),
+          'IntactCases': (3, False, 10, None),
+          'DamageCases': (3, False, 11, None)}
+
+# Sheets read when present : vessel loading conditions, one row per
+# condition with the Ves_Gen variables which differ (orcapysm1.conditions)
+OPTIONAL_SHEETS = {'Load_Conds': (1, True, None, None)}
+
+# Columns of the case matrices and the General variable of their file
+CASE_COLUMNS = {'IntactCases': ['CASE_ID', 'DIR_REF', 'DIR_CONV', 'DIR', 'WAVE_TYPE', 'GAMMA',
+                                'Hs', 'Tp', 'Vw', 'Vc'],
+                'DamageCases': ['CASE_ID', 'DIR_REF', 'DIR_CONV', 'DIR', 'DAM_LIN', 'WAVE_TYPE',
+                                'GAMMA', 'Hs', 'Tp', 'Vw', 'Vc']}
+CASE_FILES = {'IntactCases': 'INTACT_CASES', 'DamageCases': 'DAMAGE_CASES'}
+
+
+def sheet_frame(raw, header, index, nCols, nRows=None):
+    ''' DataFrame of a sheet read without header, same as read_excel with
+    header=header, usecols of nCols columns (None : up to the first empty
+    header cell) and index_col=0 if index '''
+    if nCols is None:
+        nCols = int(raw.iloc[header].notna().cumprod().sum())
+    DF = raw.iloc[header+1:, :nCols].copy()
+    DF.columns = raw.iloc[header, :nCols].values
+    DF = DF.dropna(how='all')
+    if nRows is not None:
+        DF = DF.iloc[:nRows]
+    DF = DF.infer_objects()
+    DF[DF.columns[DF.isna().all().values]] = np.nan
+    if index:
+        DF = DF.set_index(DF.columns[0])
+    else:
+        DF = DF.reset_index(drop=True)
+    return DF
+
+
+def read_input(fileName=INPUT_FILE):
+    ''' All the sheets of the input work book, parsed once. The parsed
+    sheets are kept in INPUT_CACHE until the file is modified, so that a
+    long running process (orcapysm1.daemon) does not parse it again.
+    With fileName <Input>::<COND>, the Ves_Gen values of the loading
+    condition COND are used '''
+    fileName, cond = split_input(fileName)
+    stat = os.stat(fileName)
+    key = (stat.st_mtime_ns, stat.st_size)
+    path = os.path.abspath(fileName)
+    if path not in INPUT_CACHE or INPUT_CACHE[path][0] != key:
+        with pd.ExcelFile(fileName) as book:
+            LAYOUT = dict(SHEETS, **{name: OPTIONAL_SHEETS[name] for name in OPTIONAL_SHEETS
+                                     if name in book.sheet_names})
+            RAW = pd.read_excel(book, sheet_name=list(LAYOUT), header=None)
+        INPUT_CACHE[path] = (key, {name: sheet_frame(RAW[name], *LAYOUT[name]) for name in LAYOUT})
+    INPUT = {name: DF.copy() for name, DF in INPUT_CACHE[path][1].items()}
+
+    # Case matrix files relative to the folder of the work book
+    for name in CASE_FILES.values():
+        value = INPUT['General'].VAL.get(name)
+        if isinstance(value, str) and value.strip() and not os.path.isabs(value.strip()):
+            INPUT['General'].loc[name, 'VAL'] = os.path.join(os.path.dirname(path), value.strip())
+
+    if cond is not None:
+        apply_condition(INPUT, cond)
+    return INPUT
+
+
+def condition_tags(INPUT):
+    ''' Vessel TAG of each loading condition of Load_Conds : the TAG of the
+    condition, else the Ves_Gen TAG _ condition '''
+    DF_LC = INPUT['Load_Conds']
+    TAG = pd.Series([str(INPUT['Ves_Gen'].VAL['TAG'])+'_'+str(c) for c in DF_LC.index], index=DF_LC.index)
+    if 'TAG' in DF_LC:
+        TAG = DF_LC.TAG.astype(object).where(DF_LC.TAG.notna(), TAG).astype(str)
+    return TAG
+
+
+def apply_condition(INPUT, cond):
+    ''' Ves_Gen values of the loading condition cond (row of Load_Conds),
+    the values left empty keep those of Ves_Gen '''
+    DF_LC = INPUT.get('Load_Conds')
+    if DF_LC is None or str(cond) not in DF_LC.index.astype(str):
+        raise ValueError('Loading condition '+str(cond)+' not in Load_Conds')
+    ic = list(DF_LC.index.astype(str)).index(str(cond))
+    TAG = condition_tags(INPUT).iloc[ic]
+
+    VG = INPUT['Ves_Gen']
+    for name, value in DF_LC.iloc[ic].items():
+        if name in VG.index and not pd.isna(value):
+            VG.loc[name, 'VAL'] = value
+    VG.loc['TAG', 'VAL'] = TAG
+
+
+def load_simulation(fileName):
+    ''' OrcaFlex model loaded from a simulation file. The contents of the
+    file are kept in SIM_CACHE until it is modified, each call returns a new
+    model which can be changed freely '''
+    import OrcFxAPI
+
+    stat = os.stat(fileName)
+    key = (stat.st_mtime_ns, stat.st_size)
+    path = os.path.abspath(fileName)
+    if path not in SIM_CACHE or SIM_CACHE[path][0] != key:
+        with open(fileName, 'rb') as f:
+            SIM_CACHE[path] = (key, f.read())
+    model = OrcFxAPI.Model()
+    model.LoadSimulationMem(SIM_CACHE[path][1])
+    return model
+
+
+''' ---------------------------------------------------------------------------
+    Case Matrices from the Sheets or from CSV / Parquet Files
+--------------------------------------------------------------------------- '''
+def case_source(INPUT, sheet):
+    ''' CSV / Parquet file of the case matrix sheet (General INTACT_CASES /
+    DAMAGE_CASES), None if the sheet itself is used '''
+    GN = INPUT['General'].VAL
+    fileName = GN.get(CASE_FILES[sheet])
+    if fileName is None or pd.isna(fileName) or str(fileName).strip() == '':
+        return None
+    return str(fileName).strip()
+
+
+def read_chunks(fileName, columns=None, chunkRows=CASE_CHUNK):
+    ''' DataFrames of chunkRows rows of a .csv or .parquet file '''
+    if os.path.splitext(fileName)[1].lower() in ['.parquet', '.pq']:
+        import pyarrow.parquet
+
+        for batch in pyarrow.parquet.ParquetFile(fileName).iter_batches(batch_size=chunkRows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(fileName, usecols=columns, chunksize=chunkRows, skipinitialspace=True)
+
+
+def case_chunks(INPUT, sheet, columns=None, chunkRows=CASE_CHUNK):
+    ''' The case matrix sheet (IntactCases / DamageCases) in DataFrames
+    of up to chunkRows rows, indexed by the row number in the matrix '''
+    fileName = case_source(INPUT, sheet)
+    if fileName is None:
+        DF_CM = INPUT[sheet] if columns is None else INPUT[sheet][columns]
+        for i in range(0, len(DF_CM), chunkRows):
+            yield DF_CM.iloc[i:i+chunkRows]
+        return
+
+    ic = 0
+    for DF in read_chunks(fileName, columns, chunkRows):
+        DF = DF.dropna(how='all')
+        DF.index = range(ic, ic+len(DF))
+        ic += len(DF)
+        yield DF
+
+
+def case_records(INPUT, sheet, columns=None, chunkRows=CASE_CHUNK):
+    ''' Row number and row (dict of the columns) of every case of the case
+    matrix '''
+    for DF in case_chunks(INPUT, sheet, columns, chunkRows):
+        yield from zip(DF.index, DF.to_dict('records'))
+
+
+def case_row(INPUT, sheet, ic):
+    ''' Row number ic of the case matrix, the file is read up to the
+    chunk of the row '''
+    for DF in case_chunks(INPUT, sheet):
+        if ic <= DF.index[-1]:
+            return DF.loc[ic].to_dict()
+    raise IndexError(sheet+' has no row '+str(ic))
+
+
+def case_matrix(INPUT, sheet, columns=None):
+    ''' The whole case matrix in one DataFrame, for the stages which
+    work on all the rows at once '''
+    CHUNKS = list(case_chunks(INPUT, sheet, columns))
+    if not CHUNKS:
+        return INPUT[sheet].iloc[:0] if columns is None else INPUT[sheet][columns].iloc[:0]
+    return pd.concat(CHUNKS)
+
+
+def check_input(DF):
+    ''' List of errors (SHEET, ROWS, MESSAGE) in the input sheets DF '''
+    ERRORS = list()
+
+    def error(sheet, mask, message, index):
+        mask = np.asarray(mask, dtype=bool)
+        if mask.any():
+            rows = ', '.join(str(r) for r in np.asarray(index)[mask])
+            ERRORS.append((sheet, rows, message))
+
+    def check_in(sheet, DS, values, message):
+        error(sheet, ~DS.isin(values), message, DS.index)
+
+    # General and Vessel Data
+    GN = DF['General'].VAL
+    VG = DF['Ves_Gen'].VAL
+    for name in ['LOC_TAG', 'SEA_DEPTH', 'GRS', 'GXDIR']:
+        error('General', [name not in GN.index], 'Missing variable', [name])
+    for name in ['NAME', 'TAG', 'TYPE', 'LENGTH', 'BREADTH', 'DEPTH', 'VRS', 'XREF', 'XDIR',
+                 'ZREF', 'XPOS', 'YPOS', 'ZPOS', 'HEEL', 'TRIM', 'HEADING', 'DRAFT', 'MASS',
+                 'LCG', 'TCG', 'VCG', 'Kxx', 'Kyy', 'Kzz', 'Kxy', 'Kyz', 'Kxz']:
+        error('Ves_Gen', [name not in VG.index], 'Missing variable', [name])
+    if ERRORS:
+        return ERRORS
+
+    error('General', [GN['GRS'] not in ['RHS', 'LHS']], 'GRS must be RHS or LHS', ['GRS'])
+    error('General', [not GN['SEA_DEPTH'] > 0], 'SEA_DEPTH must be positive', ['SEA_DEPTH'])
+    error('Ves_Gen', [VG['VRS'] not in ['RHS', 'LHS']], 'VRS must be RHS or LHS', ['VRS'])
+    error('Ves_Gen', [VG['XDIR'] not in ['FWD', 'AFT']], 'XDIR must be FWD or AFT', ['XDIR'])
+    error('Ves_Gen', [VG['XREF'] not in ['FP', 'AP', 'MS']], 'XREF must be FP, AP or MS', ['XREF'])
+    error('Ves_Gen', [VG['ZREF'] not in ['BL', 'DRAFT']], 'ZREF must be BL or DRAFT', ['ZREF'])
+    for name in ['LENGTH', 'BREADTH', 'DEPTH', 'DRAFT', 'MASS']:
+        error('Ves_Gen', [not VG[name] > 0], name+' must be positive', [name])
+
+    # Wind and Current Coefficients : xz plane symmetry, 0 to 180 degrees
+    for sheet in ['Ves_Curr', 'Ves_Wind']:
+        DIR = DF[sheet].DIR
+        error(sheet, (DIR < 0) | (DIR > 180), 'DIR must be within 0 and 180 (xz plane symmetry)', DIR.index)
+        error(sheet, DIR.diff() <= 0, 'DIR must be increasing', DIR.index)
+        error(sheet, DF[sheet].isna().any(axis=1), 'Missing coefficients', DIR.index)
+    error('Ves_Area', ~pd.Series(['CURRENT', 'WIND']).isin(DF['Ves_Area'].index), 'Missing row', ['CURRENT', 'WIND'])
+
+    # Fairleads, Line Types and Clump Types
+    for sheet in ['Ves_FL', 'Line_Types', 'Clump_Buoy']:
+        IDX = DF[sheet].index.to_series()
+        error(sheet, IDX.duplicated(), 'Duplicate ID', IDX)
+    FL = DF['Ves_FL']
+    error('Ves_FL', FL[['X_FL', 'Y_FL', 'Z_FL']].isna().any(axis=1), 'Missing coordinates', FL.index)
+
+    LT = DF['Line_Types']
+    isWiz = LT.WIZARD.isin(['Yes', True])
+    isKnown = LT.LTYP.astype(str).str.contains('Rope|wire|Chain')
+    error('Line_Types', isWiz & ~isKnown, 'LTYP must be a Rope/wire or Chain wizard type', LT.index)
+    error('Line_Types', isWiz & ~(LT.NOM_DIA > 0), 'NOM_DIA must be positive', LT.index)
+    error('Line_Types', ~(LT.MBL > 0), 'MBL must be positive', LT.index)
+
+    # Mooring Lines
+    ML = DF['Moor_Lines']
+    error('Moor_Lines', ML.index.to_series().duplicated(), 'Duplicate LINE_ID', ML.index)
+    check_in('Moor_Lines', ML.ENDA_CONN, FL.index, 'ENDA_CONN fairlead not in Ves_FL')
+    check_in('Moor_Lines', ML.ENDB_CONN, ['Anchored', 'Fixed'], 'ENDB_CONN must be Anchored or Fixed')
+    error('Moor_Lines', (ML.LAY_SETUP == 'PRE_TENS') & ~(ML.PRE_TENS > 0),
+          'PRE_TENS must be positive with LAY_SETUP PRE_TENS', ML.index)
+    error('Moor_Lines', ~(ML.HORZ_DIST > 0), 'HORZ_DIST must be positive', ML.index)
+
+    nSecs = ML.N_SECS
+    error('Moor_Lines', ~nSecs.isin(range(1, MAX_SECS+1)), 'N_SECS must be within 1 and '+str(MAX_SECS), ML.index)
+    for j in range(1, MAX_SECS+1):
+        cols = ['LINE_TYPE'+str(j), 'SEC_LEN'+str(j), 'TSG_LEN'+str(j)]
+        used = nSecs >= j
+        filled = ML[cols].notna()
+        error('Moor_Lines', used & ~filled.all(axis=1), 'Section '+str(j)+' is missing data for N_SECS', ML.index)
+        error('Moor_Lines', ~used & filled.any(axis=1), 'Section '+str(j)+' is populated beyond N_SECS', ML.index)
+        error('Moor_Lines', used & filled[cols[0]] & ~ML[cols[0]].isin(LT.index),
+              cols[0]+' not in Line_Types', ML.index)
+        error('Moor_Lines', used & ~((ML[cols[1]] > 0) & (ML[cols[2]] > 0)),
+              'SEC_LEN'+str(j)+' and TSG_LEN'+str(j)+' must be positive', ML.index)
+
+    nBuoys = ML.N_BUOYS
+    error('Moor_Lines', ~nBuoys.isin(range(0, MAX_BUOYS+1)), 'N_BUOYS must be within 0 and '+str(MAX_BUOYS), ML.index)
+    CB = DF['Clump_Buoy']
+    for j in range(1, MAX_BUOYS+1):
+        cols = ['BUOY'+str(j), 'SEG_LEN'+str(j)]
+        used = nBuoys >= j
+        filled = ML[cols].notna()
+        error('Moor_Lines', used & ~filled.all(axis=1), 'Buoy '+str(j)+' is missing data for N_BUOYS', ML.index)
+        error('Moor_Lines', ~used & filled.any(axis=1), 'Buoy '+str(j)+' is populated beyond N_BUOYS', ML.index)
+        error('Moor_Lines', used & filled[cols[0]] & ~ML[cols[0]].isin(CB.index),
+              cols[0]+' not in Clump_Buoy', ML.index)
+
+    # Loading Conditions
+    if 'Load_Conds' in DF:
+        LC = DF['Load_Conds']
+        CONDS = LC.index.to_series().astype(str)
+        error('Load_Conds', CONDS.duplicated(), 'Duplicate COND', CONDS)
+        UNKNOWN = [c for c in LC.columns if c not in VG.index]
+        error('Load_Conds', [bool(UNKNOWN)], 'Not Ves_Gen variables : '+', '.join(map(str, UNKNOWN)), ['COLUMNS'])
+        for name in ['LENGTH', 'BREADTH', 'DEPTH', 'DRAFT', 'MASS']:
+            if name in LC:
+                error('Load_Conds', LC[name].notna() & ~(LC[name] > 0), name+' must be positive', CONDS)
+        TAGS = condition_tags(DF)
+        error('Load_Conds', TAGS.duplicated().to_numpy(), 'Duplicate TAG (same file names)', CONDS)
+
+    # Case Matrices, chunk by chunk
+    for sheet in ['IntactCases', 'DamageCases']:
+        fileName = case_source(DF, sheet)
+        if fileName is not None:
+            if not os.path.exists(fileName):
+                error('General', [True], 'Case matrix file '+fileName+' not found', [CASE_FILES[sheet]])
+                continue
+            try:
+                COLUMNS = next(read_chunks(fileName, chunkRows=1)).columns
+            except StopIteration:
+                continue
+            MISSING = [c for c in CASE_COLUMNS[sheet] if c not in COLUMNS]
+            error(sheet, [bool(MISSING)], 'Missing columns in '+fileName+' : '+', '.join(MISSING), [fileName])
+            if MISSING:
+                continue
+
+        NAMES = set()
+        for CM in case_chunks(DF, sheet):
+            ROWS = CM.CASE_ID.astype(str)
+            NAME = ROWS.str.replace(' ', '_')
+            error(sheet, NAME.duplicated() | NAME.isin(NAMES), 'Duplicate CASE_ID (same file name)', ROWS)
+            NAMES.update(NAME)
+            check_in(sheet, CM.DIR_REF.set_axis(ROWS), DIR_REFS, 'Unknown DIR_REF')
+            check_in(sheet, CM.DIR_CONV.set_axis(ROWS), DIR_CONVS, 'Unknown DIR_CONV')
+            check_in(sheet, CM.WAVE_TYPE.set_axis(ROWS), WAVE_TYPES, 'Unknown WAVE_TYPE')
+            error(sheet, CM[['DIR', 'Hs', 'Tp', 'Vw', 'Vc']].isna().any(axis=1), 'Missing environment data', ROWS)
+            error(sheet, (CM.Hs < 0) | (CM.Vw < 0) | (CM.Vc < 0), 'Hs, Vw and Vc must not be negative', ROWS)
+            error(sheet, (CM.Hs > 0) & ~(CM.Tp > 0), 'Tp must be positive', ROWS)
+            error(sheet, (CM.WAVE_TYPE == 'JONSWAP') & ~CM.GAMMA.between(1, 7),
+                  'GAMMA must be within 1 and 7 for JONSWAP', ROWS)
+            if sheet == 'DamageCases':
+                check_in(sheet, CM.DAM_LIN.set_axis(ROWS), ML.index, 'DAM_LIN not in Moor_Lines')
+
+    return ERRORS
+
+
+def preflight(fileName=INPUT_FILE):
+    ''' Check the input work book, raise ValueError listing all errors '''
+    ERRORS = check_input(read_input(fileName))
+    if ERRORS:
+        report = pd.DataFrame(ERRORS, columns=['SHEET', 'ROWS', 'ERROR'])
+        raise ValueError('Errors in '+fileName+' :\n'+report.to_string(index=False))
+
+
+def report(inputFile=INPUT_FILE):
+    ''' Check the input work book, returns (ok, text report of the errors) '''
+    ERRORS = check_input(read_input(inputFile))
+    if ERRORS:
+        return False, pd.DataFrame(ERRORS, columns=['SHEET', 'ROWS', 'ERROR']).to_string(index=False)
+    return True, inputFile+' : No errors found'
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.cli
+
+Description :
+
+    Command Line of the OrcaPySM1 Stages
+
+        python -m orcapysm1 --help
+        python -m orcapysm1 check
+        python -m orcapysm1 build
+        python -m orcapysm1 post-static
+        python -m orcapysm1 loads
+        python -m orcapysm1 cases [--shared-buildup] [--mirror]
+        python -m orcapysm1 plan [--workers N] [--hosts H]
+        python -m orcapysm1 run [--workers N]
+        python -m orcapysm1 pipeline [--workers N] [--queue-size N]
+        python -m orcapysm1 conditions [--conds C1 C2 ..] [--workers N]
+        python -m orcapysm1 post-dynamic [--stream] [--storm-hours H] [--no-cache]
+        python -m orcapysm1 motions [--storm-hours H] [--no-cache]
+        python -m orcapysm1 extremes [--risk-factor R] [--bootstrap B]
+        python -m orcapysm1 range-graph [--workers N]
+        python -m orcapysm1 spectra [--dividing-period 40] [--segment 1200]
+        python -m orcapysm1 plots [--format png|svg]
+        python -m orcapysm1 archive [--delete-sim]
+        python -m orcapysm1 telemetry [--query EXPR]
+        python -m orcapysm1 mesh | tune | sweep [--workers N]
+        python -m orcapysm1 publish | work | queue-status --queue QDIR
+        python -m orcapysm1 worker serve | status | stop
+
+    Each command calls one function of a stage module (COMMANDS). The stage
+    module, and with it pandas and OrcFxAPI, is only imported when its
+    command is run, so that --help starts at once. With --worker the
+    command is sent to the resident worker (orcapysm1.daemon), which has
+    the imports and the Input sheets already loaded.
+
+    The options of a command are passed as keyword arguments to its
+    function, the options not given keep the defaults of the function.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import sys
+import inspect
+import argparse
+import importlib
+from .common import INPUT_FILE, show_progress
+
+''' ---------------------------------------------------------------------------
+    Commands : Stage Module, Function and Help
+--------------------------------------------------------------------------- '''
+COMMANDS = {'check': ('check', 'report',
+                      'Preflight check of the Input work book'),
+            'build': ('build', 'build',
+                      'Step 2 : Intact model, line setup and statics'),
+            'post-static': ('post_static', 'post_static',
+                            'Step 3 : Intact static results to output.xlsx'),
+            'loads': ('loads', 'mean_loads',
+                      'Mean wind and current loads of all the cases, without OrcaFlex'),
+            'cases': ('cases', 'generate_cases',
+                      'Step 4 : Intact and damage dynamic case files'),
+            'plan': ('plan', 'report',
+                     'Dry run : predicted run times, file sizes and makespan'),
+            'run': ('run', 'run_cases',
+                    'Run the dynamic cases in parallel, adaptive durations'),
+            'post-dynamic': ('post_dynamic', 'post_dynamic',
+                             'Intact dynamic results and envelope to output.xlsx'),
+            'motions': ('motions', 'vessel_motions',
+                        'Vessel offsets and fairlead excursions to output.xlsx'),
+            'extremes': ('extremes', 'extreme_fits',
+                         'Rayleigh, Weibull, Gumbel and GPD fits with bootstrap intervals'),
+            'range-graph': ('range_graph', 'range_graph',
+                            'Touchdown, anchor uplift and along line tension envelopes'),
+            'pipeline': ('pipeline', 'pipeline',
+                         'Generate, run and post process with the stages overlapped'),
+            'conditions': ('conditions', 'run_conditions',
+                           'All the vessel loading conditions of Load_Conds on one pool'),
+            'spectra': ('spectra', 'spectra',
+                        'Welch spectra, low / wave frequency split of tensions and motions'),
+            'plots': ('plots', 'plot_cases',
+                      'Time history and envelope charts of all the cases'),
+            'archive': ('archive', 'archive_cases',
+                        'Compact result archives of the solved case files'),
+            'telemetry': ('telemetry', 'report',
+                          'Solver telemetry, outlier (slow) cases'),
+            'mesh': ('mesh', 'mesh_study',
+                     'Segment length convergence study'),
+            'tune': ('tune', 'tune',
+                     'Implicit solver settings benchmark'),
+            'sweep': ('sweep', 'sweep',
+                      'Quasi-static offset sweep, mooring stiffness curves'),
+            'publish': ('workqueue', 'publish_cases',
+                        'Publish the tasks of all the cases to a shared queue'),
+            'work': ('workqueue', 'work',
+                     'Run queue workers on this node until the queue is finished'),
+            'queue-status': ('workqueue', 'status',
+                             'Number of queue tasks in each state')}
+
+# Commands returning (ok, report text)
+REPORTS = ['check', 'plan', 'queue-status', 'telemetry']
+
+
+def stage_function(command):
+    ''' Function of a command, its module is imported here '''
+    moduleName, functionName = COMMANDS[command][:2]
+    module = importlib.import_module('.'+moduleName, __package__)
+    return getattr(module, functionName)
+
+
+def call(command, kwargs):
+    ''' Run a command in this process, returns (ok, output text). The
+    options which are not arguments of its function (--input for the
+    queue commands) are ignored '''
+    function = stage_function(command)
+    params = inspect.signature(function).parameters
+    result = function(**{k: v for k, v in kwargs.items() if k in params})
+    if command in REPORTS:
+        return result
+    return True, command+' done'
+
+
+def parser():
+    ''' Argument parser of all the commands '''
+    p = argparse.ArgumentParser(prog='python -m orcapysm1',
+                                description='OrcaFlex automation of spread moored vessels')
+    p.add_argument('--input', dest='inputFile', default=None,
+                   help='Input Excel work book (default '+INPUT_FILE+')')
+    p.add_argument('--worker', action='store_true',
+                   help='Run the command in the resident worker')
+    sub = p.add_subparsers(dest='command', metavar='command')
+    sub.required = True
+
+    cmd = dict()
+    for name, (moduleName, functionName, helpText) in COMMANDS.items():
+        cmd[name] = sub.add_parser(name, help=helpText, description=helpText)
+
+    cmd['cases'].add_argument('--shared-buildup', dest='sharedBuildup', action='store_true', default=None,
+                              help='Share one build-up parent per group, cases as restart files')
+    for name in ['cases', 'pipeline']:
+        cmd[name].add_argument('--mirror', dest='mirrorCases', action='store_true', default=None,
+                               help='Skip the mirror image cases of a symmetric mooring')
+    cmd['conditions'].add_argument('--conds', nargs='+', default=None,
+                                   help='Loading conditions to run (default all of Load_Conds)')
+    for name in ['post-dynamic', 'pipeline', 'conditions']:
+        cmd[name].add_argument('--stream', dest='streamStats', action='store_true', default=None,
+                               help='Read the time histories in chunks')
+    cmd['pipeline'].add_argument('--gen-workers', dest='genWorkers', type=int, default=None,
+                                 help='Processes generating the case files (default 1)')
+    cmd['pipeline'].add_argument('--post-workers', dest='postWorkers', type=int, default=None,
+                                 help='Processes post processing the cases (default 1)')
+    cmd['pipeline'].add_argument('--queue-size', dest='queueSize', type=int, default=None,
+                                 help='Cases waiting or running ahead of a stage (default 2 x workers)')
+    for name in ['post-dynamic', 'pipeline', 'conditions', 'motions', 'extremes']:
+        cmd[name].add_argument('--storm-hours', dest='stormDurationHours', type=float, default=None,
+                               help='Storm duration of the Rayleigh MPM (default 3)')
+    for name in ['post-dynamic', 'pipeline', 'conditions', 'motions', 'extremes', 'range-graph', 'spectra']:
+        cmd[name].add_argument('--no-cache', dest='useCache', action='store_false', default=None,
+                               help='Recompute all the cases, ignoring the result cache')
+    cmd['extremes'].add_argument('--risk-factor', dest='riskFactor', type=float, default=None,
+                                 help='Risk factor of the EXTREME values, %% (default 1)')
+    cmd['extremes'].add_argument('--bootstrap', dest='nBootstrap', type=int, default=None,
+                                 help='Number of bootstrap resamples (default 200)')
+    cmd['spectra'].add_argument('--dividing-period', dest='dividingPeriod', type=float, default=None,
+                                help='LF / WF dividing period, s (default 40)')
+    cmd['spectra'].add_argument('--segment', dest='segmentDuration', type=float, default=None,
+                                help='Welch segment duration, s (default 1200)')
+    cmd['plots'].add_argument('--format', dest='fmt', choices=['png', 'svg'], default=None,
+                              help='Image format of the charts (default png)')
+    cmd['plots'].add_argument('--plot-dir', dest='plotDir', default=None,
+                              help='Folder of the charts (default plots)')
+    cmd['archive'].add_argument('--delete-sim', dest='deleteSim', action='store_true', default=None,
+                                help='Delete each simulation file once its archive is written')
+    cmd['telemetry'].add_argument('--query', dest='expr', default=None,
+                                  help='pandas query of the table, for example "STAGE == \'run\'"')
+    cmd['plan'].add_argument('--hosts', dest='nHosts', type=int, default=None,
+                             help='Number of machines running the cases (default 1)')
+    cmd['plan'].add_argument('--plan-file', dest='planFile', default=None,
+                             help='File of the plan (default run_plan.csv)')
+    for name in ['plan', 'run', 'pipeline', 'conditions', 'motions', 'extremes', 'range-graph', 'spectra', 'plots', 'archive', 'mesh', 'tune', 'sweep']:
+        cmd[name].add_argument('--workers', dest='nWorkers', type=int, default=None,
+                               help='Number of worker processes (default all CPUs)')
+    cmd['mesh'].add_argument('--cases', dest='caseIds', nargs='+', default=None,
+                             help='CASE_IDs of the representative cases')
+    cmd['mesh'].add_argument('--write-back', dest='writeBack', action='store_true', default=None,
+                             help='Write the recommended segment lengths to Input_MESH.xlsx')
+    cmd['tune'].add_argument('--case', dest='caseId', default=None,
+                             help='CASE_ID of the representative case')
+    for name in ['publish', 'work', 'queue-status']:
+        cmd[name].add_argument('--queue', dest='queueDir', default=None,
+                               help='Queue directory on the shared file system (default queue)')
+    cmd['publish'].add_argument('--skip', nargs='+', default=None, choices=['generate', 'simulate', 'post', 'merge'],
+                                help='Task kinds not to publish')
+    cmd['work'].add_argument('--workers', dest='nWorkers', type=int, default=None,
+                             help='Number of worker processes on this node (default 1)')
+    cmd['work'].add_argument('--lease-time', dest='leaseTime', type=float, default=None,
+                             help='Seconds without heartbeat before a lease expires (default 300)')
+
+    worker = sub.add_parser('worker', help='Resident worker : serve, status or stop',
+                            description='Resident worker : serve, status or stop')
+    worker.add_argument('action', choices=['serve', 'status', 'stop'])
+
+    return p
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    show_progress(sys.stdout)
+
+    if args.command == 'worker':
+        from . import daemon
+        if args.action == 'serve':
+            daemon.serve(args.inputFile or INPUT_FILE)
+            return 0
+        reply = daemon.request(cmd=args.action)
+        for key, value in reply.items():
+            print(key, ':', value)
+        return 0 if reply['ok'] else 1
+
+    # Options of the command, those not given keep the function defaults
+    kwargs = {k: v for k, v in vars(args).items() if k not in ('command', 'worker') and v is not None}
+
+    if args.worker:
+        from . import daemon
+        reply = daemon.request(cmd='run', command=args.command, kwargs=kwargs)
+        print(reply['output'])
+        print(args.command, 'OK' if reply['ok'] else 'FAILED', '%.2f s' % reply.get('time', 0))
+        return 0 if reply['ok'] else 1
+
+    ok, output = call(args.command, kwargs)
+    print(output)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.common
+
+Description :
+
+    Names and Helpers Shared by all the Stages
+
+    File and folder names, the BASENAME of the generated files and the
+    direction conventions of the case matrices. Only the standard library
+    is imported here, so that the command line (orcapysm1.cli) and the
+    checks start without loading pandas or OrcFxAPI.
+
+    The stages report their progress with progress(), on the 'orcapysm1'
+    logger. Nothing is shown until show_progress() is called, as the command
+    line does (orcapysm1.cli), so the stages stay quiet when called from
+    Python.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import os
+import logging
+
+''' ---------------------------------------------------------------------------
+    Name of the Input Excel File, Folders and Output Files
+--------------------------------------------------------------------------- '''
+INPUT_FILE = 'Input.xlsx'
+
+INTACT_DIR = 'INTACT'
+DAMAGE_DIR = 'DAMAGE'
+
+OUTPUT_FILE = 'output.xlsx'
+SOLVER_SETTINGS = 'solver_settings.csv'
+BUILDUP_MANIFEST = 'buildup_groups.csv'
+MIRROR_MANIFEST = 'mirror_cases.csv'
+
+# Seconds, build-up stage of the dynamic analyses (orcapysm1.build)
+BUILDUP_DURATION = 8.0
+
+FAMILY_DIRS = {'INTACT': INTACT_DIR, 'DAMAGE': DAMAGE_DIR}
+
+# Vessel loading conditions (orcapysm1.conditions) : <Input>::<COND> reads
+# the work book with the Ves_Gen values of the condition COND
+CONDITIONS_DIR = 'CONDITIONS'
+COND_SEP = '::'
+
+
+''' ---------------------------------------------------------------------------
+    Progress of the Stages
+--------------------------------------------------------------------------- '''
+LOG = logging.getLogger('orcapysm1')
+LOG.addHandler(logging.NullHandler())
+
+
+def progress(*args):
+    ''' Report the progress of a stage, the arguments are joined as print does '''
+    LOG.info(' '.join(str(a) for a in args))
+
+
+def show_progress(stream=None):
+    ''' Show the progress of the stages on a stream (sys.stderr by default)
+    in place of the handlers of the logger. Returns the handlers replaced '''
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    replaced = LOG.handlers
+    LOG.handlers = [handler]
+    LOG.setLevel(logging.INFO)
+    return replaced
+
+
+# Function to create a valid file name
+def filename_valid(filename):
+    invalid = '<>:"/\|?* '
+    for char in invalid:
+        filename = filename.replace(char, '')
+    return filename
+
+
+def split_input(inputFile):
+    ''' Work book and loading condition (None for the Ves_Gen values) of an
+    input name <Input>::<COND> '''
+    fileName, sep, cond = str(inputFile).partition(COND_SEP)
+    return fileName, (cond if sep else None)
+
+
+def condition_input(inputFile, cond):
+    ''' Input name of the loading condition COND of a work book, with the
+    absolute path of the work book '''
+    return os.path.abspath(split_input(inputFile)[0])+COND_SEP+str(cond)
+
+
+def condition_dir(cond):
+    ''' Folder of the files and results of a loading condition '''
+    return os.path.join(CONDITIONS_DIR, filename_valid(str(cond)))
+
+
+def basename(INPUT):
+    ''' BASENAME of the generated files : Vessel Tag _ Location Tag '''
+    LOC_TAG = filename_valid(INPUT['General'].VAL['LOC_TAG'])
+    VES_TAG = filename_valid(INPUT['Ves_Gen'].VAL['TAG'])
+    return VES_TAG+'_'+LOC_TAG
+
+
+def statics_file(BASENAME):
+    ''' Intact static simulation file written by the build stage '''
+    return os.path.join(INTACT_DIR, BASENAME+'_INTACT_STATICS.sim')
+
+
+def case_file(BASENAME, family, caseId):
+    ''' Dynamic simulation file of a case of the family INTACT / DAMAGE '''
+    return os.path.join(FAMILY_DIRS[family], BASENAME+'_'+family+'_DYNAMICS_' +
+                        str(caseId).replace(' ', '_')+'.sim')
+
+
+def case_list(INPUT, BASENAME):
+    ''' All the dynamic cases as (CASE_ID, FAMILY, fileName, lines), the
+    damaged line (DAM_LIN) is not in the lines of a damage case. The case
+    matrices are read in chunks (orcapysm1.check.case_chunks) '''
+    from . import check
+
+    DF_ML = INPUT['Moor_Lines']
+
+    CASES = list()
+    for DF_ICM in check.case_chunks(INPUT, 'IntactCases', ['CASE_ID']):
+        for caseId in DF_ICM.CASE_ID:
+            CASES.append((caseId, 'INTACT', case_file(BASENAME, 'INTACT', caseId), list(DF_ML.index)))
+    for DF_DCM in check.case_chunks(INPUT, 'DamageCases', ['CASE_ID', 'DAM_LIN']):
+        for caseId, damLin in zip(DF_DCM.CASE_ID, DF_DCM.DAM_LIN):
+            damLines = [l for l in DF_ML.index if l != damLin]
+            CASES.append((caseId, 'DAMAGE', case_file(BASENAME, 'DAMAGE', caseId), damLines))
+    return CASES
+
+
+def write_sheets(outputFile, SHEETS, index=True):
+    ''' Write the tables {sheet name: DataFrame} to the work book
+    outputFile, in place of the sheets of the same names. The work book is
+    created if missing '''
+    import pandas as pd
+
+    if os.path.exists(outputFile):
+        writer = pd.ExcelWriter(outputFile,mode='a',if_sheet_exists='replace')
+    else:
+        writer = pd.ExcelWriter(outputFile,mode='w')
+    with writer:
+        for sheet, DF in SHEETS.items():
+            DF.to_excel(writer, sheet_name=sheet, index=index)
+
+
+def case_direction(DIR_REF, DIR_CONV, DIR, GXDIR, vesHeading):
+    ''' Direction of the environment in the OrcaFlex Global axes (degrees,
+    anticlockwise from Global X) from the convention of a case row '''
+    if DIR_REF == 'GLOBX':
+        LAG_ANGLE = 0
+    elif DIR_REF == 'NORTH':
+        LAG_ANGLE = GXDIR
+    elif DIR_REF == 'EAST':
+        LAG_ANGLE = GXDIR-90
+    elif DIR_REF == 'SOUTH':
+        LAG_ANGLE = GXDIR-180
+    elif DIR_REF == 'WEST':
+        LAG_ANGLE = GXDIR-270
+    elif DIR_REF == 'VESX+':
+        LAG_ANGLE = vesHeading
+    elif DIR_REF == 'VESX-':
+        LAG_ANGLE = vesHeading + 180
+
+    if DIR_CONV == 'ANTICLOCKWISE':
+        TEMP1 = DIR
+    else:
+        TEMP1 = 360-DIR
+
+    TEMP2 = TEMP1+LAG_ANGLE
+
+    return (TEMP2 % 360)
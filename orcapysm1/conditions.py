@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.conditions
+
+Description :
+
+    Vessel Loading Conditions in One Batch
+
+        python -m orcapysm1 conditions [--conds C1 C2 ..] [--workers N]
+
+    The sheet Load_Conds of the Input work book lists the loading
+    conditions of the vessel (ballast, intermediate, full load ...), one
+    row per COND with the Ves_Gen variables which differ from the Ves_Gen
+    sheet (DRAFT, MASS, LCG, VCG, radii of gyration, TAG ...). The rest of
+    the work book (line types, clump types, mooring lines and the case
+    matrices) is shared by all the conditions.
+
+    Each condition has its own result namespace, the folder
+    CONDITIONS/<COND> with its INTACT and DAMAGE folders, output.xlsx,
+    envelope.pkl, run_log.xlsx, telemetry.csv and result cache. The vessel
+    TAG of a condition (TAG of Load_Conds, else the Ves_Gen TAG _ COND) is
+    in all its file names.
+
+    All the conditions share one process pool :
+
+        build       The model of each condition with its own Line Setup
+                    Wizard and statics (orcapysm1.build), and its static
+                    results (orcapysm1.post_static), all the conditions in
+                    parallel
+        cases       As soon as a condition is built, every case of its
+                    case matrices is queued : generate, run (adaptive
+                    duration) and post process (result cache) in one task
+
+    The envelope of each condition is saved after every case, at the end
+    the envelope tables are written to the output.xlsx of the condition and
+    the governing tension and offsets of all the conditions to the sheet
+    "Load Conditions" of outputFile.
+
+    Any other stage is run on one condition from its folder with the input
+    <Input>::<COND>, for example in CONDITIONS/BALLAST :
+
+        python -m orcapysm1 --input ../../Input.xlsx::BALLAST extremes
+
+    The mirror image cases and the shared build-up are not used here.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pandas as pd
+import os
+import concurrent.futures
+from . import check
+from . import build
+from . import post_static
+from . import cases
+from . import run
+from . import post_dynamic
+from . import envelope
+from . import telemetry
+from . import cache
+from .common import (INPUT_FILE, OUTPUT_FILE, SOLVER_SETTINGS, basename, case_list,
+                     condition_input, condition_dir, progress, write_sheets)
+
+N_WORKERS = os.cpu_count()
+
+
+def in_condition(cond, function, *args, **kwargs):
+    ''' Call a function in the folder of the loading condition cond '''
+    folder = condition_dir(cond)
+    os.makedirs(folder, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        return function(*args, **kwargs)
+    finally:
+        os.chdir(cwd)
+
+
+def build_condition(condInput, outputFile=OUTPUT_FILE, solverSettings=SOLVER_SETTINGS):
+    ''' Intact model, line setup and statics of a loading condition and
+    its static results, returns the statics file '''
+    fileName = build.build(condInput, solverSettings)
+    post_static.post_static(condInput, outputFile)
+    return fileName
+
+
+def condition_case(condInput, family, ic, lines, vesName, streamStats=post_dynamic.STREAM_STATS,
+                   stormDurationHours=post_dynamic.StormDurationHours, useCache=cache.USE_CACHE):
+    ''' Generate, run and post process the case ic of the family INTACT /
+    DAMAGE of a loading condition, returns the run log and the statistics
+    (LINE, VES) '''
+    fileName = cases.generate_case(condInput, family, ic)
+    RUN = run.run_case(fileName, lines, vesName)
+    LINE, VES = cache.call(post_dynamic.case_results, fileName, lines, vesName, streamStats,
+                           stormDurationHours, useCache=useCache)
+    return RUN, LINE, VES
+
+
+def condition_setup(inputFile, cond):
+    ''' Input name, vessel, cases, row numbers, envelope and MBLs of a
+    loading condition '''
+    condInput = condition_input(inputFile, cond)
+    INPUT = check.read_input(condInput)
+    DF_ML = INPUT['Moor_Lines']
+
+    ROWS = dict()
+    for family, sheet in [('INTACT', 'IntactCases'), ('DAMAGE', 'DamageCases')]:
+        for DF_CM in check.case_chunks(INPUT, sheet, ['CASE_ID']):
+            for ic, caseId in zip(DF_CM.index, DF_CM.CASE_ID):
+                ROWS[(str(caseId), family)] = ic
+
+    return dict(input=condInput, INPUT=INPUT, vesName=INPUT['Ves_Gen'].VAL['NAME'],
+                cases=case_list(INPUT, basename(INPUT)), rows=ROWS, lines=list(DF_ML.index),
+                mbl=envelope.line_end_mbl(DF_ML, INPUT['Line_Types']),
+                envelope=envelope.mooring_envelope(list(DF_ML.index), post_dynamic.VesParmList),
+                runs=list())
+
+
+def full(allLines, lines, vals):
+    ''' Values of the lines of a case on all the lines (NaN if absent) '''
+    A = np.full(len(allLines), np.nan)
+    A[[allLines.index(line) for line in lines]] = vals
+    return A
+
+
+def run_conditions(inputFile=INPUT_FILE, outputFile=OUTPUT_FILE, conds=None, nWorkers=N_WORKERS,
+                   streamStats=post_dynamic.STREAM_STATS, stormDurationHours=post_dynamic.StormDurationHours,
+                   useCache=cache.USE_CACHE):
+    ''' Build, generate, run and post process all the loading conditions
+    (or the conditions conds) on one process pool, returns the summary
+    table of the conditions '''
+
+    # Preflight check of the work book and of every condition
+    check.preflight(inputFile)
+    INPUT = check.read_input(inputFile)
+    if 'Load_Conds' not in INPUT:
+        raise ValueError(inputFile+' has no Load_Conds sheet')
+
+    CONDS = [str(c) for c in INPUT['Load_Conds'].index]
+    if conds is not None:
+        MISSING = [str(c) for c in conds if str(c) not in CONDS]
+        if MISSING:
+            raise ValueError('Loading conditions not in Load_Conds : '+', '.join(MISSING))
+        CONDS = [str(c) for c in conds]
+
+    STATE = dict()
+    for cond in CONDS:
+        check.preflight(condition_input(inputFile, cond))
+        STATE[cond] = condition_setup(inputFile, cond)
+
+    # Solver settings of the work book folder (orcapysm1.tune), for all the conditions
+    solverSettings = os.path.abspath(SOLVER_SETTINGS)
+
+    ''' -----------------------------------------------------------------------
+    Build the Conditions, then Fan Out their Cases on the Same Pool
+    -------------------------------------------------------------------------'''
+    with concurrent.futures.ProcessPoolExecutor(max_workers=nWorkers) as pool:
+        futures = dict()
+        for cond in CONDS:
+            futures[pool.submit(in_condition, cond, build_condition, STATE[cond]['input'], outputFile,
+                                solverSettings)] = (cond, None)
+
+        while futures:
+            done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                cond, case = futures.pop(future)
+                S = STATE[cond]
+
+                # Condition built : queue all its cases
+                if case is None:
+                    future.result()
+                    progress(cond, 'built')
+                    for case in S['cases']:
+                        ic = S['rows'][(str(case[0]), case[1])]
+                        futures[pool.submit(in_condition, cond, condition_case, S['input'], case[1], ic,
+                                            list(case[3]), S['vesName'], streamStats, stormDurationHours,
+                                            useCache)] = (cond, case)
+                    continue
+
+                RUN, LINE, VES = future.result()
+                caseId, family, fileName, lines = case
+                S['runs'].append(dict(CASE_ID=caseId, FAMILY=family, **RUN))
+                progress(cond, family, caseId, 'Duration', RUN['DURATION'])
+
+                # Partial envelope of the condition, saved after every case
+                S['envelope'].update(caseId, family,
+                                     MAX_MPM_TEN_A=full(S['lines'], lines, LINE['MPV_MAX'][:,0]),
+                                     MAX_MPM_TEN_B=full(S['lines'], lines, LINE['MPV_MAX'][:,4]),
+                                     MIN_TEN_A=full(S['lines'], lines, LINE['MIN'][:,0]),
+                                     MIN_TEN_B=full(S['lines'], lines, LINE['MIN'][:,4]),
+                                     MAX_OFFSET=VES['MPV_MAX'],
+                                     MIN_OFFSET=VES['MPV_MIN'])
+                S['envelope'].save(os.path.join(condition_dir(cond), envelope.ENVELOPE_FILE))
+
+    ''' -----------------------------------------------------------------------
+    Run Logs and Envelopes of each Condition, Summary of all the Conditions
+    -------------------------------------------------------------------------'''
+    SUMMARY = list()
+    for cond in CONDS:
+        S = STATE[cond]
+        folder = condition_dir(cond)
+        if S['runs']:
+            DF_RUN = pd.DataFrame(S['runs'])
+            DF_RUN.to_excel(os.path.join(folder, run.RUN_LOG), sheet_name='Adaptive Durations', index=False)
+            telemetry.record(DF_RUN.to_dict('records'), 'run', os.path.join(folder, telemetry.TELEMETRY_FILE))
+
+        MBL_A, MBL_B = S['mbl']
+        DF_TEN = envelope.envelope_table(S['envelope'], MBL_A, MBL_B)
+        DF_OFF = envelope.offset_table(S['envelope'])
+        write_sheets(os.path.join(folder, outputFile), {'ENVELOPE Tensions': DF_TEN,
+                                                        'ENVELOPE Excursions': DF_OFF})
+
+        # Governing End A tension and vessel excursions of the condition
+        VG = S['INPUT']['Ves_Gen'].VAL
+        TEN = S['envelope'].query('MAX_MPM_TEN_A')
+        OFF = S['envelope'].query('MAX_OFFSET')
+        gov = TEN.VALUE.idxmax() if S['envelope'].nCases else None
+        SUMMARY.append(dict(COND=cond, TAG=VG['TAG'], DRAFT=VG['DRAFT'], MASS=VG['MASS'],
+                            CASES=S['envelope'].nCases,
+                            LINE=gov,
+                            MAX_MPM_TEN_A=None if gov is None else TEN.VALUE[gov],
+                            UTILISATION=DF_TEN['END A UTILISATION'].max() if gov is not None else None,
+                            CASE_ID=None if gov is None else TEN.CASE_ID[gov],
+                            FAMILY=None if gov is None else TEN.FAMILY[gov],
+                            **{'MAX MPM '+name: OFF.VALUE[name] for name in OFF.index}))
+
+    DF_SUM = pd.DataFrame(SUMMARY)
+    write_sheets(outputFile, {'Load Conditions': DF_SUM}, index=False)
+
+    return DF_SUM
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.daemon
+
+Description :
+
+    Resident Worker for the OrcaPySM1 Stages
+
+    Every run of a command pays for the interpreter start up, the imports
+    of pandas and OrcFxAPI (DLL and licence initialisation), the parsing of
+    the Input Excel work book and the loading of the intact statics model.
+    This worker is started once and keeps all of them warm:
+
+        python -m orcapysm1 worker serve
+
+    The commands are then run inside the worker process from the client:
+
+        python -m orcapysm1 --worker cases
+        python -m orcapysm1 --worker post-dynamic
+        python -m orcapysm1 --worker check
+        python -m orcapysm1 worker status
+        python -m orcapysm1 worker stop
+
+    The parsed Input sheets and the intact statics simulation are cached in
+    orcapysm1.check until the files change. The worker also watches the
+    Input Excel file: on a change the input is checked again and only the
+    stages affected by the changed sheets (WATCH_STAGES) are run again.
+    Changes to the model sheets are only checked and reported, since the
+    intact statics file needs the manual import of the vessel wave loads
+    (Step 3) after the build stage.
+
+    Requests are served one at a time over a local socket (ADDRESS). The
+    connections are authenticated with a random key, made new at every
+    start of the worker and written to KEY_FILE in a folder of the user's
+    home that only the user can read, so that other users of a shared
+    machine can not send requests (the requests are pickled). The output
+    and the progress (orcapysm1.common.progress) of a request are captured
+    while it holds the worker lock, the stages run again by the Input
+    watcher take the same lock, so that their output never goes to a
+    client.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import os
+import io
+import sys
+import time
+import secrets
+import threading
+import traceback
+import contextlib
+from multiprocessing.connection import Listener, Client
+from multiprocessing import AuthenticationError
+from .common import INPUT_FILE, LOG, progress, show_progress
+
+''' ---------------------------------------------------------------------------
+    Worker Settings
+--------------------------------------------------------------------------- '''
+ADDRESS = ('localhost', 6061)
+KEY_FILE = os.path.join(os.path.expanduser('~'), '.orcapysm1', 'worker.key')
+WATCH_INTERVAL = 2.0            # Seconds between the checks of the Input
+
+# Commands run again when a sheet of the Input changes
+WATCH_STAGES = {'IntactCases': ['cases'],
+                'DamageCases': ['cases']}
+
+LOCK = threading.RLock()
+STATUS = {'started': time.time(), 'requests': 0, 'last': None}
+
+
+def write_key(keyFile=KEY_FILE):
+    ''' New random authentication key, written to keyFile readable by the
+    user only. Returns the key '''
+    folder = os.path.dirname(keyFile)
+    os.makedirs(folder, mode=0o700, exist_ok=True)
+    os.chmod(folder, 0o700)
+    key = secrets.token_bytes(32)
+    if os.path.exists(keyFile):
+        os.remove(keyFile)
+    fd = os.open(keyFile, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    return key
+
+
+def read_key(keyFile=KEY_FILE):
+    ''' Authentication key of the running worker '''
+    if not os.path.exists(keyFile):
+        raise ConnectionError('No worker key '+keyFile+', start the worker with python -m orcapysm1 worker serve')
+    with open(keyFile, 'rb') as f:
+        return f.read()
+
+
+def console(*args):
+    ''' Print to the console of the worker, never to a client '''
+    print(*args, file=sys.__stdout__, flush=True)
+
+
+def run_command(command, kwargs):
+    ''' Run a command in this process, returns its output and run time '''
+    from . import cli
+
+    if command not in cli.COMMANDS:
+        return {'ok': False, 'output': 'Unknown command '+str(command)}
+
+    with LOCK:
+        out = io.StringIO()
+        tStart = time.perf_counter()
+        ok = True
+        replaced = show_progress(out)
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+            try:
+                ok, output = cli.call(command, kwargs)
+                print(output)
+            except BaseException:
+                ok = False
+                traceback.print_exc()
+            finally:
+                LOG.handlers = replaced
+        result = {'ok': ok, 'command': command, 'time': time.perf_counter()-tStart,
+                  'output': out.getvalue()}
+        STATUS['requests'] += 1
+        STATUS['last'] = (command, ok, result['time'])
+    return result
+
+
+def watch_input(inputFile):
+    ''' Run the affected stages again when the Input sheets change '''
+    from . import check
+
+    SHEETS = check.read_input(inputFile)
+    error = None
+    while True:
+        time.sleep(WATCH_INTERVAL)
+        try:
+            NEW = check.read_input(inputFile)
+        except Exception as e:
+            # File being saved or a sheet missing : reported once, read again
+            if repr(e) != error:
+                error = repr(e)
+                with LOCK:
+                    progress('Input not read :', error)
+            continue
+        error = None
+
+        # Sheets changed, added (optional sheets) or removed
+        changed = [name for name in NEW if name not in SHEETS or not NEW[name].equals(SHEETS[name])]
+        changed += [name for name in SHEETS if name not in NEW]
+        if not changed:
+            continue
+        SHEETS = NEW
+
+        stages = list()
+        for name in changed:
+            for stage in WATCH_STAGES.get(name, []):
+                if stage not in stages:
+                    stages.append(stage)
+
+        # The check and the stages in one hold of the lock, no request in between
+        with LOCK:
+            console('Input changed :', ', '.join(changed))
+            result = run_command('check', {'inputFile': inputFile})
+            console(result['output'])
+            if not result['ok']:
+                continue
+
+            for stage in stages:
+                result = run_command(stage, {'inputFile': inputFile})
+                console(stage, 'OK' if result['ok'] else 'FAILED', '%.1f s' % result['time'])
+                if not result['ok']:
+                    console(result['output'])
+                    break
+
+
+def handle(conn):
+    ''' Serve the requests of one client connection '''
+    with conn:
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                return
+            cmd = request.get('cmd')
+            if cmd == 'run':
+                conn.send(run_command(request.get('command'), request.get('kwargs', {})))
+            elif cmd == 'status':
+                conn.send(dict(STATUS, ok=True, uptime=time.time()-STATUS['started']))
+            elif cmd == 'stop':
+                conn.send({'ok': True, 'output': 'Stopping'})
+                os._exit(0)
+            else:
+                conn.send({'ok': False, 'output': 'Unknown request '+str(cmd)})
+
+
+def serve(inputFile=INPUT_FILE):
+    ''' Warm up the imports and the caches, then serve the requests '''
+    import numpy
+    import pandas
+    import OrcFxAPI
+    from . import check
+
+    # DLL and licence initialisation
+    OrcFxAPI.Model()
+
+    # Parse the Input once
+    check.read_input(inputFile)
+
+    threading.Thread(target=watch_input, args=(inputFile,), daemon=True).start()
+
+    with Listener(ADDRESS, authkey=write_key()) as listener:
+        console('OrcaPySM1 worker listening on', ADDRESS)
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, OSError) as e:
+                console('Connection refused :', repr(e))
+                continue
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+
+def request(**kwargs):
+    ''' Send one request to the worker and return its reply '''
+    with Client(ADDRESS, authkey=read_key()) as conn:
+        conn.send(kwargs)
+        return conn.recv()
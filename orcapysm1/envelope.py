@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.envelope
+
+Description :
+
+    Governing Case Envelope for the Spread Moored Vessel Analysis
+
+    The Envelope holds, for each mooring line and each vessel degree of
+    freedom, the extreme value found so far together with the CASE_ID and
+    the case family (INTACT / DAMAGE) that governs it. Each case is added
+    with a single call to update() as soon as its results are available, so
+    the earlier cases are never scanned again. The governing values are
+    kept in arrays of one entry per line / DOF and hence the queries do not
+    depend on the number of cases processed.
+
+    The following envelope quantities are used by orcapysm1.post_dynamic
+
+        MAX_MPM_TEN     Maximum MPM Effective Tension (End A / End B)
+        MIN_TEN         Minimum Effective Tension (Slack)
+        MAX_OFFSET      Maximum MPM Vessel Excursion per DOF
+        MIN_OFFSET      Minimum MPM Vessel Excursion per DOF
+
+    The utilisation of the governing tension is reported against the
+    Minimum Breaking Load (MBL) of the Line Type at the line end.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pandas as pd
+import os
+import pickle
+
+ENVELOPE_FILE = 'envelope.pkl'
+
+
+class Envelope:
+    ''' Running maxima / minima of the results with their governing cases '''
+
+    def __init__(self):
+        self.labels = dict()
+        self.sense = dict()
+        self.value = dict()
+        self.case = dict()
+        self.family = dict()
+        self.nCases = 0
+
+    def add(self, name, labels, sense='max'):
+        ''' Register an envelope quantity with one entry per label '''
+        n = len(labels)
+        self.labels[name] = list(labels)
+        self.sense[name] = sense
+        if sense == 'max':
+            self.value[name] = np.full(n, -np.inf)
+        else:
+            self.value[name] = np.full(n, np.inf)
+        self.case[name] = np.full(n, None, dtype=object)
+        self.family[name] = np.full(n, None, dtype=object)
+
+    def update(self, caseId, family, **results):
+        ''' Merge the results of one case into the envelope
+
+        Each keyword is the name of a registered quantity and its value is
+        an array with one entry per label of that quantity. '''
+        for name, vals in results.items():
+            vals = np.asarray(vals, dtype=float)
+            if self.sense[name] == 'max':
+                gov = vals > self.value[name]
+            else:
+                gov = vals < self.value[name]
+            self.value[name][gov] = vals[gov]
+            self.case[name][gov] = caseId
+            self.family[name][gov] = family
+        self.nCases += 1
+
+    def query(self, name):
+        ''' Governing value, CASE_ID and case family of a quantity '''
+        return pd.DataFrame({'VALUE': self.value[name],
+                             'CASE_ID': self.case[name],
+                             'FAMILY': self.family[name]},
+                            index=self.labels[name])
+
+    def save(self, fileName=ENVELOPE_FILE):
+        with open(fileName, 'wb') as f:
+            pickle.dump(self, f)
+
+
+def load(fileName=ENVELOPE_FILE):
+    with open(fileName, 'rb') as f:
+        return pickle.load(f)
+
+
+def envelope_file(outputFile):
+    ''' Envelope file in the folder of the output work book outputFile '''
+    return os.path.join(os.path.dirname(os.path.abspath(outputFile)), ENVELOPE_FILE)
+
+
+def line_end_mbl(DF_ML, DF_LT):
+    ''' MBL of the line type at End A (first section) and End B (last
+    section) of each mooring line, as listed in the Line_Types sheet '''
+    MBL_A = np.zeros(len(DF_ML))
+    MBL_B = np.zeros(len(DF_ML))
+    for i in range(len(DF_ML)):
+        nSec = int(DF_ML.N_SECS.iloc[i])
+        MBL_A[i] = DF_LT.MBL[DF_ML.LINE_TYPE1.iloc[i]]
+        MBL_B[i] = DF_LT.MBL[DF_ML['LINE_TYPE'+str(nSec)].iloc[i]]
+    return MBL_A, MBL_B
+
+
+def mooring_envelope(lines, vesParms):
+    ''' Envelope with the standard line and vessel quantities '''
+    env = Envelope()
+    env.add('MAX_MPM_TEN_A', lines, 'max')
+    env.add('MAX_MPM_TEN_B', lines, 'max')
+    env.add('MIN_TEN_A', lines, 'min')
+    env.add('MIN_TEN_B', lines, 'min')
+    env.add('MAX_OFFSET', vesParms, 'max')
+    env.add('MIN_OFFSET', vesParms, 'min')
+    return env
+
+
+def envelope_table(env, MBL_A, MBL_B):
+    ''' Summary table of the governing line tensions with utilisation '''
+    DF = pd.concat([env.query('MAX_MPM_TEN_A').add_prefix('END A MAX MPM '),
+                    env.query('MAX_MPM_TEN_B').add_prefix('END B MAX MPM '),
+                    env.query('MIN_TEN_A').add_prefix('END A MIN '),
+                    env.query('MIN_TEN_B').add_prefix('END B MIN ')], axis=1)
+    DF.insert(1, 'END A UTILISATION', DF['END A MAX MPM VALUE']/MBL_A)
+    DF.insert(5, 'END B UTILISATION', DF['END B MAX MPM VALUE']/MBL_B)
+    return DF
+
+
+def offset_table(env):
+    ''' Summary table of the governing vessel excursions '''
+    return pd.concat([env.query('MAX_OFFSET').add_prefix('MAX MPM '),
+                      env.query('MIN_OFFSET').add_prefix('MIN MPM ')], axis=1)
@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.extremes
+
+Description :
+
+    Extreme Value Fits of the Peaks, with Bootstrap Confidence Intervals
+
+        python -m orcapysm1 extremes [--storm-hours 3] [--risk-factor 1]
+                                     [--bootstrap 200] [--workers N]
+
+    The peaks (maxima side) and troughs (minima side) of the line end forces
+    and vessel motions of every case are collected with the running
+    statistics (orcapysm1.stream, or the case archive of orcapysm1.archive)
+    as amplitudes about the mean. The distributions of DISTRIBUTIONS are then
+    fitted to the amplitudes of all the (case, object, variable, side) rows
+    at once, in batches of BATCH_ROWS rows padded with NaN:
+
+        Rayleigh    Maximum likelihood, positive amplitudes
+        Weibull     2 parameters, log-moments, positive amplitudes
+        Gumbel      Moments, positive amplitudes
+        GPD         Generalised Pareto over the GPD_QUANTILE threshold,
+                    probability weighted moments (Hosking & Wallis)
+
+    All the estimators are closed form, so a batch is fitted with a few
+    array operations. The storm extreme of a row fitted with n of its
+    nPeaks peaks over a simulation of duration T is taken from the peak
+    distribution F with N = n x (storm duration / T) x (nPeaks / nSample)
+    peaks in the storm, nSample the number of sampled peaks :
+
+        MPM         F(x) = 1 - 1/N
+        EXTREME     F(x) = (1 - RISK_FACTOR/100)^(1/N)
+
+    The confidence interval (CONFIDENCE) of the MPM is from N_BOOTSTRAP
+    resamples of the peaks, drawn and fitted together as one more axis of
+    the arrays. The batches are fitted in parallel on N_WORKERS processes
+    and the table is written to the sheet "Extreme Fits" of output.xlsx
+
+    The peaks of the unchanged cases are read from the result cache
+    (orcapysm1.cache). The peaks of a mirror image case (orcapysm1.symmetry)
+    are from the mirrored time histories of its source case.
+
+    The running statistics keep all the peaks up to stream.MAX_PEAKS,
+    beyond that (very long simulations) a uniform random sample of
+    stream.MAX_PEAKS of them : the fits are of the sample, N is from the
+    true number of peaks (N_PEAKS, N_SAMPLE of the table).
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pandas as pd
+import os
+import warnings
+import concurrent.futures
+from . import check
+from . import stream
+from . import archive
+from . import cache
+from . import symmetry
+from .common import INPUT_FILE, OUTPUT_FILE, basename, case_list, write_sheets
+
+''' ---------------------------------------------------------------------------
+    Extreme Value Settings
+--------------------------------------------------------------------------- '''
+StormDurationHours = 3
+RISK_FACTOR = 1.0           # %, as the OrcaFlex extreme statistics
+N_BOOTSTRAP = 200
+CONFIDENCE = 0.90
+GPD_QUANTILE = 0.80         # Threshold of the GPD, quantile of the peaks
+DISTRIBUTIONS = ['Rayleigh', 'Weibull', 'Gumbel', 'GPD']
+
+BATCH_ROWS = 256            # Rows fitted together
+BATCH_ELEMENTS = 4000000    # Array size of a bootstrap block
+SEED = 0
+
+N_WORKERS = os.cpu_count()
+
+EULER = 0.5772156649015329
+
+
+def case_peaks(fileName, lines, vesName, mirror=None):
+    ''' Names, means, durations, number of peaks / troughs and the sampled
+    peak / trough amplitudes of the line end forces and vessel motions of
+    one case (orcapysm1.archive names).
+    With mirror (LINE_MAP, heading, origin), of the mirror image of the
+    case (orcapysm1.symmetry) '''
+    names = archive.variable_names(lines, vesName)
+
+    archFile = archive.archive_file(fileName)
+    if mirror is not None:
+        stats = symmetry.mirror_statistics(fileName, lines, vesName, *mirror)
+    elif not os.path.exists(fileName) and os.path.exists(archFile):
+        stats = archive.archive_statistics(archFile, names)
+    else:
+        import OrcFxAPI
+        model_0 = OrcFxAPI.Model(fileName)
+        stats = stream.stream_statistics(model_0, archive.result_specs(model_0, lines, vesName))
+
+    return {'NAMES': names,
+            'MEAN': stats.mean,
+            'DURATION': stats.duration,
+            'N_PEAKS': stats.nPeaks,
+            'N_TROUGHS': stats.nTroughs,
+            'PEAKS': [stats.peaks(k)-stats.mean[k] for k in range(len(names))],
+            'TROUGHS': [stats.mean[k]-stats.troughs(k) for k in range(len(names))]}
+
+
+def exceedances(S, u):
+    ''' Exceedances of the threshold u in the sorted amplitudes S, sorted
+    and moved to the start of the last axis (padded with NaN) '''
+    Y = np.where(S > u[..., None], S-u[..., None], np.nan)
+    m = max(int(np.isfinite(Y).sum(axis=-1).max(initial=0)), 1)
+    first = np.isfinite(S).sum(axis=-1)-np.isfinite(Y).sum(axis=-1)
+    idx = np.minimum(first[..., None]+np.arange(m), S.shape[-1]-1)
+    Y = np.take_along_axis(Y, idx, axis=-1)
+    return np.where(np.arange(m) < np.isfinite(Y).sum(axis=-1)[..., None], Y, np.nan)
+
+
+def gpd_pwm(Y):
+    ''' Shape k and scale sigma of the GPD (Hosking's sign of k) fitted to
+    the exceedances Y (... x samples, sorted, NaN at the end) by probability
+    weighted moments, and the number of exceedances '''
+    with np.errstate(all='ignore'):
+        ok = np.isfinite(Y)
+        nUsed = ok.sum(axis=-1)
+        Y0 = np.where(ok, Y, 0)
+        p = (np.arange(1, Y.shape[-1]+1)-0.35)/np.maximum(nUsed, 1)[..., None]
+        a0 = Y0.sum(axis=-1)/np.maximum(nUsed, 1)
+        a1 = ((1-p)*Y0).sum(axis=-1)/np.maximum(nUsed, 1)
+        k = a0/(a0-2*a1)-2
+        sigma = 2*a0*a1/(a0-2*a1)
+    return (k, sigma), nUsed
+
+
+def gpd_threshold(A):
+    ''' GPD_QUANTILE of the amplitudes A (rows x samples, padded with
+    NaN) and the sorted amplitudes '''
+    S = np.sort(A, axis=-1)
+    n = np.isfinite(S).sum(axis=-1)
+    pos = GPD_QUANTILE*(np.maximum(n, 1)-1)
+    lo = np.floor(pos).astype(int)
+    hi = np.minimum(lo+1, S.shape[-1]-1)
+    sLo = np.take_along_axis(S, lo[..., None], axis=-1)[..., 0]
+    sHi = np.take_along_axis(S, hi[..., None], axis=-1)[..., 0]
+    return sLo+(pos-lo)*(sHi-sLo), S
+
+
+def features(dist, A):
+    ''' Samples used by a moment fit (mask) and the variable whose mean
+    and variance give the parameters '''
+    with np.errstate(all='ignore'):
+        if dist == 'Rayleigh':
+            return A > 0, A**2
+        if dist == 'Weibull':
+            return A > 0, np.log(np.where(A > 0, A, 1))
+        if dist == 'Gumbel':
+            return A > 0, A
+    raise ValueError('Unknown distribution '+dist)
+
+
+def moment_params(dist, n, s1, s2):
+    ''' Parameters of a moment fit from the number n, sum s1 and sum of
+    squares s2 of its feature '''
+    with np.errstate(all='ignore'):
+        mean = s1/n
+        std = np.sqrt(np.maximum(s2-s1*mean, 0)/(n-1))
+        if dist == 'Rayleigh':
+            return (np.sqrt(mean/2),)
+        if dist == 'Weibull':
+            k = np.pi/(std*np.sqrt(6))
+            return (k, np.exp(mean+EULER/k))
+        if dist == 'Gumbel':
+            beta = std*np.sqrt(6)/np.pi
+            return (mean-EULER*beta, beta)
+    raise ValueError('Unknown distribution '+dist)
+
+
+def fit(dist, A):
+    ''' Parameters of the distribution dist fitted to the amplitudes A
+    (rows x samples, padded with NaN) and the number of samples used '''
+    if dist == 'GPD':
+        u, S = gpd_threshold(A)
+        (k, sigma), nUsed = gpd_pwm(exceedances(S, u))
+        return (u, k, sigma), nUsed
+
+    ok, x = features(dist, A)
+    x = np.where(ok, x, 0)
+    nUsed = ok.sum(axis=-1)
+    return moment_params(dist, nUsed, x.sum(axis=-1), (x**2).sum(axis=-1)), nUsed
+
+
+def bootstrap_counts(n, nMax, nB, rng):
+    ''' Number of times each sample is drawn (rows x nB x nMax) in nB
+    bootstrap resamples of the first n[row] samples of each row '''
+    nRows = len(n)
+    idx = (rng.random((nRows, nB, nMax), dtype=np.float32)*n[:, None, None]).astype(np.int64)
+
+    # Draws beyond n[row] go to a dropped extra bin
+    idx = np.where(np.arange(nMax) < n[:, None, None], idx, nMax)
+    idx += (np.arange(nRows*nB)*(nMax+1)).reshape(nRows, nB, 1)
+    C = np.bincount(idx.ravel(), minlength=nRows*nB*(nMax+1))
+    return C.reshape(nRows, nB, nMax+1)[:, :, :nMax].astype(float)
+
+
+def resample(X, n, nB, rng):
+    ''' nB bootstrap resamples (rows x nB x samples) of the first n[row]
+    values of the rows of X, padded with NaN '''
+    nRows, nMax = X.shape
+    idx = (rng.random((nRows, nB, nMax), dtype=np.float32)*n[:, None, None]).astype(np.int32)
+    R = np.take_along_axis(X[:, None, :], np.minimum(idx, nMax-1), axis=2)
+    return np.where((np.arange(nMax) < n[:, None])[:, None, :], R, np.nan)
+
+
+def quantile(dist, P, E):
+    ''' Amplitude of the distribution dist (parameters P) at the
+    probability F with E = -ln(1 - F) '''
+    with np.errstate(all='ignore'):
+        if dist == 'Rayleigh':
+            return P[0]*np.sqrt(2*E)
+        if dist == 'Weibull':
+            k, lam = P
+            return lam*E**(1/k)
+        if dist == 'Gumbel':
+            mu, beta = P
+            return mu-beta*np.log(-np.log1p(-np.exp(-E)))
+        if dist == 'GPD':
+            u, k, sigma = P
+            small = np.abs(k) < 1e-6
+            return u+np.where(small, sigma*E, sigma/np.where(small, 1, k)*-np.expm1(-k*E))
+    raise ValueError('Unknown distribution '+dist)
+
+
+def storm_extremes(dist, P, nUsed, scale, riskFactor=RISK_FACTOR):
+    ''' MPM and EXTREME (riskFactor %) amplitudes over the storm, scale is
+    the storm duration over the simulated duration times the true number
+    of peaks over the number fitted from (nUsed of them used) '''
+    N = np.maximum(nUsed*scale, np.e)
+    E_MPM = np.log(N)
+    E_EXT = -np.log(-np.expm1(np.log1p(-riskFactor/100.0)/N))
+    return quantile(dist, P, E_MPM), quantile(dist, P, E_EXT)
+
+
+def fit_batch(A, scale, riskFactor=RISK_FACTOR, nBootstrap=N_BOOTSTRAP,
+              confidence=CONFIDENCE, seed=SEED):
+    ''' Fit all the DISTRIBUTIONS to the rows of A (rows x samples, padded
+    with NaN), scale per row. Returns the dict of the result arrays (rows)
+    <DIST>_MPM, _MPM_LOW, _MPM_HIGH and _EXTREME '''
+    A = np.asarray(A, dtype=float)
+    scale = np.asarray(scale, dtype=float)
+    nRows, nMax = A.shape
+    n = np.isfinite(A).sum(axis=1)
+    rng = np.random.default_rng(seed)
+
+    RES = dict()
+    for dist in DISTRIBUTIONS:
+        P, nUsed = fit(dist, A)
+        RES[dist+'_MPM'], RES[dist+'_EXTREME'] = storm_extremes(dist, P, nUsed, scale, riskFactor)
+
+    ''' -----------------------------------------------------------------------
+    Bootstrap : the moment fits from the draw counts of each sample (rows x
+    resamples x samples) times the sample features, one batched matmul
+    -------------------------------------------------------------------------'''
+    FEAT = list()
+    for dist in DISTRIBUTIONS:
+        if dist != 'GPD':
+            ok, x = features(dist, A)
+            x = np.where(ok, x, 0)
+            FEAT += [ok, x, x**2]
+    FEAT = np.stack(FEAT, axis=2).astype(float)
+
+    # The GPD is resampled over its exceedances, with a fixed threshold
+    u, S = gpd_threshold(A)
+    T = exceedances(S, u)
+    nT = np.isfinite(T).sum(axis=1)
+
+    BOOT = {dist: list() for dist in DISTRIBUTIONS}
+    block = max(1, BATCH_ELEMENTS//max(nRows*nMax, 1))
+    for b0 in range(0, nBootstrap, block):
+        nB = min(block, nBootstrap-b0)
+        SUMS = np.matmul(bootstrap_counts(n, nMax, nB, rng), FEAT)
+        j = 0
+        for dist in DISTRIBUTIONS:
+            if dist == 'GPD':
+                (k, sigma), nUsed = gpd_pwm(np.sort(resample(T, nT, nB, rng), axis=2))
+                P = (u[:, None], k, sigma)
+            else:
+                nUsed = SUMS[:, :, j]
+                P = moment_params(dist, nUsed, SUMS[:, :, j+1], SUMS[:, :, j+2])
+                j += 3
+            BOOT[dist].append(storm_extremes(dist, P, nUsed, scale[:, None], riskFactor)[0])
+
+    q = [(1-confidence)/2, (1+confidence)/2]
+    for dist in DISTRIBUTIONS:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            low, high = np.nanquantile(np.concatenate(BOOT[dist], axis=1), q, axis=1)
+        RES[dist+'_MPM_LOW'] = low
+        RES[dist+'_MPM_HIGH'] = high
+    return RES
+
+
+def extreme_fits(inputFile=INPUT_FILE, outputFile=OUTPUT_FILE, stormDurationHours=StormDurationHours,
+                 riskFactor=RISK_FACTOR, nBootstrap=N_BOOTSTRAP, nWorkers=N_WORKERS,
+                 useCache=cache.USE_CACHE):
+    ''' Extreme value fits of all the cases, added to outputFile. Returns
+    the table '''
+
+    # All the Input sheets, parsed once
+    INPUT = check.read_input(inputFile)
+
+    BASENAME = basename(INPUT)
+    vesName = INPUT['Ves_Gen'].VAL['NAME']
+
+    MIRRORS = symmetry.mirrored(INPUT)
+    mirror = symmetry.mirror_setup(INPUT)[:3]
+
+    # Simulation file of each case, the source case of a mirrored case
+    SOURCES = dict()
+    for c in case_list(INPUT, BASENAME):
+        sourceFile = symmetry.mirror_source(c[2], c[0], c[1], MIRRORS)
+        if sourceFile is not None and (os.path.exists(sourceFile) or
+                                       os.path.exists(archive.archive_file(sourceFile))):
+            SOURCES[c[:2]] = (sourceFile, mirror)
+        elif os.path.exists(c[2]) or os.path.exists(archive.archive_file(c[2])):
+            SOURCES[c[:2]] = (c[2], None)
+    CASES = [c for c in case_list(INPUT, BASENAME) if c[:2] in SOURCES]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=nWorkers) as pool:
+
+        ''' -------------------------------------------------------------------
+        Peaks of the Cases in Parallel
+        ---------------------------------------------------------------------'''
+        futures = [pool.submit(cache.call, case_peaks, SOURCES[c[:2]][0], c[3], vesName,
+                               mirror=SOURCES[c[:2]][1], useCache=useCache) for c in CASES]
+        PEAKS = [future.result() for future in futures]
+
+        # One row per case, variable and side
+        ROWS = list()
+        AMPS = list()
+        for (caseId, family, fileName, lines), CP in zip(CASES, PEAKS):
+            scale = stormDurationHours*3600.0/max(CP['DURATION'], 1e-9)
+            for k, name in enumerate(CP['NAMES']):
+                obj, var, end = (name.split('|')+[''])[:3]
+                for side, amps, nPeaks in [('MAX', CP['PEAKS'][k], CP['N_PEAKS'][k]),
+                                           ('MIN', CP['TROUGHS'][k], CP['N_TROUGHS'][k])]:
+                    # The sample stands for all the peaks of the history
+                    ROWS.append(dict(CASE_ID=caseId, FAMILY=family, OBJECT=obj, VARIABLE=var, END=end,
+                                     SIDE=side, MEAN=CP['MEAN'][k], N_PEAKS=int(nPeaks), N_SAMPLE=len(amps),
+                                     SCALE=scale*nPeaks/max(len(amps), 1)))
+                    AMPS.append(amps)
+
+        ''' -------------------------------------------------------------------
+        Fits in Batches of Rows of Similar Number of Peaks
+        ---------------------------------------------------------------------'''
+        order = np.argsort([len(a) for a in AMPS], kind='stable')
+        futures = list()
+        for b0 in range(0, len(order), BATCH_ROWS):
+            rows = order[b0:b0+BATCH_ROWS]
+            A = np.full((len(rows), max(max(len(AMPS[r]) for r in rows), 1)), np.nan)
+            for i, r in enumerate(rows):
+                A[i, :len(AMPS[r])] = AMPS[r]
+            scale = [ROWS[r]['SCALE'] for r in rows]
+            futures.append((rows, pool.submit(fit_batch, A, scale, riskFactor, nBootstrap, CONFIDENCE, SEED+b0)))
+
+        for rows, future in futures:
+            RES = future.result()
+            for i, r in enumerate(rows):
+                sign = 1 if ROWS[r]['SIDE'] == 'MAX' else -1
+                for key, vals in RES.items():
+                    ROWS[r][key] = ROWS[r]['MEAN']+sign*vals[i]
+
+    DF_EXT = pd.DataFrame(ROWS).drop(columns='SCALE')
+
+    # Low / High of the minima side are swapped by the sign
+    for dist in DISTRIBUTIONS:
+        isMin = DF_EXT.SIDE == 'MIN'
+        low, high = DF_EXT.loc[isMin, dist+'_MPM_LOW'].copy(), DF_EXT.loc[isMin, dist+'_MPM_HIGH'].copy()
+        DF_EXT.loc[isMin, dist+'_MPM_LOW'], DF_EXT.loc[isMin, dist+'_MPM_HIGH'] = high, low
+
+    write_sheets(outputFile, {'Extreme Fits': DF_EXT}, index=False)
+
+    return DF_EXT
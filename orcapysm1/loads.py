@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.loads
+
+Description :
+
+    Mean Wind and Current Loads of the Case Matrices
+
+        python -m orcapysm1 loads
+
+    The mean wind and current loads on the vessel of every IntactCases and
+    DamageCases row are computed from the Input sheets alone, without
+    OrcaFlex, in one vectorised evaluation over all the rows :
+
+        Load        1/2 x density x speed^2 x C(relative direction) x Area
+
+    with the areas and area moments of Ves_Area, the coefficients of
+    Ves_Wind / Ves_Curr and the Vw / Vc of the case. The relative direction
+    is the case direction (as set by the cases stage) less the vessel
+    heading. The coefficient tables are interpolated linearly over 0 to 180
+    degrees with xz plane symmetry, as set on the vessel type by the build
+    stage : beyond 180 degrees the table is read at 360 - direction and the
+    sway, roll and yaw coefficients change sign.
+
+    The moments are taken from the coefficient origins (X_ORG, Y_ORG,
+    Z_ORG) to the vessel origin. The wind, current and total loads (vessel
+    axes), the total horizontal force in the global axes and its direction
+    are written to the sheet "Mean Env Loads" of output.xlsx. The wind and
+    current profiles and the vessel offset are not considered : the loads
+    are those on the vessel at its Input position with the reference
+    speeds, for checking the case matrices before the cases are generated.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pandas as pd
+from . import check
+from .common import INPUT_FILE, OUTPUT_FILE, case_direction, write_sheets
+
+AIR_DENSITY = 0.00128       # te/m^3 (OrcaFlex default)
+SEA_DENSITY = 1.025         # te/m^3
+
+DOF = ['SURGE', 'SWAY', 'HEAVE', 'ROLL', 'PITCH', 'YAW']
+AREAS = ['SURGE_AREA', 'SWAY_AREA', 'HEAVE_AREA', 'ROLL_AREAMOM', 'PITCH_AREAMOM', 'YAW_AREAMOM']
+XZ_SIGN = np.array([1, -1, 1, -1, 1, -1])      # Coefficients mirrored in the xz plane
+
+
+def coefficients(DF_C, theta):
+    ''' Load coefficients (n x DOF) at the relative directions theta
+    (degrees) from a table of 0 to 180 degrees with xz plane symmetry '''
+    theta = np.mod(np.asarray(theta, dtype=float), 360)
+    mirror = theta > 180
+    t = np.where(mirror, 360-theta, theta)
+    DIR = DF_C.DIR.to_numpy(dtype=float)
+    C = np.column_stack([np.interp(t, DIR, DF_C[dof].to_numpy(dtype=float)) for dof in DOF])
+    return np.where(mirror[:, None], C*XZ_SIGN, C)
+
+
+def mean_load(DF_AREA, comp, DF_C, speed, theta, density):
+    ''' Mean loads (n x DOF, kN and kN.m) of the wind or current (comp row
+    of Ves_Area) in the vessel axes, moments about the vessel origin '''
+    A = DF_AREA.loc[comp, AREAS].to_numpy(dtype=float)
+    q = 0.5*density*np.asarray(speed, dtype=float)**2
+    L = q[:, None]*coefficients(DF_C, theta)*A
+
+    # Moments from the coefficient origin to the vessel origin
+    r = DF_AREA.loc[comp, ['X_ORG', 'Y_ORG', 'Z_ORG']].to_numpy(dtype=float)
+    L[:, 3:] += np.cross(r, L[:, :3])
+    return L
+
+
+def case_loads(INPUT):
+    ''' Table of the mean wind, current and total loads of all the intact
+    and damage cases '''
+    DF_GN = INPUT['General']
+    DF_VES_GEN = INPUT['Ves_Gen']
+
+    # Vessel heading as built
+    if DF_GN.VAL['GRS'] == 'RHS':
+        heading = float(DF_VES_GEN.VAL['HEADING'])
+    else:
+        heading = 360.0-DF_VES_GEN.VAL['HEADING']
+
+    DF_CM = pd.concat([check.case_matrix(INPUT, 'IntactCases').assign(FAMILY='INTACT'),
+                       check.case_matrix(INPUT, 'DamageCases').assign(FAMILY='DAMAGE')], ignore_index=True)
+
+    DIRECTION = np.array([case_direction(r, c, d, DF_GN.VAL['GXDIR'], heading)
+                          for r, c, d in zip(DF_CM.DIR_REF, DF_CM.DIR_CONV, DF_CM.DIR)], dtype=float)
+    theta = np.mod(DIRECTION-heading, 360)
+
+    ''' -----------------------------------------------------------------------
+    Wind, Current and Total Loads of All the Rows at Once
+    -------------------------------------------------------------------------'''
+    DF_AREA = INPUT['Ves_Area']
+    WIND = mean_load(DF_AREA, 'WIND', INPUT['Ves_Wind'], DF_CM.Vw, theta, AIR_DENSITY)
+    CURR = mean_load(DF_AREA, 'CURRENT', INPUT['Ves_Curr'], DF_CM.Vc, theta, SEA_DENSITY)
+    TOTAL = WIND+CURR
+
+    # Total horizontal force in the global axes
+    c, s = np.cos(np.radians(heading)), np.sin(np.radians(heading))
+    GX = TOTAL[:, 0]*c-TOTAL[:, 1]*s
+    GY = TOTAL[:, 0]*s+TOTAL[:, 1]*c
+
+    DF = DF_CM[['CASE_ID', 'FAMILY']].copy()
+    DF['DIRECTION'] = DIRECTION
+    DF['REL_DIR'] = theta
+    for name, L in [('WIND', WIND), ('CURR', CURR), ('TOTAL', TOTAL)]:
+        for k, dof in enumerate(DOF):
+            DF[name+'_'+dof] = L[:, k]
+    DF['GLOBAL_FX'] = GX
+    DF['GLOBAL_FY'] = GY
+    DF['HORZ_FORCE'] = np.hypot(GX, GY)
+    DF['HORZ_DIR'] = np.mod(np.degrees(np.arctan2(GY, GX)), 360)
+    return DF
+
+
+def mean_loads(inputFile=INPUT_FILE, outputFile=OUTPUT_FILE):
+    ''' Mean wind and current loads of all the cases, added to outputFile
+    (created if missing). Returns the table '''
+
+    # Input sheets only, checked first
+    check.preflight(inputFile)
+    DF_LD = case_loads(check.read_input(inputFile))
+
+    write_sheets(outputFile, {'Mean Env Loads': DF_LD}, index=False)
+
+    return DF_LD
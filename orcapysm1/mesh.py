@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.mesh
+
+Description :
+
+    Mesh (Segment Length) Convergence Study of the Mooring Lines
+
+        python -m orcapysm1 mesh [--write-back] [--workers N]
+
+    The simulation cost is roughly proportional to the number of nodes in
+    the lines. This study finds the coarsest Target Segment Length of each
+    line section (TSG_LEN1 .. TSG_LEN4 in Moor_Lines) which keeps the
+    results within TOLERANCE of the finest mesh.
+
+    The representative cases MESH_CASES are taken from the INTACT dynamic
+    simulation files generated by the cases stage. For every section, the
+    Target Segment Length of that section (in all the lines) is scaled by
+    each of the MESH_FACTORS while the other sections are left as in the
+    input. All the variants are run in parallel on N_WORKERS processes.
+
+    The maximum, Rayleigh MPM and standard deviation of the End A Effective
+    Tensions and the vessel X / Y offsets of each variant are compared with
+    the finest variant (smallest factor) of the same section, relative to
+    the dynamic amplitude. The largest factor with an error below TOLERANCE
+    in all the MESH_CASES is recommended for the section. The variants run
+    MESH_DURATION seconds (the storm length by default), the main stage of
+    the generated files is too short for the low frequency response.
+
+    The results are written to mesh_study.xlsx. With writeBack a copy of
+    the input workbook, Input_MESH.xlsx, is written with the recommended
+    segment lengths, in the rows of the lines found by their LINE_ID.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import pandas as pd
+import os
+import time
+import concurrent.futures
+from . import check
+from . import stream
+from .common import INPUT_FILE, basename, case_file, progress, split_input
+
+MESH_OUTPUT = 'mesh_study.xlsx'
+MESH_INPUT_FILE = 'Input_MESH.xlsx'
+
+''' ---------------------------------------------------------------------------
+    Mesh Study Settings
+--------------------------------------------------------------------------- '''
+MESH_CASES = None                       # List of CASE_IDs, None : first N_MESH_CASES
+N_MESH_CASES = 2
+MESH_FACTORS = [0.5, 1.0, 2.0, 4.0]     # Multipliers on the Target Segment Length
+StormDurationHours = 3
+MESH_DURATION = StormDurationHours*3600.0   # Seconds of the main stage, None : as generated
+TOLERANCE = 0.02                        # Relative to the dynamic amplitude
+WRITE_BACK = False
+
+N_WORKERS = os.cpu_count()
+
+
+def run_variant(fileName, section, factor, lines, vesName, duration=MESH_DURATION):
+    ''' Run a case with the Target Segment Length of one section scaled '''
+    import OrcFxAPI
+
+    model_0 = OrcFxAPI.Model(fileName)
+    if duration is not None:
+        model_0.general.StageDuration[1] = duration
+
+    nodes = 0
+    for name in lines:
+        line = model_0[name]
+        if line.NumberOfSections > section:
+            line.TargetSegmentLength[section] = line.TargetSegmentLength[section]*factor
+
+    tStart = time.perf_counter()
+    model_0.RunSimulation()
+    wallTime = time.perf_counter()-tStart
+
+    for name in lines:
+        nodes += len(model_0[name].NodeArclengths)
+
+    specs = stream.key_specs(model_0, lines, vesName)
+    stats = stream.stream_statistics(model_0, specs, startTime=0.0)
+
+    return dict(NODES=nodes, WALL_TIME=wallTime,
+                **stream.summary(stats, StormDurationHours))
+
+
+def mesh_study(inputFile=INPUT_FILE, caseIds=MESH_CASES, duration=MESH_DURATION,
+               writeBack=WRITE_BACK, nWorkers=N_WORKERS):
+    ''' Run the mesh variants of the cases caseIds, returns the recommended
+    factor of each section '''
+
+    # All the Input sheets, parsed once
+    INPUT = check.read_input(inputFile)
+
+    BASENAME = basename(INPUT)
+    vesName = INPUT['Ves_Gen'].VAL['NAME']
+
+    DF_ML = INPUT['Moor_Lines']
+    DF_ICM = check.case_matrix(INPUT, 'IntactCases', ['CASE_ID'])
+
+    lines = list(DF_ML.index)
+    nSecs = int(DF_ML.N_SECS.max())
+
+    if caseIds is None:
+        caseIds = list(DF_ICM.CASE_ID[:N_MESH_CASES])
+    else:
+        caseIds = list(caseIds)
+
+    ''' -----------------------------------------------------------------------
+    Run all the Variants in Parallel
+    -------------------------------------------------------------------------'''
+    RESULTS = dict()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=nWorkers) as pool:
+        futures = dict()
+        for caseId in caseIds:
+            fileName = case_file(BASENAME, 'INTACT', caseId)
+            for j in range(nSecs):
+                for factor in MESH_FACTORS:
+                    futures[pool.submit(run_variant, fileName, j, factor, lines, vesName, duration)] = (caseId, j, factor)
+        for future in concurrent.futures.as_completed(futures):
+            RESULTS[futures[future]] = future.result()
+            progress('Case', *futures[future], 'done')
+
+    ''' -----------------------------------------------------------------------
+    Comparison with the Finest Mesh of each Section
+    -------------------------------------------------------------------------'''
+    fRef = min(MESH_FACTORS)
+    ROWS = list()
+    for caseId in caseIds:
+        for j in range(nSecs):
+            ref = RESULTS[(caseId, j, fRef)]
+            for factor in MESH_FACTORS:
+                res = RESULTS[(caseId, j, factor)]
+                err = stream.relative_error(res, ref)
+                ROWS.append({'CASE_ID': caseId, 'SECTION': j+1, 'FACTOR': factor,
+                             'NODES': res['NODES'], 'WALL_TIME': res['WALL_TIME'],
+                             'REL_ERROR': err, 'ACCEPT': err <= TOLERANCE})
+    DF_MESH = pd.DataFrame(ROWS)
+
+    # Coarsest factor accepted in all the cases
+    ACCEPT = DF_MESH.groupby(['SECTION', 'FACTOR']).ACCEPT.all().reset_index()
+    DF_REC = ACCEPT[ACCEPT.ACCEPT].groupby('SECTION').FACTOR.max().rename('RECOMMENDED_FACTOR').to_frame()
+
+    for j in DF_REC.index:
+        col = 'TSG_LEN'+str(j)
+        DF_REC.loc[j, 'LINES'] = ', '.join(DF_ML.index[DF_ML.N_SECS >= j])
+        DF_REC.loc[j, 'CURRENT_MIN_TSG_LEN'] = DF_ML[col].min()
+        DF_REC.loc[j, 'RECOMMENDED_MIN_TSG_LEN'] = DF_ML[col].min()*DF_REC.RECOMMENDED_FACTOR[j]
+
+    with pd.ExcelWriter(MESH_OUTPUT, mode='w') as writer:
+        DF_MESH.to_excel(writer, sheet_name='Mesh Variants', index=False)
+        DF_REC.to_excel(writer, sheet_name='Recommended Mesh')
+
+    progress(DF_REC)
+
+    ''' -----------------------------------------------------------------------
+    Write Back the Recommended Segment Lengths
+    -------------------------------------------------------------------------'''
+    if writeBack:
+        import openpyxl
+
+        wb = openpyxl.load_workbook(split_input(inputFile)[0])
+        ws = wb['Moor_Lines']
+
+        # Header row holds the variable names, the row of each line is found
+        # by its LINE_ID in the first column
+        headerRow = check.SHEETS['Moor_Lines'][0]+1
+        header = [c.value for c in ws[headerRow]]
+        LINE_ROWS = {row[0].value: row[0].row for row in ws.iter_rows(min_row=headerRow+1)
+                if row[0].value is not None}
+        for j in DF_REC.index:
+            col = header.index('TSG_LEN'+str(j))+1
+            for name in DF_ML.index[DF_ML.N_SECS >= j]:
+                cell = ws.cell(row=LINE_ROWS[name], column=col)
+                cell.value = float(cell.value)*float(DF_REC.RECOMMENDED_FACTOR[j])
+        wb.save(MESH_INPUT_FILE)
+
+    return DF_REC
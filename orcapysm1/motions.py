@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.motions
+
+Description :
+
+    Vessel Offsets and Fairlead Excursions
+
+        python -m orcapysm1 motions [--storm-hours 3] [--workers N]
+
+    The 6 DOF motions of the vessel (X, Y, Z and Rotations 1, 2, 3 at
+    oeVessel((0,0,0))) are fetched once per chunk of CHUNK_DURATION seconds
+    with one GetMultipleTimeHistories call. All the other results are
+    derived from them in NumPy, without further API calls:
+
+        RADIAL          Horizontal offset from the vessel position of the
+                        Input (Ves_Gen XPOS, YPOS)
+        DX, DY, DZ      Offsets from the statics position (the first
+        DRADIAL         sample of the simulation), and their horizontal
+                        resultant
+        <FL> DH, DZ     Horizontal and vertical excursion of each Ves_FL
+                        fairlead from its statics position
+
+    The fairlead positions are the rigid body transform of the Ves_FL
+    coordinates (vessel axes), for all the fairleads and samples at once :
+
+        P = O + Rz(Rotation 3) . Ry(Rotation 2) . Rx(Rotation 1) . p
+
+    The maximum, minimum, mean, standard deviation and Rayleigh MPM
+    (orcapysm1.stream) of each result over the storm are written for every
+    intact and damage case to the sheets "Vessel Offsets" and "Fairlead
+    Excursions" of output.xlsx. The cases are post processed in parallel,
+    from the archive (orcapysm1.archive) of a case whose simulation file
+    was deleted, the unchanged cases are read from the result cache
+    (orcapysm1.cache). A mirror image case (orcapysm1.symmetry) is post
+    processed from the mirrored motions of its source case.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pandas as pd
+import os
+import concurrent.futures
+from . import check
+from . import stream
+from . import archive
+from . import cache
+from . import symmetry
+from .common import INPUT_FILE, OUTPUT_FILE, basename, case_list, write_sheets
+
+CHUNK_DURATION = stream.CHUNK_DURATION
+StormDurationHours = 3
+
+DOF = ['X', 'Y', 'Z', 'Rotation 1', 'Rotation 2', 'Rotation 3']
+VES_RESULTS = ['RADIAL', 'DX', 'DY', 'DZ', 'DRADIAL']
+FL_RESULTS = ['DH', 'DZ']
+STATS = ['MAX', 'MIN', 'MEAN', 'STD', 'MPM_MAX', 'MPM_MIN']
+
+N_WORKERS = os.cpu_count()
+
+
+def motion_chunks(fileName, vesName, chunkDuration=CHUNK_DURATION):
+    ''' Sample times and 6 DOF motions (samples x 6) of the vessel, one
+    chunk at a time, from the simulation file or from its archive '''
+    archFile = archive.archive_file(fileName)
+    if not os.path.exists(fileName) and os.path.exists(archFile):
+        yield from archive.chunks(archFile, ['|'.join([str(vesName), var]) for var in DOF])
+        return
+
+    import OrcFxAPI
+
+    model_0 = OrcFxAPI.Model(fileName)
+    VOE = OrcFxAPI.oeVessel((0,0,0))
+    specs = [OrcFxAPI.TimeHistorySpecification(model_0[vesName], var, VOE) for var in DOF]
+
+    stopTime = model_0.simulationStopTime
+    tLast = -np.inf
+    t0 = model_0.simulationStartTime
+    while t0 < stopTime:
+        t1 = min(t0+chunkDuration, stopTime)
+        period = OrcFxAPI.Period(t0, t1)
+
+        # Both ends of a Period are inclusive, skip the samples already used
+        times = model_0.SampleTimes(period)
+        keep = times > tLast
+        if keep.any():
+            yield times[keep], OrcFxAPI.GetMultipleTimeHistories(specs, period)[keep]
+            tLast = times[keep][-1]
+        t0 = t1
+
+
+def rotation_matrices(rot1, rot2, rot3):
+    ''' Rotation matrices (samples x 3 x 3) from the vessel axes to the
+    global axes, Rotations 1, 2, 3 in degrees '''
+    c1, s1 = np.cos(np.radians(rot1)), np.sin(np.radians(rot1))
+    c2, s2 = np.cos(np.radians(rot2)), np.sin(np.radians(rot2))
+    c3, s3 = np.cos(np.radians(rot3)), np.sin(np.radians(rot3))
+
+    R = np.empty(np.shape(rot1)+(3, 3))
+    R[..., 0, 0] = c3*c2
+    R[..., 0, 1] = c3*s2*s1-s3*c1
+    R[..., 0, 2] = c3*s2*c1+s3*s1
+    R[..., 1, 0] = s3*c2
+    R[..., 1, 1] = s3*s2*s1+c3*c1
+    R[..., 1, 2] = s3*s2*c1-c3*s1
+    R[..., 2, 0] = -s2
+    R[..., 2, 1] = c2*s1
+    R[..., 2, 2] = c2*c1
+    return R
+
+
+def fairlead_positions(motions, FL):
+    ''' Global positions (samples x fairleads x 3) of the fairleads FL
+    (fairleads x 3, vessel axes) for the 6 DOF motions (samples x 6) '''
+    R = rotation_matrices(motions[:, 3], motions[:, 4], motions[:, 5])
+    return motions[:, None, :3]+np.einsum('tij,fj->tfi', R, FL)
+
+
+def derived_results(motions, FL, origin, static):
+    ''' Vessel offsets (samples x VES_RESULTS) and fairlead excursions
+    (samples x fairleads*FL_RESULTS) of a chunk. origin is the Input
+    position (X, Y), static the statics motions (6) '''
+    d = motions[:, :3]-static[:3]
+    VES = np.column_stack([np.hypot(motions[:, 0]-origin[0], motions[:, 1]-origin[1]),
+                           d, np.hypot(d[:, 0], d[:, 1])])
+
+    dP = fairlead_positions(motions, FL)-fairlead_positions(static[None, :], FL)
+    EXC = np.stack([np.hypot(dP[..., 0], dP[..., 1]), dP[..., 2]], axis=2)
+    return VES, EXC.reshape(len(motions), -1)
+
+
+def case_motions(fileName, vesName, FL, origin, stormDurationHours=StormDurationHours,
+                 chunkDuration=CHUNK_DURATION, mirrorHeading=None):
+    ''' Statistics of the vessel offsets and fairlead excursions of one
+    case, as dicts VES (STATS : VES_RESULTS array) and EXC (STATS :
+    fairleads x FL_RESULTS array). With mirrorHeading, of the mirror image
+    of the case in the plane at mirrorHeading through origin '''
+    FL = np.asarray(FL, dtype=float)
+    nVes = len(VES_RESULTS)
+
+    stats = stream.RunningStats(nVes+len(FL)*len(FL_RESULTS))
+    static = None
+    tLast = -np.inf
+    for times, motions in motion_chunks(fileName, vesName, chunkDuration):
+        motions = np.asarray(motions, dtype=float)
+        if mirrorHeading is not None:
+            motions = symmetry.mirror_motions(motions, mirrorHeading, origin)
+        if static is None:
+            static = motions[0]
+        VES, EXC = derived_results(motions, FL, origin, static)
+        stats.update(np.hstack([VES, EXC]), times[-1]-max(tLast, times[0]))
+        tLast = times[-1]
+
+    mpmMax, mpmMin = stats.rayleigh_mpm(stormDurationHours)
+    RES = dict(zip(STATS, [stats.max, stats.min, stats.mean, stats.std, mpmMax, mpmMin]))
+
+    VES = {k: v[:nVes] for k, v in RES.items()}
+    EXC = {k: v[nVes:].reshape(len(FL), len(FL_RESULTS)) for k, v in RES.items()}
+    return VES, EXC
+
+
+def vessel_motions(inputFile=INPUT_FILE, outputFile=OUTPUT_FILE,
+                   stormDurationHours=StormDurationHours, nWorkers=N_WORKERS, useCache=cache.USE_CACHE):
+    ''' Vessel offsets and fairlead excursions of all the cases, in
+    parallel, added to outputFile. Returns the two tables '''
+
+    # All the Input sheets, parsed once
+    INPUT = check.read_input(inputFile)
+
+    BASENAME = basename(INPUT)
+    DF_GN = INPUT['General']
+    DF_VES_GEN = INPUT['Ves_Gen']
+    vesName = DF_VES_GEN.VAL['NAME']
+
+    # Input position and fairleads, in the OrcaFlex (RHS) axes as built
+    origin = (DF_VES_GEN.VAL['XPOS'],
+              DF_VES_GEN.VAL['YPOS'] if DF_GN.VAL['GRS'] == 'RHS' else -DF_VES_GEN.VAL['YPOS'])
+    DF_FL = INPUT['Ves_FL']
+    FL = DF_FL[['X_FL', 'Y_FL', 'Z_FL']].to_numpy(dtype=float)
+    if DF_VES_GEN.VAL['VRS'] != 'RHS':
+        FL[:, 1] = -FL[:, 1]
+
+    ''' -----------------------------------------------------------------------
+    Post Process the Cases in Parallel
+    -------------------------------------------------------------------------'''
+    MIRRORS = symmetry.mirrored(INPUT)
+    heading = symmetry.mirror_setup(INPUT)[1]
+
+    # Simulation file of each case, the source case of a mirrored case
+    SOURCES = dict()
+    for c in case_list(INPUT, BASENAME):
+        sourceFile = symmetry.mirror_source(c[2], c[0], c[1], MIRRORS)
+        if sourceFile is not None and (os.path.exists(sourceFile) or
+                                       os.path.exists(archive.archive_file(sourceFile))):
+            SOURCES[c[:2]] = (sourceFile, heading)
+        elif os.path.exists(c[2]) or os.path.exists(archive.archive_file(c[2])):
+            SOURCES[c[:2]] = (c[2], None)
+    CASES = [c for c in case_list(INPUT, BASENAME) if c[:2] in SOURCES]
+
+    RESULTS = dict()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=nWorkers) as pool:
+        futures = {pool.submit(cache.call, case_motions, SOURCES[c[:2]][0], vesName, FL, origin, stormDurationHours,
+                               mirrorHeading=SOURCES[c[:2]][1], useCache=useCache): c for c in CASES}
+        for future in concurrent.futures.as_completed(futures):
+            case = futures[future]
+            RESULTS[case[:2]] = future.result()
+
+    ROWS_VES = list()
+    ROWS_EXC = list()
+    for caseId, family, fileName, lines in CASES:
+        VES, EXC = RESULTS[(caseId, family)]
+        for j, res in enumerate(VES_RESULTS):
+            ROWS_VES.append(dict(CASE_ID=caseId, FAMILY=family, RESULT=res,
+                                 **{k: VES[k][j] for k in STATS}))
+        for i, flId in enumerate(DF_FL.index):
+            for j, res in enumerate(FL_RESULTS):
+                ROWS_EXC.append(dict(CASE_ID=caseId, FAMILY=family, FAIRLEAD=flId, RESULT=res,
+                                     **{k: EXC[k][i, j] for k in STATS}))
+
+    DF_VES = pd.DataFrame(ROWS_VES)
+    DF_EXC = pd.DataFrame(ROWS_EXC)
+
+    write_sheets(outputFile, {'Vessel Offsets': DF_VES, 'Fairlead Excursions': DF_EXC}, index=False)
+
+    return DF_VES, DF_EXC
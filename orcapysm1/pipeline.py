@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.pipeline
+
+Description :
+
+    Overlapped Generate -> Simulate -> Post Process Pipeline
+
+        python -m orcapysm1 pipeline [--workers N] [--gen-workers N]
+                                     [--post-workers N] [--queue-size N]
+
+    The cases, run and post-dynamic stages are run together instead of one
+    after the other. Each stage has its own process pool and each case is
+    passed on as soon as it is done:
+
+        generate    cases.generate_case, GEN_WORKERS processes
+        simulate    run.run_case (adaptive duration), SIM_WORKERS processes
+        post        post_dynamic.case_results (result cache), POST_WORKERS
+                    processes
+
+    The queue in front of the simulate and post stages is bounded by
+    QUEUE_SIZE : a stage only takes a new case while the queue after it
+    (waiting plus running cases) has room, so that the generated files do
+    not pile up ahead of the simulations. The total wall time approaches
+    the busy time of the slowest stage (usually simulate).
+
+    The governing case envelope (orcapysm1.envelope) of the intact and
+    damage cases is updated and saved to envelope.pkl, next to outputFile,
+    after every post processed case, envelope.load() of that file gives the
+    partial envelope while the pipeline runs. At the end the envelope tables are written to
+    output.xlsx, the runs to run_log.xlsx and the telemetry table, and the
+    start / end time of every task to PIPELINE_LOG.
+
+    With mirrorCases (--mirror) the mirror image cases (orcapysm1.symmetry)
+    are not generated or run, they are post processed as soon as their
+    source case is simulated. The cases are generated longest first by the
+    predicted wall time (orcapysm1.plan). The shared build-up (restart files) is not
+    used by the pipeline.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pandas as pd
+import os
+import time
+import collections
+import concurrent.futures
+from . import check
+from . import cases
+from . import run
+from . import post_dynamic
+from . import envelope
+from . import telemetry
+from . import symmetry
+from . import cache
+from . import plan
+from .common import (INPUT_FILE, OUTPUT_FILE, MIRROR_MANIFEST, basename, case_list, progress,
+                     write_sheets)
+
+PIPELINE_LOG = 'pipeline_log.csv'
+
+''' ---------------------------------------------------------------------------
+    Workers per Stage and Queue Size
+--------------------------------------------------------------------------- '''
+GEN_WORKERS = 1
+SIM_WORKERS = os.cpu_count()
+POST_WORKERS = 1
+QUEUE_SIZE = 2*SIM_WORKERS      # Cases waiting or running ahead of a stage
+
+STAGES = ['generate', 'simulate', 'post']
+
+
+def pipeline(inputFile=INPUT_FILE, outputFile=OUTPUT_FILE, nWorkers=SIM_WORKERS,
+             genWorkers=GEN_WORKERS, postWorkers=POST_WORKERS, queueSize=QUEUE_SIZE,
+             streamStats=post_dynamic.STREAM_STATS, stormDurationHours=post_dynamic.StormDurationHours,
+             mirrorCases=symmetry.MIRROR_CASES, useCache=cache.USE_CACHE):
+    ''' Generate, run and post process all the cases with the stages
+    overlapped, returns the envelope '''
+
+    # Preflight check of all the Input sheets, before any OrcaFlex work
+    check.preflight(inputFile)
+
+    # All the Input sheets, parsed once
+    INPUT = check.read_input(inputFile)
+
+    BASENAME = basename(INPUT)
+    vesName = INPUT['Ves_Gen'].VAL['NAME']
+    DF_ML = INPUT['Moor_Lines']
+    allLines = list(DF_ML.index)
+    MBL_A, MBL_B = envelope.line_end_mbl(DF_ML, INPUT['Line_Types'])
+
+    # All the cases, and the row number of each case in its case matrix
+    CASES = {(str(c[0]), c[1]): c for c in case_list(INPUT, BASENAME)}
+    ROWS = dict()
+    for family, sheet in [('INTACT', 'IntactCases'), ('DAMAGE', 'DamageCases')]:
+        for DF_CM in check.case_chunks(INPUT, sheet, ['CASE_ID']):
+            for ic, caseId in zip(DF_CM.index, DF_CM.CASE_ID):
+                ROWS[(str(caseId), family)] = ic
+
+    # Mirror image cases of each source case
+    MIRRORS = collections.defaultdict(list)
+    LINE_MAP, heading, origin = symmetry.mirror_setup(INPUT)[:3]
+    if mirrorCases:
+        DF_MC = symmetry.mirror_pairs(INPUT, BASENAME)
+        DF_MC.to_csv(MIRROR_MANIFEST, index=False)
+        for i in range(len(DF_MC)):
+            MIRRORS[(str(DF_MC.SOURCE_ID[i]), DF_MC.FAMILY[i])].append((str(DF_MC.CASE_ID[i]), DF_MC.FAMILY[i]))
+    elif os.path.exists(MIRROR_MANIFEST):
+        os.remove(MIRROR_MANIFEST)
+    mirrored = set(m for ms in MIRRORS.values() for m in ms)
+
+    ''' -----------------------------------------------------------------------
+    Stage Queues : Cases Waiting for Each Stage
+    -------------------------------------------------------------------------'''
+    # Longest predicted wall time first (orcapysm1.plan)
+    ORDER = plan.longest_first(INPUT, [c for key, c in CASES.items() if key not in mirrored])
+    GENERATE = collections.deque((str(c[0]), c[1]) for c in ORDER)
+    SIMULATE = collections.deque()
+    POST = collections.deque()          # (case, source file of a mirrored case)
+
+    ENVELOPE = envelope.mooring_envelope(allLines, post_dynamic.VesParmList)
+    envelopeFile = envelope.envelope_file(outputFile)
+    RUNS = list()
+    LOG = list()
+
+    def full(lines, vals):
+        ''' Values of the lines of a case on all the lines (NaN if absent) '''
+        A = np.full(len(allLines), np.nan)
+        A[[allLines.index(line) for line in lines]] = vals
+        return A
+
+    POOLS = {'generate': concurrent.futures.ProcessPoolExecutor(max_workers=genWorkers),
+             'simulate': concurrent.futures.ProcessPoolExecutor(max_workers=nWorkers),
+             'post': concurrent.futures.ProcessPoolExecutor(max_workers=postWorkers)}
+    RUNNING = dict()
+
+    def busy(stage):
+        return sum(1 for s, _, _ in RUNNING.values() if s == stage)
+
+    def submit(stage, key, function, *args, **kwargs):
+        RUNNING[POOLS[stage].submit(function, *args, **kwargs)] = (stage, key, time.perf_counter())
+
+    t0 = time.perf_counter()
+    try:
+        while GENERATE or SIMULATE or POST or RUNNING:
+
+            # Later stages first, a stage takes new cases while the queue after it has room
+            while POST and busy('post') < postWorkers:
+                key, sourceFile = POST.popleft()
+                caseId, family, fileName, lines = CASES[key]
+                if sourceFile is None:
+                    submit('post', key, cache.call, post_dynamic.case_results, fileName, list(lines), vesName,
+                           streamStats, stormDurationHours, useCache=useCache)
+                else:
+                    submit('post', key, cache.call, symmetry.mirror_results, sourceFile, list(lines), vesName,
+                           LINE_MAP, heading, origin, stormDurationHours, useCache=useCache)
+
+            while SIMULATE and busy('simulate') < nWorkers and len(POST)+busy('simulate') < queueSize:
+                key = SIMULATE.popleft()
+                submit('simulate', key, run.run_case, CASES[key][2], CASES[key][3], vesName)
+
+            while GENERATE and busy('generate') < genWorkers and len(SIMULATE)+busy('generate') < queueSize:
+                key = GENERATE.popleft()
+                submit('generate', key, cases.generate_case, inputFile, key[1], ROWS[key])
+
+            done, _ = concurrent.futures.wait(RUNNING, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                stage, key, start = RUNNING.pop(future)
+                result = future.result()
+                LOG.append(dict(CASE_ID=key[0], FAMILY=key[1], STAGE=stage,
+                                START=start-t0, END=time.perf_counter()-t0))
+                progress(key[1], key[0], stage, '%.1f s' % (LOG[-1]['END']-LOG[-1]['START']))
+
+                if stage == 'generate':
+                    SIMULATE.append(key)
+
+                elif stage == 'simulate':
+                    RUNS.append(dict(CASE_ID=CASES[key][0], FAMILY=key[1], **result))
+                    POST.append((key, None))
+                    for mirrorKey in MIRRORS[key]:
+                        POST.append((mirrorKey, CASES[key][2]))
+
+                else:
+                    # Partial envelope, saved after every case
+                    LINE, VES = result
+                    caseId, family, fileName, lines = CASES[key]
+                    ENVELOPE.update(caseId, family,
+                                    MAX_MPM_TEN_A=full(lines, LINE['MPV_MAX'][:,0]),
+                                    MAX_MPM_TEN_B=full(lines, LINE['MPV_MAX'][:,4]),
+                                    MIN_TEN_A=full(lines, LINE['MIN'][:,0]),
+                                    MIN_TEN_B=full(lines, LINE['MIN'][:,4]),
+                                    MAX_OFFSET=VES['MPV_MAX'],
+                                    MIN_OFFSET=VES['MPV_MIN'])
+                    ENVELOPE.save(envelopeFile)
+    finally:
+        for pool in POOLS.values():
+            pool.shutdown(cancel_futures=True)
+    wallTime = time.perf_counter()-t0
+
+    ''' -----------------------------------------------------------------------
+    Task Log, Runs and Envelope Tables
+    -------------------------------------------------------------------------'''
+    DF_LOG = pd.DataFrame(LOG, columns=['CASE_ID', 'FAMILY', 'STAGE', 'START', 'END'])
+    DF_LOG.to_csv(PIPELINE_LOG, index=False)
+
+    BUSY = (DF_LOG.END-DF_LOG.START).groupby(DF_LOG.STAGE).sum()
+    progress('Wall time %.1f s,' % wallTime,
+             ', '.join('%s %.1f s' % (stage, BUSY.get(stage, 0.0)) for stage in STAGES), 'busy')
+
+    if RUNS:
+        DF_RUN = pd.DataFrame(RUNS)
+        DF_RUN.to_excel(run.RUN_LOG, sheet_name='Adaptive Durations', index=False)
+        telemetry.record(DF_RUN.to_dict('records'), 'run')
+
+    write_sheets(outputFile, {'ENVELOPE Tensions': envelope.envelope_table(ENVELOPE,MBL_A,MBL_B),
+                              'ENVELOPE Excursions': envelope.offset_table(ENVELOPE)})
+
+    return ENVELOPE
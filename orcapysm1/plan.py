@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.plan
+
+Description :
+
+    Run Cost Model and Dry Run Planner
+
+        python -m orcapysm1 plan [--workers N] [--hosts H] [--plan-file F]
+
+    Estimates the wall time and the simulation file size of every case
+    before it is run, from the Input sheets, the telemetry of the earlier
+    runs and the general data of the intact statics model (no OrcaFlex
+    run) :
+
+        Nodes           Sum over the lines of the case of the segments of
+                        each section (SEC_LEN / TSG_LEN, rounded up) + 1
+        Simulated time  Build-up + main stage. The build-up is stage 0 of
+                        the intact statics model (the cases inherit it),
+                        else the BUILDUP of the recorded runs, else
+                        common.BUILDUP_DURATION. The main stage is the
+                        achieved adaptive duration of the case (or the
+                        median of its family) from the telemetry, else
+                        run.MAX_DURATION
+        Time step       ImplicitConstantTimeStep of solver_settings.csv
+                        (orcapysm1.tune), else the median DT_MEAN of the
+                        runs, else DEFAULT_TIME_STEP
+        Wall time       OVERHEAD + COST x Nodes x Simulated time / Time step
+        File size       Nodes x Simulated time / LOG_INTERVAL x BYTES
+
+    COST and OVERHEAD are fitted (least squares) to the WALL_TIME of the
+    recorded runs (orcapysm1.telemetry), BYTES to the size of the
+    simulation files of the recorded runs, when the file on disk was not
+    written again after the run (the cases stage writes statics only
+    files). Without any records the DEFAULT_ values are used.
+
+    The cases are placed longest first on nWorkers x nHosts slots (each
+    case on the slot free first), which gives the START / END of each case
+    and the makespan of the batch. The plan is written to PLAN_FILE. The run
+    and pipeline stages submit the cases in the same longest first order
+    (longest_first), so that a long case does not start last.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pandas as pd
+import os
+import time
+import heapq
+from . import check
+from . import telemetry
+from . import symmetry
+from . import run
+from .common import INPUT_FILE, SOLVER_SETTINGS, BUILDUP_DURATION, basename, case_list, statics_file
+
+PLAN_FILE = 'run_plan.csv'
+
+''' ---------------------------------------------------------------------------
+    Cost Model Settings
+--------------------------------------------------------------------------- '''
+DEFAULT_TIME_STEP = 0.1             # Seconds, implicit solver
+LOG_INTERVAL = 0.1                  # Seconds, log sample interval
+DEFAULT_COST = 2.0e-5               # Wall seconds per node per time step
+DEFAULT_OVERHEAD = 5.0              # Wall seconds per case
+DEFAULT_BYTES = 60.0                # Bytes of the .sim per node per log sample
+
+N_WORKERS = os.cpu_count()
+N_HOSTS = 1
+
+
+def line_nodes(DF_ML):
+    ''' Number of nodes of each mooring line from its sections '''
+    NODES = pd.Series(1, index=DF_ML.index)
+    for j in range(1, check.MAX_SECS+1):
+        used = DF_ML.N_SECS >= j
+        segs = np.ceil(DF_ML['SEC_LEN'+str(j)]/DF_ML['TSG_LEN'+str(j)])
+        NODES += np.where(used, segs.fillna(0), 0).astype(int)
+    return NODES
+
+
+def time_step(DF_RUN, solverSettings=SOLVER_SETTINGS):
+    ''' Implicit time step of the next runs (seconds) '''
+    if solverSettings is not None and os.path.exists(solverSettings):
+        DF_SOL = pd.read_csv(solverSettings)
+        if 'ImplicitConstantTimeStep' in DF_SOL:
+            return float(DF_SOL.ImplicitConstantTimeStep[0])
+    if 'DT_MEAN' in DF_RUN and DF_RUN.DT_MEAN.notna().any():
+        return float(DF_RUN.DT_MEAN.median())
+    return DEFAULT_TIME_STEP
+
+
+def buildup_duration(staticsFile, DF_RUN):
+    ''' Build-up stage (seconds) of the next runs : stage 0 of the intact
+    statics model, else the median of the recorded runs, else
+    BUILDUP_DURATION '''
+    if os.path.exists(staticsFile):
+        try:
+            import OrcFxAPI
+            return float(OrcFxAPI.Model(staticsFile).general.StageDuration[0])
+        except Exception:
+            pass
+    if 'BUILDUP' in DF_RUN and DF_RUN.BUILDUP.notna().any():
+        return float(DF_RUN.BUILDUP.median())
+    return BUILDUP_DURATION
+
+
+def run_files(DF_RUN):
+    ''' Size (bytes) of the simulation file of each recorded run, NaN when
+    the file is missing or was written again after the run '''
+    SIZE = np.full(len(DF_RUN), np.nan)
+    for i, (f, stamp) in enumerate(zip(DF_RUN.SIM_FILE, DF_RUN.get('TIMESTAMP', [None]*len(DF_RUN)))):
+        if not os.path.exists(f):
+            continue
+        try:
+            recorded = time.mktime(time.strptime(str(stamp), '%Y-%m-%d %H:%M:%S'))
+        except ValueError:
+            continue
+        if os.path.getmtime(f) <= recorded+1:
+            SIZE[i] = os.path.getsize(f)
+    return SIZE
+
+
+def fit(x, y, default, defaultIntercept=0.0):
+    ''' Slope and intercept of y = intercept + slope x, least squares when
+    the points allow it, else the median ratio (or the defaults) '''
+    ok = np.isfinite(x) & np.isfinite(y) & (x > 0)
+    x, y = x[ok], y[ok]
+    if len(x) == 0:
+        return default, defaultIntercept
+    if len(x) >= 3 and np.ptp(x) > 0.1*x.mean():
+        slope, intercept = np.polyfit(x, y, 1)
+        if slope > 0 and intercept >= 0:
+            return slope, intercept
+    return float(np.median(y/x)), 0.0
+
+
+def case_costs(INPUT, CASES, telemetryFile=telemetry.TELEMETRY_FILE, solverSettings=SOLVER_SETTINGS):
+    ''' Nodes, simulated time, time step, predicted wall time (s) and file
+    size (MB) of the cases (CASE_ID, FAMILY, fileName, lines) '''
+    staticsFile = statics_file(basename(INPUT))
+    NODES = line_nodes(INPUT['Moor_Lines'])
+
+    DF = pd.DataFrame([dict(CASE_ID=str(c[0]), FAMILY=c[1], SIM_FILE=c[2], NODES=int(NODES[list(c[3])].sum()))
+                       for c in CASES], columns=['CASE_ID', 'FAMILY', 'SIM_FILE', 'NODES'])
+
+    # Recorded runs of the cases
+    DF_TEL = telemetry.load(telemetryFile)
+    DF_RUN = DF_TEL[DF_TEL.STAGE == 'run'] if len(DF_TEL) else DF_TEL
+    for col in ['DURATION', 'WALL_TIME', 'DT_MEAN', 'BUILDUP']:
+        DF_RUN = DF_RUN.assign(**{col: pd.to_numeric(DF_RUN[col], errors='coerce') if col in DF_RUN else np.nan})
+    DF_RUN = DF[['CASE_ID', 'FAMILY', 'NODES', 'SIM_FILE']].merge(DF_RUN, on=['CASE_ID', 'FAMILY'], how='inner')
+
+    ''' -----------------------------------------------------------------------
+    Simulated Time and Time Step
+    -------------------------------------------------------------------------'''
+    DURATION = DF[['CASE_ID', 'FAMILY']].merge(DF_RUN[['CASE_ID', 'FAMILY', 'DURATION']],
+                                               on=['CASE_ID', 'FAMILY'], how='left').DURATION
+    FAMILY_DURATION = DF_RUN.groupby('FAMILY').DURATION.median()
+    DURATION = DURATION.fillna(DF.FAMILY.map(FAMILY_DURATION)).fillna(run.MAX_DURATION)
+    buildup = buildup_duration(staticsFile, DF_RUN)
+    DF['SIM_TIME'] = buildup+DURATION.to_numpy()
+    DF['TIME_STEP'] = time_step(DF_RUN, solverSettings)
+
+    ''' -----------------------------------------------------------------------
+    Calibration to the Recorded Runs and the Files on Disk
+    -------------------------------------------------------------------------'''
+    # Simulated time of each recorded run, with its own build-up
+    runTime = DF_RUN.BUILDUP.fillna(buildup)+DF_RUN.DURATION
+    work = DF_RUN.NODES*runTime/DF_RUN.DT_MEAN
+    cost, overhead = fit(work.to_numpy(dtype=float), DF_RUN.WALL_TIME.to_numpy(dtype=float),
+                         DEFAULT_COST, DEFAULT_OVERHEAD)
+
+    # Only the simulation files of the recorded (finished) runs
+    runSamples = DF_RUN.NODES*runTime/LOG_INTERVAL
+    nBytes, _ = fit(runSamples.to_numpy(dtype=float), run_files(DF_RUN), DEFAULT_BYTES)
+
+    samples = DF.NODES*DF.SIM_TIME/LOG_INTERVAL
+
+    DF['WALL_TIME'] = overhead+cost*DF.NODES*DF.SIM_TIME/DF.TIME_STEP
+    DF['SIM_SIZE_MB'] = nBytes*samples/1e6
+    DF.attrs.update(COST=cost, OVERHEAD=overhead, BYTES=nBytes, RUNS=len(DF_RUN), BUILDUP=buildup)
+    return DF.drop(columns='SIM_FILE')
+
+
+def schedule(WALL, nSlots):
+    ''' Longest first placement of the wall times on nSlots slots, returns
+    the slot, start and end of each '''
+    SLOT = np.zeros(len(WALL), dtype=int)
+    START = np.zeros(len(WALL))
+    FREE = [(0.0, k) for k in range(max(int(nSlots), 1))]
+    for i in np.argsort(-np.asarray(WALL), kind='stable'):
+        t, k = heapq.heappop(FREE)
+        SLOT[i], START[i] = k, t
+        heapq.heappush(FREE, (t+WALL[i], k))
+    return SLOT, START, START+np.asarray(WALL)
+
+
+def longest_first(INPUT, CASES):
+    ''' The cases (CASE_ID, FAMILY, fileName, lines) in the order of their
+    predicted wall time, longest first '''
+    if not CASES:
+        return list(CASES)
+    WALL = case_costs(INPUT, CASES).WALL_TIME.to_numpy()
+    return [CASES[i] for i in np.argsort(-WALL, kind='stable')]
+
+
+def plan(inputFile=INPUT_FILE, nWorkers=N_WORKERS, nHosts=N_HOSTS, planFile=PLAN_FILE):
+    ''' Dry run plan of all the cases to be run, written to planFile.
+    Returns the plan table '''
+
+    # All the Input sheets, parsed once
+    INPUT = check.read_input(inputFile)
+    BASENAME = basename(INPUT)
+
+    # The mirror image cases (orcapysm1.symmetry) are not run
+    MIRRORS = symmetry.mirrored(INPUT)
+    CASES = [c for c in case_list(INPUT, BASENAME) if (str(c[0]), c[1]) not in MIRRORS]
+
+    DF_PL = case_costs(INPUT, CASES)
+    SLOT, START, END = schedule(DF_PL.WALL_TIME.to_numpy(), nWorkers*nHosts)
+    DF_PL['HOST'] = SLOT//nWorkers
+    DF_PL['WORKER'] = SLOT % nWorkers
+    DF_PL['START'] = START
+    DF_PL['END'] = END
+    DF_PL = DF_PL.sort_values(['START', 'WALL_TIME'], ascending=[True, False], kind='stable').reset_index(drop=True)
+    DF_PL.insert(0, 'ORDER', range(1, len(DF_PL)+1))
+    DF_PL.to_csv(planFile, index=False)
+    return DF_PL
+
+
+def report(inputFile=INPUT_FILE, nWorkers=N_WORKERS, nHosts=N_HOSTS, planFile=PLAN_FILE):
+    ''' Dry run plan written to planFile, returns (ok, summary of the plan) '''
+    DF_PL = plan(inputFile, nWorkers, nHosts, planFile)
+    if not len(DF_PL):
+        return True, 'No cases to run'
+
+    def hours(seconds):
+        return '%.2f h' % (seconds/3600)
+
+    nSlots = nWorkers*nHosts
+    total = DF_PL.WALL_TIME.sum()
+    TEXT = ['Cases                 : %d (%d nodes per case, max %d)' % (len(DF_PL), DF_PL.NODES.median(), DF_PL.NODES.max()),
+            'Calibration           : %d recorded runs, %.3g s per node step + %.1f s per case'
+            % (DF_PL.attrs['RUNS'], DF_PL.attrs['COST'], DF_PL.attrs['OVERHEAD']),
+            'Total run time        : '+hours(total),
+            'Longest case          : '+hours(DF_PL.WALL_TIME.max()),
+            'Makespan              : '+hours(DF_PL.END.max())+' on %d x %d workers (lower bound %s)'
+            % (nHosts, nWorkers, hours(max(total/nSlots, DF_PL.WALL_TIME.max()))),
+            'Simulation files      : %.2f GB' % (DF_PL.SIM_SIZE_MB.sum()/1e3),
+            'Plan                  : '+planFile]
+    return True, '\n'.join(TEXT)
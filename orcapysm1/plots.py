@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.plots
+
+Description :
+
+    Batch Plots of the Time Histories and Envelopes of all the Cases
+
+        python -m orcapysm1 plots [--format png|svg] [--workers N]
+
+    For every intact and damage case three charts are written to PLOT_DIR
+    (matplotlib with the non-interactive Agg backend, on a worker pool) :
+
+        <case>_tension      End A Effective Tension of every line
+        <case>_offsets      Vessel offsets (X, Y) from the statics position
+        <case>_envelope     Max, mean and min End A / End B tension of each
+                            line
+
+    The time histories are read one chunk at a time from the simulation
+    file or its archive (orcapysm1.archive) and downsampled with the
+    Largest Triangle Three Buckets (LTTB) algorithm, which keeps the peaks
+    and the shape of the history : first to POINTS_PER_CHUNK points per
+    chunk, then to MAX_POINTS points per series. The envelope chart is from
+    the full resolution running statistics (orcapysm1.stream).
+
+    The key of each case (fingerprint of its simulation file or archive
+    and the plot settings, orcapysm1.cache) is kept next to its charts,
+    a case is plotted again only when its results change. A mirror image
+    case (orcapysm1.symmetry) is plotted from its source case.
+
+    matplotlib is only needed by this stage.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import os
+import concurrent.futures
+from . import check
+from . import stream
+from . import archive
+from . import cache
+from . import symmetry
+from .common import INPUT_FILE, basename, case_list, progress
+
+PLOT_DIR = 'plots'
+PLOT_FORMAT = 'png'
+MAX_POINTS = 2000           # Points per series on a chart
+POINTS_PER_CHUNK = 1000     # Points per series kept from each chunk
+DPI = 100
+
+CHARTS = ['tension', 'offsets', 'envelope']
+
+N_WORKERS = os.cpu_count()
+
+
+def lttb(x, Y, nOut):
+    ''' Largest Triangle Three Buckets downsampling of the series Y
+    (samples x series) at the sample times x to nOut points, each series on
+    its own. Returns the indices (nOut x series) of the points kept, the
+    first and last points are always kept '''
+    n, m = Y.shape
+    if nOut >= n or nOut < 3:
+        return np.repeat(np.arange(n)[:, None], m, axis=1)
+
+    # nOut - 2 buckets of the points between the first and the last, and
+    # the average point of each bucket
+    edges = np.linspace(1, n-1, nOut-1).astype(int)
+    counts = np.diff(edges)
+    XM = np.add.reduceat(x[:n-1], edges[:-1])/counts
+    YM = np.add.reduceat(Y[:n-1], edges[:-1], axis=0)/counts[:, None]
+
+    idx = np.zeros((nOut, m), dtype=int)
+    idx[-1] = n-1
+    a = np.zeros(m, dtype=int)
+    cols = np.arange(m)
+    for i in range(nOut-2):
+        b0, b1 = edges[i], edges[i+1]
+
+        # Average point of the next bucket (the last point for the last one)
+        if i+1 < nOut-2:
+            nx, ny = XM[i+1], YM[i+1]
+        else:
+            nx, ny = x[-1], Y[-1]
+
+        # Point of the bucket with the largest triangle, for every series
+        xa, ya = x[a], Y[a, cols]
+        area = np.abs((xa-nx)*(Y[b0:b1]-ya)-(xa-x[b0:b1, None])*(ny-ya))
+        a = b0+np.argmax(area, axis=0)
+        idx[i+1] = a
+    return idx
+
+
+def chart_files(plotDir, tag, fmt=PLOT_FORMAT):
+    ''' Chart files of a case '''
+    return [os.path.join(plotDir, tag+'_'+chart+'.'+fmt) for chart in CHARTS]
+
+
+def case_series(fileName, lines, vesName, mirror=None):
+    ''' Downsampled End A tensions and vessel offsets of a case, and the
+    running statistics of all the archive.variable_names. With mirror
+    (LINE_MAP, heading, origin), of the mirror image of the case '''
+    names = archive.variable_names(lines, vesName)
+    nL = len(archive.LINE_VARS)
+    ten = [j*nL+archive.LINE_VARS.index(('Effective Tension', 'End A')) for j in range(len(lines))]
+    ves = [len(lines)*nL+archive.VES_VARS.index(var) for var in ['X', 'Y']]
+
+    sourceLines = lines if mirror is None else [mirror[0][line] for line in lines]
+
+    stats = stream.RunningStats(len(names))
+    T = list()
+    Y = list()
+    static = None
+    tLast = -np.inf
+    for times, values in archive.result_chunks(fileName, sourceLines, vesName):
+        if mirror is not None:
+            values = symmetry.mirror_values(values, len(lines), mirror[1], mirror[2])
+        stats.update(values, times[-1]-max(tLast, times[0]))
+        tLast = times[-1]
+
+        if static is None:
+            static = values[0, ves]
+        times = np.asarray(times, dtype=float)
+        chunk = np.column_stack([values[:, ten], values[:, ves]-static])
+        idx = lttb(times, chunk, POINTS_PER_CHUNK)
+        T.append(times[idx])
+        Y.append(np.take_along_axis(chunk, idx, axis=0))
+
+    # Second pass over the points kept from the chunks, series by series
+    T = np.concatenate(T)
+    Y = np.concatenate(Y)
+    SERIES = list()
+    for k in range(Y.shape[1]):
+        idx = lttb(T[:, k], Y[:, k:k+1], MAX_POINTS)[:, 0]
+        SERIES.append((T[idx, k], Y[idx, k]))
+    return SERIES[:len(ten)], SERIES[len(ten):], stats
+
+
+def case_plots(fileName, lines, vesName, tag, plotDir=PLOT_DIR, fmt=PLOT_FORMAT, mirror=None):
+    ''' Write the charts of one case, returns the chart files '''
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    TEN, VES, stats = case_series(fileName, lines, vesName, mirror)
+    files = chart_files(plotDir, tag, fmt)
+    os.makedirs(plotDir, exist_ok=True)
+
+    # Line tensions
+    fig, ax = plt.subplots(figsize=(10, 5))
+    for line, (t, y) in zip(lines, TEN):
+        ax.plot(t, y, lw=0.6, label=str(line))
+    ax.set(title=tag+' : End A Effective Tension', xlabel='Time (s)', ylabel='Tension (kN)')
+    ax.legend(ncol=4, fontsize='small')
+    ax.grid(alpha=0.3)
+    fig.savefig(files[0], dpi=DPI, bbox_inches='tight')
+    plt.close(fig)
+
+    # Vessel offsets
+    fig, ax = plt.subplots(figsize=(10, 5))
+    for name, (t, y) in zip(['DX', 'DY'], VES):
+        ax.plot(t, y, lw=0.6, label=name)
+    ax.set(title=tag+' : Vessel Offsets from Statics', xlabel='Time (s)', ylabel='Offset (m)')
+    ax.legend()
+    ax.grid(alpha=0.3)
+    fig.savefig(files[1], dpi=DPI, bbox_inches='tight')
+    plt.close(fig)
+
+    # Tension envelope per line
+    nL = len(archive.LINE_VARS)
+    x = np.arange(len(lines))
+    fig, ax = plt.subplots(figsize=(10, 5))
+    for k, (end, dx) in enumerate([('End A', -0.2), ('End B', 0.2)]):
+        cols = [j*nL+archive.LINE_VARS.index(('Effective Tension', end)) for j in range(len(lines))]
+        ax.bar(x+dx, stats.max[cols]-stats.min[cols], width=0.35, bottom=stats.min[cols],
+               color='C'+str(k), alpha=0.5, label=end+' min - max')
+        ax.plot(x+dx, stats.mean[cols], '_', color='C'+str(k), ms=12)
+    ax.set_xticks(x, [str(line) for line in lines])
+    ax.set(title=tag+' : Effective Tension Range', xlabel='Line', ylabel='Tension (kN)')
+    ax.legend()
+    ax.grid(alpha=0.3, axis='y')
+    fig.savefig(files[2], dpi=DPI, bbox_inches='tight')
+    plt.close(fig)
+
+    return files
+
+
+def plot_cases(inputFile=INPUT_FILE, plotDir=PLOT_DIR, fmt=PLOT_FORMAT, nWorkers=N_WORKERS):
+    ''' Charts of all the cases in parallel, only the cases whose results
+    changed are plotted again. Returns the number of cases plotted '''
+
+    # All the Input sheets, parsed once
+    INPUT = check.read_input(inputFile)
+
+    BASENAME = basename(INPUT)
+    vesName = INPUT['Ves_Gen'].VAL['NAME']
+
+    MIRRORS = symmetry.mirrored(INPUT)
+    mirror = symmetry.mirror_setup(INPUT)[:3]
+
+    ''' -----------------------------------------------------------------------
+    Cases with New or Changed Results
+    -------------------------------------------------------------------------'''
+    TODO = list()
+    for caseId, family, fileName, lines in case_list(INPUT, BASENAME):
+        sourceFile = symmetry.mirror_source(fileName, caseId, family, MIRRORS)
+        if sourceFile is not None and (os.path.exists(sourceFile) or
+                                       os.path.exists(archive.archive_file(sourceFile))):
+            args = (sourceFile, lines, vesName, family+'_'+str(caseId).replace(' ', '_'))
+            kwargs = {'fmt': fmt, 'mirror': mirror}
+        elif os.path.exists(fileName) or os.path.exists(archive.archive_file(fileName)):
+            args = (fileName, lines, vesName, family+'_'+str(caseId).replace(' ', '_'))
+            kwargs = {'fmt': fmt, 'mirror': None}
+        else:
+            continue
+
+        key = cache.cache_key(case_plots, args[0], args[1:], kwargs)
+        keyFile = os.path.join(plotDir, args[3]+'.key')
+        if os.path.exists(keyFile) and all(os.path.exists(f) for f in chart_files(plotDir, args[3], fmt)):
+            with open(keyFile) as f:
+                if f.read() == key:
+                    continue
+        TODO.append((args, kwargs, key, keyFile))
+
+    ''' -----------------------------------------------------------------------
+    Plot the Cases in Parallel
+    -------------------------------------------------------------------------'''
+    with concurrent.futures.ProcessPoolExecutor(max_workers=nWorkers) as pool:
+        futures = {pool.submit(case_plots, *args, plotDir=plotDir, **kwargs): (args, key, keyFile)
+                   for args, kwargs, key, keyFile in TODO}
+        for future in concurrent.futures.as_completed(futures):
+            args, key, keyFile = futures[future]
+            future.result()
+            with open(keyFile, 'w') as f:
+                f.write(key)
+            progress(args[3], 'plotted')
+
+    return len(TODO)
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.post_dynamic
+
+Description :
+
+    Intact Dynamic Results
+
+        python -m orcapysm1 post-dynamic [--stream] [--storm-hours 3]
+
+    After running all the Intact dynamic simulations, the Rayleigh MPM
+    maximum / minimum, the maximum, minimum and RMS of the line end forces
+    and of the vessel excursions of each case are added to output.xlsx
+
+    The damage cases are post processed as well and added to the envelope
+    with the intact cases (the damaged line is left out of its case). The
+    sheets "ENVELOPE Tensions" and "ENVELOPE Excursions" list the
+    governing value, CASE_ID and case family for each line and vessel DOF,
+    with the utilisation of the tensions against the MBL. The envelope is
+    also saved to envelope.pkl (orcapysm1.envelope) in the folder of
+    outputFile.
+
+    With streamStats (--stream) the time histories are read in fixed length
+    chunks (orcapysm1.stream) so that the memory used does not grow with
+    the simulation length (use for long storm simulations).
+
+    A case whose simulation file was deleted after archiving (python -m
+    orcapysm1 archive --delete-sim) is post processed from its archive
+    (orcapysm1.archive), with the streamed statistics.
+
+    A mirror image case (orcapysm1.symmetry) is post processed from the
+    time histories of its source case, with the mirror line names.
+
+    The statistics of each case are kept in the result cache
+    (orcapysm1.cache), only the new or re-run cases are recomputed.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import OrcFxAPI
+import os
+import numpy as np
+import pandas as pd
+from . import check
+from . import envelope
+from . import stream
+from . import archive
+from . import cache
+from . import symmetry
+from .common import INPUT_FILE, OUTPUT_FILE, basename, case_file, case_list, write_sheets
+
+STREAM_STATS = False
+StormDurationHours = 3
+
+LineParmList = ['Effective Tension','End GX force','End GY force','End GZ force','Effective Tension','End GX force','End GY force','End GZ force']
+LineOEList = [OrcFxAPI.oeEndA,OrcFxAPI.oeEndA,OrcFxAPI.oeEndA,OrcFxAPI.oeEndA,OrcFxAPI.oeEndB,OrcFxAPI.oeEndB,OrcFxAPI.oeEndB,OrcFxAPI.oeEndB]
+LineSheetNames = ['End A EFF TEN ','End A GX F','End A GY F','End A GZ F','End B EFF TEN ','End B GX F','End B GY F','End B GZ F']
+
+VesParmList = ['X','Y','Z','Rotation 1','Rotation 2','Rotation 3']
+VOE = OrcFxAPI.oeVessel((0,0,0))
+VesSheetNames = 'Vessel Excursions'
+
+nLineParms = len(LineParmList)
+nVesParms = len(VesParmList)
+
+
+def rayleigh_mpm(extrmStats, stormDurationHours):
+    ''' Rayleigh MPM of the maxima and of the minima of an ExtremeStatistics '''
+    MPM = list()
+    for extremes in [0, 1]:
+        esSpec=OrcFxAPI.RayleighStatisticsSpecification(ExtremesToAnalyse=extremes)
+        extrmStats.Fit(esSpec)
+        query = OrcFxAPI.RayleighStatisticsQuery(StormDurationHours=stormDurationHours, RiskFactor=1)
+        extrms=extrmStats.Query(query)
+        MPM.append(extrms.MostProbableExtremeValue)
+    return MPM
+
+
+def case_results(fileName, lines, vesName, streamStats=STREAM_STATS,
+                 stormDurationHours=StormDurationHours):
+    ''' Statistics of one dynamic simulation file. Returns the dicts LINE
+    (nLines x nLineParms arrays) and VES (nVesParms arrays) of MPV_MAX,
+    MPV_MIN, MAX, MIN and RMS '''
+    nLines = len(lines)
+    LINE = {k: np.zeros([nLines,nLineParms]) for k in ['MPV_MAX','MPV_MIN','MAX','MIN','RMS']}
+    VES = {k: np.zeros(nVesParms) for k in ['MPV_MAX','MPV_MIN','MAX','MIN','RMS']}
+
+    # Simulation file replaced by its result archive
+    archFile = archive.archive_file(fileName)
+    if not os.path.exists(fileName) and os.path.exists(archFile):
+        return archive.case_results(archFile, lines, vesName, stormDurationHours)
+
+    model_0 = OrcFxAPI.Model(fileName)
+
+    if streamStats:
+
+        ''' --------------------------------------------------------------------
+        Streaming Statistics : All Lines and Vessel in One Pass
+        ----------------------------------------------------------------------'''
+        specs = list()
+        for j in range(nLines):
+            for k in range(nLineParms):
+                specs.append(OrcFxAPI.TimeHistorySpecification(model_0[lines[j]],LineParmList[k],LineOEList[k]))
+        for k in range(nVesParms):
+            specs.append(OrcFxAPI.TimeHistorySpecification(model_0[vesName],VesParmList[k],VOE))
+
+        stats = stream.stream_statistics(model_0,specs)
+        mpmMax, mpmMin = stats.rayleigh_mpm(stormDurationHours)
+
+        nL = nLines*nLineParms
+        for k, vals in [('MPV_MAX',mpmMax),('MPV_MIN',mpmMin),('MAX',stats.max),('MIN',stats.min),('RMS',stats.rms)]:
+            LINE[k][:] = vals[:nL].reshape(nLines,nLineParms)
+            VES[k][:] = vals[nL:]
+
+        return LINE, VES
+
+    period = OrcFxAPI.Period(OrcFxAPI.PeriodNum.WholeSimulation)
+
+    ''' ------------------------------------------------------------------------
+    Line Forces / Tensions
+    --------------------------------------------------------------------------'''
+    for j in range(nLines):
+
+        obj=model_0[lines[j]]
+
+        for k in range(nLineParms):
+
+            # Most Probable : Rayleigh Distribution
+            extrmStats=obj.ExtremeStatistics(LineParmList[k],period,LineOEList[k])
+            LINE['MPV_MAX'][j,k], LINE['MPV_MIN'][j,k] = rayleigh_mpm(extrmStats, stormDurationHours)
+
+            # Max and Min
+            stats=obj.AnalyseExtrema(LineParmList[k],period,LineOEList[k])
+            LINE['MAX'][j,k]=stats.Max
+            LINE['MIN'][j,k]=stats.Min
+
+            # RMS Value
+            stats=obj.TimeSeriesStatistics(LineParmList[k],period,LineOEList[k])
+            LINE['RMS'][j,k]=stats.RMS
+
+    ''' ------------------------------------------------------------------------
+    Vessel Excursions
+    --------------------------------------------------------------------------'''
+    obj = model_0[vesName]
+
+    for k in range(nVesParms):
+
+        # Most Probable : Rayleigh Distribution
+        extrmStats=obj.ExtremeStatistics(VesParmList[k],period,VOE)
+        VES['MPV_MAX'][k], VES['MPV_MIN'][k] = rayleigh_mpm(extrmStats, stormDurationHours)
+
+        # Max and Min
+        stats=obj.AnalyseExtrema(VesParmList[k],period,VOE)
+        VES['MAX'][k]=stats.Max
+        VES['MIN'][k]=stats.Min
+
+        # RMS Value
+        stats=obj.TimeSeriesStatistics(VesParmList[k],period,VOE)
+        VES['RMS'][k]=stats.RMS
+
+    return LINE, VES
+
+
+def post_dynamic(inputFile=INPUT_FILE, outputFile=OUTPUT_FILE, streamStats=STREAM_STATS,
+                 stormDurationHours=StormDurationHours, useCache=cache.USE_CACHE):
+    ''' Add the intact dynamic results and the envelope of the intact and
+    damage cases to outputFile '''
+
+    # All the Input sheets, parsed once
+    INPUT = check.read_input(inputFile)
+
+    BASENAME = basename(INPUT)
+
+    DF_ML = INPUT['Moor_Lines']
+    lines = DF_ML.index
+    nLines=len(lines)
+
+    vesName = INPUT['Ves_Gen'].VAL['NAME']
+
+    # Line Types for the MBL of the line ends
+    MBL_A, MBL_B = envelope.line_end_mbl(DF_ML, INPUT['Line_Types'])
+
+    # Reading the intact Case Matrix from Input Excel sheet (or its file)
+    DF_ICM = check.case_matrix(INPUT, 'IntactCases', ['CASE_ID'])
+    nICM = len(DF_ICM)
+
+    ''' ------------------------------------------------------------------------
+    Intact Dynamic Results
+    --------------------------------------------------------------------------'''
+    MPV_MAX_DATA_LINE = np.zeros([nICM,nLines,nLineParms])
+    MPV_MIN_DATA_LINE = np.zeros([nICM,nLines,nLineParms])
+    MAX_DATA_LINE = np.zeros([nICM,nLines,nLineParms])
+    MIN_DATA_LINE = np.zeros([nICM,nLines,nLineParms])
+    RMS_DATA_LINE = np.zeros([nICM,nLines,nLineParms])
+
+    MPV_MAX_DATA_VES = np.zeros([nICM,nVesParms])
+    MPV_MIN_DATA_VES = np.zeros([nICM,nVesParms])
+    MAX_DATA_VES = np.zeros([nICM,nVesParms])
+    MIN_DATA_VES = np.zeros([nICM,nVesParms])
+    RMS_DATA_VES = np.zeros([nICM,nVesParms])
+
+    # Mirror image cases and the mirror plane
+    MIRRORS = symmetry.mirrored(INPUT)
+    LINE_MAP, heading, origin = symmetry.mirror_setup(INPUT)[:3]
+
+    # Governing Case Envelope, updated as each case is post processed
+    ENVELOPE = envelope.mooring_envelope(lines, VesParmList)
+
+    for i in range(nICM):
+
+        fileName = case_file(BASENAME, 'INTACT', DF_ICM.CASE_ID[i])
+        sourceFile = symmetry.mirror_source(fileName, DF_ICM.CASE_ID[i], 'INTACT', MIRRORS)
+        if sourceFile is not None:
+            LINE, VES = cache.call(symmetry.mirror_results, sourceFile, list(lines), vesName, LINE_MAP,
+                                   heading, origin, stormDurationHours, useCache=useCache)
+        else:
+            LINE, VES = cache.call(case_results, fileName, list(lines), vesName, streamStats, stormDurationHours,
+                                   useCache=useCache)
+
+        MPV_MAX_DATA_LINE[i] = LINE['MPV_MAX']
+        MPV_MIN_DATA_LINE[i] = LINE['MPV_MIN']
+        MAX_DATA_LINE[i] = LINE['MAX']
+        MIN_DATA_LINE[i] = LINE['MIN']
+        RMS_DATA_LINE[i] = LINE['RMS']
+
+        MPV_MAX_DATA_VES[i] = VES['MPV_MAX']
+        MPV_MIN_DATA_VES[i] = VES['MPV_MIN']
+        MAX_DATA_VES[i] = VES['MAX']
+        MIN_DATA_VES[i] = VES['MIN']
+        RMS_DATA_VES[i] = VES['RMS']
+
+        ''' --------------------------------------------------------------------
+        Governing Case Envelope
+        ----------------------------------------------------------------------'''
+        ENVELOPE.update(DF_ICM.CASE_ID[i], 'INTACT',
+                        MAX_MPM_TEN_A=MPV_MAX_DATA_LINE[i,:,0],
+                        MAX_MPM_TEN_B=MPV_MAX_DATA_LINE[i,:,4],
+                        MIN_TEN_A=MIN_DATA_LINE[i,:,0],
+                        MIN_TEN_B=MIN_DATA_LINE[i,:,4],
+                        MAX_OFFSET=MPV_MAX_DATA_VES[i,:],
+                        MIN_OFFSET=MPV_MIN_DATA_VES[i,:])
+
+    LINE_DATA = [('MPV_MAX_', MPV_MAX_DATA_LINE), ('MPV_MIN_', MPV_MIN_DATA_LINE), ('MAX_', MAX_DATA_LINE),
+                 ('MIN_', MIN_DATA_LINE), ('RMS_', RMS_DATA_LINE)]
+    VES_DATA = [('MPV_MAX_', MPV_MAX_DATA_VES), ('MPV_MIN_', MPV_MIN_DATA_VES), ('MAX_', MAX_DATA_VES),
+                ('MIN_', MIN_DATA_VES), ('RMS_', RMS_DATA_VES)]
+
+    SHEETS = dict()
+    for i in range(nLineParms):
+        for prefix, DATA in LINE_DATA:
+            SHEETS[prefix+LineSheetNames[i]] = pd.DataFrame(DATA[:,:,i],index=DF_ICM.CASE_ID,columns=lines)
+    for prefix, DATA in VES_DATA:
+        SHEETS[prefix+VesSheetNames] = pd.DataFrame(DATA[:,:],index=DF_ICM.CASE_ID,columns=VesParmList)
+    write_sheets(outputFile, SHEETS)
+
+    ''' ------------------------------------------------------------------------
+    Damage Cases : Envelope Only, the Damaged Line Left Out
+    --------------------------------------------------------------------------'''
+    allLines = list(lines)
+    for caseId, family, fileName, damLines in case_list(INPUT, BASENAME):
+        if family != 'DAMAGE':
+            continue
+
+        sourceFile = symmetry.mirror_source(fileName, caseId, family, MIRRORS)
+        if sourceFile is not None:
+            LINE, VES = cache.call(symmetry.mirror_results, sourceFile, list(damLines), vesName, LINE_MAP,
+                                   heading, origin, stormDurationHours, useCache=useCache)
+        else:
+            LINE, VES = cache.call(case_results, fileName, list(damLines), vesName, streamStats,
+                                   stormDurationHours, useCache=useCache)
+
+        # Values of the lines of the case on all the lines (NaN for the damaged line)
+        idx = [allLines.index(line) for line in damLines]
+        FULL = {k: np.full([nLines,nLineParms], np.nan) for k in ['MPV_MAX','MIN']}
+        for k in FULL:
+            FULL[k][idx] = LINE[k]
+
+        ENVELOPE.update(caseId, family,
+                        MAX_MPM_TEN_A=FULL['MPV_MAX'][:,0],
+                        MAX_MPM_TEN_B=FULL['MPV_MAX'][:,4],
+                        MIN_TEN_A=FULL['MIN'][:,0],
+                        MIN_TEN_B=FULL['MIN'][:,4],
+                        MAX_OFFSET=VES['MPV_MAX'],
+                        MIN_OFFSET=VES['MPV_MIN'])
+
+    ENVELOPE.save(envelope.envelope_file(outputFile))
+
+    write_sheets(outputFile, {'ENVELOPE Tensions': envelope.envelope_table(ENVELOPE,MBL_A,MBL_B),
+                              'ENVELOPE Excursions': envelope.offset_table(ENVELOPE)})
+
+    return ENVELOPE
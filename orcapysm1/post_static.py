@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.post_static
+
+Description :
+
+    Step 3 : Intact Static Results
+
+        python -m orcapysm1 post-static
+
+    After the vessel wave loads are imported and the statics is analysed
+    again in the intact statics simulation file, the End A / End B
+    tensions and forces of the mooring lines and the static position of the
+    vessel are written to a new output.xlsx
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import OrcFxAPI
+import numpy as np
+import pandas as pd
+from . import check
+from .common import INPUT_FILE, OUTPUT_FILE, basename, statics_file
+
+
+def static_results(model_0, lines, vesName):
+    ''' Static line end forces and vessel position of a model, returns the
+    DataFrames of the Tensions and the Excursions '''
+    nLines = len(lines)
+
+    # Fetching and Writing - Tensions
+    StaticLineForces = np.zeros((nLines,8),dtype=float)
+
+    for i in range(nLines):
+
+        line=model_0[lines[i]]
+        StaticLineForces[i,0] = line.StaticResult('Effective Tension',OrcFxAPI.oeEndA)
+        StaticLineForces[i,1] = line.StaticResult('End GX force',OrcFxAPI.oeEndA)
+        StaticLineForces[i,2] = line.StaticResult('End GY force',OrcFxAPI.oeEndA)
+        StaticLineForces[i,3] = line.StaticResult('End GZ force',OrcFxAPI.oeEndA)
+        StaticLineForces[i,4] = line.StaticResult('Effective Tension',OrcFxAPI.oeEndB)
+        StaticLineForces[i,5] = line.StaticResult('End GX force',OrcFxAPI.oeEndB)
+        StaticLineForces[i,6] = line.StaticResult('End GY force',OrcFxAPI.oeEndB)
+        StaticLineForces[i,7] = line.StaticResult('End GZ force',OrcFxAPI.oeEndB)
+
+    DataNames = ['End A - Effective Tensions (kN)','End A - GX force (kN)', 'End A - GY force (kN)','End A - GZ force (kN)','End B - Effective Tensions (kN)','End B - GX forc (kN)', 'End B - GY force (kN)','End B - GZ force (kN)']
+    DF_ISR_TEN = pd.DataFrame(StaticLineForces,index=lines,columns=DataNames)
+
+    # Fetching Vessel Excustions
+    VesselExcursions = list()
+
+    ves=model_0[vesName]
+    for name in ['X', 'Y', 'Z', 'Rotation 1', 'Rotation 2', 'Rotation 3']:
+        VesselExcursions.append(ves.StaticResult(name))
+
+    DF_ISR_EXC = pd.DataFrame(VesselExcursions,index=['X','Y','Z','Roll','Pitch','Yaw'],columns=[vesName])
+
+    return DF_ISR_TEN, DF_ISR_EXC
+
+
+def post_static(inputFile=INPUT_FILE, outputFile=OUTPUT_FILE):
+    ''' Write the intact static results to a new outputFile '''
+
+    # All the Input sheets, parsed once
+    INPUT = check.read_input(inputFile)
+
+    BASENAME = basename(INPUT)
+    lines = INPUT['Moor_Lines'].index
+    vesName = INPUT['Ves_Gen'].VAL['NAME']
+
+    ''' -----------------------------------------------------------------------
+    Intact Static Results
+    -------------------------------------------------------------------------'''
+    model_0 = check.load_simulation(statics_file(BASENAME))
+
+    DF_ISR_TEN, DF_ISR_EXC = static_results(model_0, lines, vesName)
+
+    with pd.ExcelWriter(outputFile,mode='w') as writer:
+        DF_ISR_TEN.to_excel(writer,sheet_name='Intact-Static Tensions')
+        DF_ISR_EXC.to_excel(writer,sheet_name='Intact-Static Excursions')
+
+    return DF_ISR_TEN, DF_ISR_EXC
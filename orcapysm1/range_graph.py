@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.range_graph
+
+Description :
+
+    Along Line Results : Tension Envelopes, Touchdown and Anchor Uplift
+
+        python -m orcapysm1 range-graph [--workers N]
+
+    The arclength resolved results of every line are read with a few
+    batched calls per case instead of node by node :
+
+        RangeGraph          Effective Tension and Seabed clearance, max /
+                            min / mean at every node, one call per line
+        Time histories      Seabed clearance at the nodes of the touchdown
+                            zone and Declination at End B of all the lines,
+                            one GetMultipleTimeHistories call per chunk of
+                            CHUNK_DURATION seconds
+
+    The touchdown zone of a line is the nodes which are on the seabed at
+    some time and off it at another (range graph clearance min <=
+    CONTACT_TOL < max). Vectorised over nodes and samples :
+
+        Touchdown point     Arclength of the first node (from End A) on the
+                            seabed, its static, min and max positions and
+                            the excursion (max - min)
+        Anchor uplift       Vertical angle of the line at End B,
+                            |Declination - 90|
+        Tension envelope    Max and min tension along the line, at the
+                            clump weight / buoy attachments and the maximum
+                            over all the cases at every node
+
+    The cases are post processed in parallel, the unchanged cases are read
+    from the result cache (orcapysm1.cache). The results are written to
+    the sheets "Line Range Results" and "Tension Envelope" of output.xlsx.
+    Per-node results are not kept in the case archives (orcapysm1.archive),
+    the simulation files are needed. The results of a mirror image case
+    (orcapysm1.symmetry) are those of the mirror lines of its source case.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pandas as pd
+import os
+import concurrent.futures
+from . import check
+from . import stream
+from . import cache
+from . import symmetry
+from .common import INPUT_FILE, OUTPUT_FILE, basename, case_list, progress, write_sheets
+
+CHUNK_DURATION = stream.CHUNK_DURATION
+CONTACT_TOL = 0.0           # m, seabed clearance of a node in contact
+
+N_WORKERS = os.cpu_count()
+
+
+def attachment_arclengths(line):
+    ''' Arclengths (from End A) of the attachments of a line, from the line
+    data as set by the build stage (z relative to End B) '''
+    length = sum(line.Length[j] for j in range(line.NumberOfSections))
+    ARC = list()
+    for j in range(line.NumberOfAttachments):
+        z = line.Attachmentz[j]
+        ARC.append(length-z if line.AttachmentzRelativeTo[j] == 'End B' else z)
+    return np.array(ARC, dtype=float)
+
+
+def touchdown(clearance, arclengths, first):
+    ''' Touchdown arclength at each sample : first node in contact of the
+    zone (samples x zone nodes), else the arclength first (the first node
+    always in contact, NaN if none) '''
+    contact = clearance <= CONTACT_TOL
+    if contact.shape[1] == 0:
+        return np.full(contact.shape[0], first)
+    return np.where(contact.any(axis=1), arclengths[np.argmax(contact, axis=1)], first)
+
+
+def uplift_angle(declination):
+    ''' Vertical angle of the line at the anchor from its Declination '''
+    return np.abs(np.asarray(declination)-90.0)
+
+
+def case_range(fileName, lines, chunkDuration=CHUNK_DURATION):
+    ''' Along line results of one case, returns a dict per line '''
+    import OrcFxAPI
+
+    model_0 = OrcFxAPI.Model(fileName)
+    period = OrcFxAPI.Period(OrcFxAPI.PeriodNum.WholeSimulation)
+    static = OrcFxAPI.Period(OrcFxAPI.PeriodNum.StaticState)
+
+    ''' -----------------------------------------------------------------------
+    Range Graphs : One Call per Line and Variable
+    -------------------------------------------------------------------------'''
+    RES = dict()
+    specs = list()
+    for line in lines:
+        obj = model_0[line]
+        nodeArc = np.asarray(obj.NodeArclengths)
+
+        ten = obj.RangeGraph('Effective Tension', period)
+        clr = obj.RangeGraph('Seabed clearance', period)
+        clr0 = obj.RangeGraph('Seabed clearance', static)
+
+        # Points always on the seabed, points moving on / off it
+        arc = np.asarray(clr.X)
+        clrMin, clrMax = np.asarray(clr.Min), np.asarray(clr.Max)
+        always = np.flatnonzero(clrMax <= CONTACT_TOL)
+        first = arc[always[0]] if len(always) else np.nan
+        zone = np.flatnonzero((clrMin <= CONTACT_TOL) & (clrMax > CONTACT_TOL))
+        if len(always):
+            zone = zone[zone < always[0]]
+
+        # Nodes of the touchdown zone
+        nodes = np.abs(nodeArc[None, :]-arc[zone][:, None]).argmin(axis=1)+1
+
+        attArc = attachment_arclengths(obj)
+        tenArc = np.asarray(ten.X)
+        RES[line] = {'ARC': tenArc,
+                     'TEN_MAX': np.asarray(ten.Max),
+                     'TEN_MIN': np.asarray(ten.Min),
+                     'ATT_ARC': attArc,
+                     'ATT_TEN_MAX': np.interp(attArc, tenArc, ten.Max),
+                     'ATT_TEN_MIN': np.interp(attArc, tenArc, ten.Min),
+                     'TDP_STATIC': touchdown(np.asarray(clr0.Mean)[None, :], np.asarray(clr0.X), np.nan)[0],
+                     'ZONE_ARC': arc[zone], 'FIRST': first,
+                     'COLS': slice(len(specs), len(specs)+len(zone)+1)}
+
+        # Touchdown zone clearance, then the End B declination
+        for node in nodes:
+            specs.append(OrcFxAPI.TimeHistorySpecification(obj, 'Seabed clearance', OrcFxAPI.oeNodeNum(int(node))))
+        specs.append(OrcFxAPI.TimeHistorySpecification(obj, 'Declination', OrcFxAPI.oeEndB))
+
+    ''' -----------------------------------------------------------------------
+    Touchdown and Uplift Time Histories : One Call per Chunk
+    -------------------------------------------------------------------------'''
+    TDP_MIN = {line: np.inf for line in lines}
+    TDP_MAX = {line: -np.inf for line in lines}
+    UPLIFT = {line: 0.0 for line in lines}
+
+    stopTime = model_0.simulationStopTime
+    tLast = -np.inf
+    t0 = model_0.simulationStartTime
+    while t0 < stopTime:
+        t1 = min(t0+chunkDuration, stopTime)
+        chunk = OrcFxAPI.Period(t0, t1)
+
+        # Both ends of a Period are inclusive, skip the samples already used
+        times = model_0.SampleTimes(chunk)
+        keep = times > tLast
+        if keep.any():
+            TH = OrcFxAPI.GetMultipleTimeHistories(specs, chunk)[keep]
+            for line in lines:
+                R = RES[line]
+                cols = TH[:, R['COLS']]
+                tdp = touchdown(cols[:, :-1], R['ZONE_ARC'], R['FIRST'])
+                if np.isfinite(tdp).any():
+                    TDP_MIN[line] = min(TDP_MIN[line], np.nanmin(tdp))
+                    TDP_MAX[line] = max(TDP_MAX[line], np.nanmax(tdp))
+                UPLIFT[line] = max(UPLIFT[line], uplift_angle(cols[:, -1]).max())
+            tLast = times[keep][-1]
+        t0 = t1
+
+    for line in lines:
+        R = RES[line]
+        for key in ['ZONE_ARC', 'FIRST', 'COLS']:
+            del R[key]
+        R['TDP_MIN'] = TDP_MIN[line] if np.isfinite(TDP_MIN[line]) else np.nan
+        R['TDP_MAX'] = TDP_MAX[line] if np.isfinite(TDP_MAX[line]) else np.nan
+        R['UPLIFT_MAX'] = UPLIFT[line]
+    return RES
+
+
+def range_graph(inputFile=INPUT_FILE, outputFile=OUTPUT_FILE, nWorkers=N_WORKERS,
+                useCache=cache.USE_CACHE):
+    ''' Along line results of all the cases in parallel, added to
+    outputFile. Returns the table of the line results and the envelope '''
+
+    # All the Input sheets, parsed once
+    INPUT = check.read_input(inputFile)
+
+    BASENAME = basename(INPUT)
+    MIRRORS = symmetry.mirrored(INPUT)
+    LINE_MAP = symmetry.mirror_setup(INPUT)[0]
+
+    # Simulation file and lines of each case, the source case and the
+    # mirror lines of a mirrored case
+    SOURCES = dict()
+    for c in case_list(INPUT, BASENAME):
+        sourceFile = symmetry.mirror_source(c[2], c[0], c[1], MIRRORS)
+        if sourceFile is not None and os.path.exists(sourceFile):
+            SOURCES[c[:2]] = (sourceFile, {line: LINE_MAP[line] for line in c[3]})
+        elif os.path.exists(c[2]):
+            SOURCES[c[:2]] = (c[2], {line: line for line in c[3]})
+    CASES = [c for c in case_list(INPUT, BASENAME) if c[:2] in SOURCES]
+
+    RESULTS = dict()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=nWorkers) as pool:
+        futures = {pool.submit(cache.call, case_range, SOURCES[c[:2]][0], list(SOURCES[c[:2]][1].values()),
+                               useCache=useCache): c for c in CASES}
+        for future in concurrent.futures.as_completed(futures):
+            case = futures[future]
+            RES = future.result()
+            RESULTS[case[:2]] = {line: RES[source] for line, source in SOURCES[case[:2]][1].items()}
+            progress(case[1], case[0], 'range graphs')
+
+    ''' -----------------------------------------------------------------------
+    Line Results and Tension Envelope over the Cases
+    -------------------------------------------------------------------------'''
+    ROWS = list()
+    ENVELOPE = dict()
+    for caseId, family, fileName, lines in CASES:
+        for line, R in RESULTS[(caseId, family)].items():
+            iMax = int(np.argmax(R['TEN_MAX']))
+            row = dict(CASE_ID=caseId, FAMILY=family, LINE=line,
+                       MAX_TEN=R['TEN_MAX'][iMax], MAX_TEN_ARC=R['ARC'][iMax], MIN_TEN=R['TEN_MIN'].min(),
+                       UPLIFT_MAX=R['UPLIFT_MAX'], TDP_STATIC=R['TDP_STATIC'],
+                       TDP_MIN=R['TDP_MIN'], TDP_MAX=R['TDP_MAX'], TDP_EXCURSION=R['TDP_MAX']-R['TDP_MIN'])
+            for j in range(len(R['ATT_ARC'])):
+                row['ATT'+str(j+1)+'_MAX_TEN'] = R['ATT_TEN_MAX'][j]
+                row['ATT'+str(j+1)+'_MIN_TEN'] = R['ATT_TEN_MIN'][j]
+            ROWS.append(row)
+
+            # Envelope on the arclengths of the first case of the line
+            if line not in ENVELOPE:
+                ENVELOPE[line] = {'ARC': R['ARC'], 'MAX': np.full(len(R['ARC']), -np.inf),
+                                  'MIN': np.full(len(R['ARC']), np.inf), 'CASE_ID': [None]*len(R['ARC'])}
+            E = ENVELOPE[line]
+            tMax = np.interp(E['ARC'], R['ARC'], R['TEN_MAX'])
+            for k in np.flatnonzero(tMax > E['MAX']):
+                E['CASE_ID'][k] = caseId
+            E['MAX'] = np.maximum(E['MAX'], tMax)
+            E['MIN'] = np.minimum(E['MIN'], np.interp(E['ARC'], R['ARC'], R['TEN_MIN']))
+
+    DF_RNG = pd.DataFrame(ROWS)
+    DF_ENV = pd.concat([pd.DataFrame({'LINE': line, 'ARCLENGTH': E['ARC'], 'MAX_TEN': E['MAX'],
+                                      'CASE_ID': E['CASE_ID'], 'MIN_TEN': E['MIN']})
+                        for line, E in ENVELOPE.items()], ignore_index=True) if ENVELOPE else pd.DataFrame()
+
+    write_sheets(outputFile, {'Line Range Results': DF_RNG, 'Tension Envelope': DF_ENV}, index=False)
+
+    return DF_RNG, DF_ENV
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.run
+
+Description :
+
+    Adaptive Duration Runs of the Dynamic Simulation Files
+
+        python -m orcapysm1 run [--workers N]
+
+    Runs the INTACT and DAMAGE dynamic simulation files generated by the
+    cases stage. Instead of a fixed storm length each simulation is run in
+    chunks of CHUNK_DURATION seconds (after the build-up stage). After every
+    chunk the running statistics of the key results are updated with the
+    new chunk only (orcapysm1.stream):
+
+        Effective Tension at End A of every mooring line
+        Vessel X and Y
+
+    The Rayleigh MPM and the standard deviation of each result are compared
+    with the values of the previous chunk. The simulation is stopped once
+    all of them change by less than TOLERANCE (relative to the dynamic
+    amplitude), but not before MIN_DURATION. Otherwise the simulation is
+    extended by one more chunk up to MAX_DURATION.
+
+    The cases are run in parallel on N_WORKERS processes, submitted longest
+    first by the predicted wall time (orcapysm1.plan). The achieved
+    duration, the convergence metrics and the solver telemetry (wall time
+    per simulated second, time steps, warnings) of each case are written
+    to run_log.xlsx and added to the telemetry table (orcapysm1.telemetry).
+    A case that fails (or whose build-up parent fails) does not stop the
+    other runs, it is logged with STATUS FAILED and the ERROR message and
+    is left out of the telemetry table.
+
+    When the cases were generated with the shared build-up, the build-up
+    parent of each group (listed in buildup_groups.csv) is run first and its
+    restart children are queued as soon as the parent is finished. The
+    mirror image cases listed in mirror_cases.csv (orcapysm1.symmetry) are
+    not run.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pandas as pd
+import os
+import time
+import concurrent.futures
+from . import check
+from . import stream
+from . import telemetry
+from . import symmetry
+from . import plan
+from .common import INPUT_FILE, BUILDUP_MANIFEST, basename, case_list, progress
+
+RUN_LOG = 'run_log.xlsx'
+
+''' ---------------------------------------------------------------------------
+    Adaptive Run Settings
+--------------------------------------------------------------------------- '''
+CHUNK_DURATION = 600.0      # Seconds simulated between the checks
+MIN_DURATION = 1800.0       # Seconds, no early stop before this
+MAX_DURATION = 10800.0      # Seconds, full storm length
+TOLERANCE = 0.02            # Relative change of MPM and Std Dev
+StormDurationHours = 3
+
+N_WORKERS = os.cpu_count()
+
+
+def convergence(prev, curr):
+    ''' Relative change of the MPM and Std Dev between two checks, with
+    respect to the dynamic amplitude (MPM - Mean) of each result '''
+    mpmPrev, stdPrev = prev
+    mpmCurr, stdCurr, mean = curr
+    amp = np.maximum(np.abs(mpmCurr-mean), 1e-9)
+    dMPM = np.abs(mpmCurr-mpmPrev)/amp
+    dSTD = np.abs(stdCurr-stdPrev)/np.maximum(stdCurr, 1e-9)
+    return max(dMPM.max(), dSTD.max())
+
+
+def run_parent(fileName):
+    ''' Run the shared build-up stage of a group of restart cases '''
+    import OrcFxAPI
+
+    model_0 = OrcFxAPI.Model(fileName)
+    model_0.RunSimulation()
+    model_0.SaveSimulation(fileName)
+    return fileName
+
+
+def run_case(fileName, lines, vesName, simFile=None):
+    ''' Run one simulation (or restart) file in chunks until converged or
+    MAX_DURATION, the results are saved to simFile '''
+    import OrcFxAPI
+
+    if simFile is None:
+        simFile = fileName
+
+    model_0 = OrcFxAPI.Model(fileName)
+    gen = model_0.general
+    gen.StageDuration[gen.StageCount-1] = CHUNK_DURATION
+
+    specs = stream.key_specs(model_0, lines, vesName)
+
+    t0 = time.perf_counter()
+    model_0.RunSimulation()
+    wallTime = time.perf_counter()-t0
+
+    stats = stream.RunningStats(len(specs))
+    tPrev = 0.0
+    tLast = -np.inf
+    duration = CHUNK_DURATION
+    prev = None
+    change = np.inf
+    while True:
+        # Only the new chunk is read, skipping the samples already used
+        period = OrcFxAPI.Period(tPrev, duration)
+        times = model_0.SampleTimes(period)
+        keep = times > tLast
+        stats.update(OrcFxAPI.GetMultipleTimeHistories(specs, period)[keep], duration-tPrev)
+        tLast = times[-1]
+
+        mpmMax, mpmMin = stats.rayleigh_mpm(StormDurationHours)
+        if prev is not None:
+            change = convergence(prev, (mpmMax, stats.std, stats.mean))
+        prev = (mpmMax, stats.std)
+
+        if duration >= MIN_DURATION and change < TOLERANCE:
+            break
+        if duration+CHUNK_DURATION > MAX_DURATION:
+            break
+
+        tPrev = duration
+        t0 = time.perf_counter()
+        model_0.ExtendSimulation(CHUNK_DURATION)
+        model_0.RunSimulation()
+        wallTime += time.perf_counter()-t0
+        duration += CHUNK_DURATION
+
+    # Build-up stage included in the simulated time
+    simTime = duration-model_0.simulationStartTime
+    METRICS = telemetry.dynamics_metrics(model_0, wallTime, simTime)
+
+    model_0.SaveSimulation(simFile)
+
+    return {'DURATION': duration,
+            'BUILDUP': gen.StageDuration[0],
+            'CONVERGED': bool(change < TOLERANCE),
+            'MAX_REL_CHANGE': change,
+            'MAX_MPM_TEN': mpmMax[:len(lines)].max(),
+            'MAX_STD_TEN': stats.std[:len(lines)].max(),
+            'STD_X': stats.std[-2],
+            'STD_Y': stats.std[-1],
+            **METRICS}
+
+
+def run_cases(inputFile=INPUT_FILE, nWorkers=N_WORKERS):
+    ''' Run all the dynamic cases in parallel, returns the run log. The
+    failed cases are logged with their ERROR and the other runs go on '''
+
+    # All the Input sheets, parsed once
+    INPUT = check.read_input(inputFile)
+
+    BASENAME = basename(INPUT)
+    vesName = INPUT['Ves_Gen'].VAL['NAME']
+
+    # Restart Files and their Build-up Parents
+    RESTARTS = dict()
+    if os.path.exists(BUILDUP_MANIFEST):
+        DF_BG = pd.read_csv(BUILDUP_MANIFEST)
+        for ib in range(len(DF_BG)):
+            RESTARTS[(str(DF_BG.CASE_ID[ib]), DF_BG.FAMILY[ib])] = (DF_BG.CHILD[ib], DF_BG.PARENT[ib])
+
+    ''' -----------------------------------------------------------------------
+    List of Cases : CASE_ID, Family, File Name and the Lines in the Model
+    -------------------------------------------------------------------------'''
+    # The mirror image cases (orcapysm1.symmetry) are not run
+    MIRRORS = symmetry.mirrored(INPUT)
+    CASES = [c for c in case_list(INPUT, BASENAME) if (str(c[0]), c[1]) not in MIRRORS]
+
+    # Longest predicted wall time first, so that a long case does not start last
+    CASES = plan.longest_first(INPUT, CASES)
+
+    # Run File and Build-up Parent of each case
+    RUNS = dict()
+    for case in CASES:
+        RUNS[case[:2]] = RESTARTS.get((str(case[0]), case[1]), (case[2], None))
+
+    ''' -----------------------------------------------------------------------
+    Run the Cases in Parallel
+    -------------------------------------------------------------------------'''
+    RESULTS = dict()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=nWorkers) as pool:
+        futures = dict()
+
+        # Parents first, the cases without a parent can start right away
+        for parent in set(RUNS[c[:2]][1] for c in CASES if RUNS[c[:2]][1]):
+            futures[pool.submit(run_parent, parent)] = parent
+        for case in CASES:
+            if RUNS[case[:2]][1] is None:
+                futures[pool.submit(run_case, case[2], case[3], vesName)] = case
+
+        while futures:
+            done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                item = futures.pop(future)
+
+                # Finished Build-up : queue its children, or fail them all
+                if isinstance(item, str):
+                    CHILDREN = [c for c in CASES if RUNS[c[:2]][1] == item]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        progress('Build-up', item, 'FAILED', repr(e))
+                        for case in CHILDREN:
+                            RESULTS[case[:2]] = {'STATUS': 'FAILED', 'ERROR': 'Build-up failed : '+repr(e)}
+                        continue
+                    progress('Build-up', item)
+                    for case in CHILDREN:
+                        futures[pool.submit(run_case, RUNS[case[:2]][0], case[3], vesName, case[2])] = case
+                    continue
+
+                try:
+                    RESULTS[item[:2]] = {'STATUS': 'OK', 'ERROR': '', **future.result()}
+                except Exception as e:
+                    RESULTS[item[:2]] = {'STATUS': 'FAILED', 'ERROR': repr(e)}
+                    progress(item[1], item[0], 'FAILED', repr(e))
+                    continue
+                progress(item[1], item[0], 'Duration', RESULTS[item[:2]]['DURATION'])
+
+    DF_LOG = pd.DataFrame([dict(CASE_ID=c[0], FAMILY=c[1], **RESULTS[c[:2]]) for c in CASES])
+    DF_LOG.to_excel(RUN_LOG, sheet_name='Adaptive Durations', index=False)
+
+    # Only the finished runs go to the telemetry (orcapysm1.plan calibration)
+    telemetry.record(DF_LOG[DF_LOG.STATUS == 'OK'].drop(columns=['STATUS', 'ERROR']).to_dict('records'), 'run')
+
+    nFailed = int((DF_LOG.STATUS == 'FAILED').sum()) if len(DF_LOG) else 0
+    if nFailed:
+        progress(nFailed, 'of', len(DF_LOG), 'runs FAILED, see', RUN_LOG)
+
+    return DF_LOG
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.spectra
+
+Description :
+
+    Low Frequency / Wave Frequency Split of the Responses
+
+        python -m orcapysm1 spectra [--dividing-period 40] [--workers N]
+
+    The power spectral density of the End A and End B Effective Tension of
+    every line and of the 6 DOF vessel motions is estimated for every
+    intact and damage case with Welch's method :
+
+        Segments of SEGMENT_DURATION seconds, OVERLAP between segments,
+        Hann window, mean removed from each segment, one sided PSD
+
+    The time histories are read one chunk at a time from the simulation
+    file or its archive (orcapysm1.archive), after the build-up stage. The
+    segments of each chunk are transformed together, all the results of
+    the case in one batched FFT, and only the sum of the periodograms is
+    kept, so that the memory used does not depend on the storm length.
+
+    The variance is split at the dividing period (DIVIDING_PERIOD, the
+    PrimaryMotionDividingPeriod of the vessel set by orcapysm1.cases) :
+
+        LF      Low frequency (slow drift), periods above the dividing
+                period
+        WF      Wave frequency, periods below the dividing period
+
+    The total, LF and WF standard deviations, the LF share of the variance
+    and the spectral peak period of each band are written for every case
+    and result to the sheet "Spectral LF WF" of output.xlsx. The cases are
+    processed in parallel, the unchanged cases are read from the result
+    cache (orcapysm1.cache). A mirror image case (orcapysm1.symmetry) is
+    processed from the mirrored time histories of its source case.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pandas as pd
+import os
+import concurrent.futures
+from . import check
+from . import archive
+from . import cache
+from . import cases
+from . import symmetry
+from .common import INPUT_FILE, OUTPUT_FILE, basename, case_list, write_sheets
+
+''' ---------------------------------------------------------------------------
+    Spectral Settings
+--------------------------------------------------------------------------- '''
+DIVIDING_PERIOD = cases.DIVIDING_PERIOD     # Seconds, LF / WF split
+SEGMENT_DURATION = 1200.0                   # Seconds per Welch segment
+OVERLAP = 0.5                               # Fraction of a segment
+START_TIME = 0.0                            # Seconds, build-up excluded
+
+LINE_RESULTS = [('Effective Tension', 'End A'), ('Effective Tension', 'End B')]
+VES_RESULTS = archive.VES_VARS
+BANDS = ['STD', 'LF_STD', 'WF_STD', 'LF_FRACTION', 'LF_PEAK_PERIOD', 'WF_PEAK_PERIOD']
+
+N_WORKERS = os.cpu_count()
+
+
+class RunningWelch:
+    ''' Welch PSD of nVars time histories of sample interval dt, fed chunk
+    by chunk. The samples short of a full segment are kept for the next
+    chunk '''
+
+    def __init__(self, nVars, dt, nSeg, overlap=OVERLAP):
+        self.dt = dt
+        self.nSeg = int(nSeg)
+        self.step = max(int(round(self.nSeg*(1-overlap))), 1)
+        self.window = np.hanning(self.nSeg+1)[:-1]
+        self.sumP = np.zeros((nVars, self.nSeg//2+1))
+        self.nSegs = 0
+        self.buffer = np.zeros((0, nVars))
+
+    def update(self, values):
+        ''' Add the samples (samples x nVars) of the next chunk '''
+        self.buffer = np.concatenate([self.buffer, np.asarray(values, dtype=float)])
+        if len(self.buffer) < self.nSeg:
+            return
+        k = 1+(len(self.buffer)-self.nSeg)//self.step
+
+        # All the full segments of the buffer (k x nVars x nSeg), one FFT
+        SEG = np.lib.stride_tricks.sliding_window_view(self.buffer, self.nSeg, axis=0)[::self.step][:k]
+        SEG = (SEG-SEG.mean(axis=-1, keepdims=True))*self.window
+        self.sumP += (np.abs(np.fft.rfft(SEG, axis=-1))**2).sum(axis=0)
+        self.nSegs += k
+        self.buffer = self.buffer[k*self.step:]
+
+    def psd(self):
+        ''' Frequencies (Hz) and one sided PSD (nVars x frequencies). A
+        history shorter than one segment is taken as one segment '''
+        if self.nSegs == 0:
+            if len(self.buffer) < 8:
+                return np.zeros(1), np.zeros((self.sumP.shape[0], 1))
+            short = RunningWelch(self.sumP.shape[0], self.dt, len(self.buffer))
+            short.update(self.buffer)
+            return short.psd()
+        P = self.sumP/(self.nSegs*np.sum(self.window**2)/self.dt)
+        P[:, 1:(self.nSeg+1)//2] *= 2
+        return np.fft.rfftfreq(self.nSeg, self.dt), P
+
+
+def band_split(f, P, dividingPeriod=DIVIDING_PERIOD):
+    ''' Total, LF and WF standard deviations, LF share of the variance and
+    the peak period of each band, of the PSD P (nVars x frequencies) '''
+    df = f[1]-f[0] if len(f) > 1 else 0.0
+    LF = (f > 0) & (f < 1/dividingPeriod)
+    WF = f >= 1/dividingPeriod
+
+    def peak_period(band):
+        if not band.any():
+            return np.full(len(P), np.nan)
+        fb = f[band]
+        return 1/fb[np.argmax(P[:, band], axis=1)]
+
+    varLF = P[:, LF].sum(axis=1)*df
+    varWF = P[:, WF].sum(axis=1)*df
+    var = varLF+varWF
+    return np.column_stack([np.sqrt(var), np.sqrt(varLF), np.sqrt(varWF),
+                            np.divide(varLF, var, out=np.full(len(var), np.nan), where=var > 0),
+                            peak_period(LF), peak_period(WF)])
+
+
+def result_columns(lines):
+    ''' Columns of archive.variable_names of the spectral results of the
+    lines and the vessel '''
+    nL = len(archive.LINE_VARS)
+    cols = [j*nL+archive.LINE_VARS.index(res) for j in range(len(lines)) for res in LINE_RESULTS]
+    cols += [len(lines)*nL+archive.VES_VARS.index(var) for var in VES_RESULTS]
+    return cols
+
+
+def case_spectra(fileName, lines, vesName, dividingPeriod=DIVIDING_PERIOD,
+                 segmentDuration=SEGMENT_DURATION, mirror=None):
+    ''' Band statistics (results x BANDS) of the line tensions and vessel
+    motions of a case. With mirror (LINE_MAP, heading, origin), of the
+    mirror image of the case '''
+    cols = result_columns(lines)
+    sourceLines = lines if mirror is None else [mirror[0][line] for line in lines]
+
+    welch = None
+    for times, values in archive.result_chunks(fileName, sourceLines, vesName):
+        keep = times >= START_TIME
+        if not keep.any():
+            continue
+        if mirror is not None:
+            values = symmetry.mirror_values(values, len(lines), mirror[1], mirror[2])
+        if welch is None:
+            dt = float(np.median(np.diff(times))) if len(times) > 1 else 0.1
+            welch = RunningWelch(len(cols), dt, round(segmentDuration/dt))
+        welch.update(values[keep][:, cols])
+
+    if welch is None:
+        return np.full((len(cols), len(BANDS)), np.nan)
+    f, P = welch.psd()
+    return band_split(f, P, dividingPeriod)
+
+
+def spectra(inputFile=INPUT_FILE, outputFile=OUTPUT_FILE, dividingPeriod=DIVIDING_PERIOD,
+            segmentDuration=SEGMENT_DURATION, nWorkers=N_WORKERS, useCache=cache.USE_CACHE):
+    ''' LF / WF split of the line tensions and vessel motions of all the
+    cases, in parallel, added to outputFile. Returns the table '''
+
+    # All the Input sheets, parsed once
+    INPUT = check.read_input(inputFile)
+
+    BASENAME = basename(INPUT)
+    vesName = INPUT['Ves_Gen'].VAL['NAME']
+
+    MIRRORS = symmetry.mirrored(INPUT)
+    mirror = symmetry.mirror_setup(INPUT)[:3]
+
+    # Simulation file of each case, the source case of a mirrored case
+    SOURCES = dict()
+    for c in case_list(INPUT, BASENAME):
+        sourceFile = symmetry.mirror_source(c[2], c[0], c[1], MIRRORS)
+        if sourceFile is not None and (os.path.exists(sourceFile) or
+                                       os.path.exists(archive.archive_file(sourceFile))):
+            SOURCES[c[:2]] = (sourceFile, mirror)
+        elif os.path.exists(c[2]) or os.path.exists(archive.archive_file(c[2])):
+            SOURCES[c[:2]] = (c[2], None)
+    CASES = [c for c in case_list(INPUT, BASENAME) if c[:2] in SOURCES]
+
+    ''' -----------------------------------------------------------------------
+    Spectra of the Cases in Parallel
+    -------------------------------------------------------------------------'''
+    RESULTS = dict()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=nWorkers) as pool:
+        futures = {pool.submit(cache.call, case_spectra, SOURCES[c[:2]][0], list(c[3]), vesName, dividingPeriod,
+                               segmentDuration, mirror=SOURCES[c[:2]][1], useCache=useCache): c for c in CASES}
+        for future in concurrent.futures.as_completed(futures):
+            case = futures[future]
+            RESULTS[case[:2]] = future.result()
+
+    ROWS = list()
+    for caseId, family, fileName, lines in CASES:
+        RES = RESULTS[(caseId, family)]
+        OBJECTS = [(line, var+' '+end) for line in lines for var, end in LINE_RESULTS]
+        OBJECTS += [(vesName, var) for var in VES_RESULTS]
+        for (obj, res), vals in zip(OBJECTS, RES):
+            ROWS.append(dict(CASE_ID=caseId, FAMILY=family, OBJECT=obj, RESULT=res,
+                             **dict(zip(BANDS, vals))))
+
+    DF_SP = pd.DataFrame(ROWS, columns=['CASE_ID', 'FAMILY', 'OBJECT', 'RESULT']+BANDS)
+
+    write_sheets(outputFile, {'Spectral LF WF': DF_SP}, index=False)
+
+    return DF_SP
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.stream
+
+Description :
+
+    Single Pass Statistics of Long Time Histories
+
+    The time histories of a simulation are fetched in fixed length chunks of
+    CHUNK_DURATION seconds using OrcFxAPI.Period(fromTime, toTime) windows,
+    all the requested variables at once with GetMultipleTimeHistories. Each
+    chunk is merged into the running statistics and then discarded:
+
+        Mean & Variance     Welford's method (chunk-wise, Chan et al.)
+        Max & Min           Running extrema
+        Peaks & Troughs     One peak per mean up-crossing cycle (the
+                            largest maximum between two successive
+                            up-crossings of the running mean) and one
+                            trough per down-crossing cycle, kept as count,
+                            sum & sum of squares plus a uniform random
+                            sample (reservoir) of MAX_PEAKS values
+
+    The memory used per variable is fixed by CHUNK_DURATION and MAX_PEAKS
+    and does not depend on the length of the simulation. Up to MAX_PEAKS
+    peaks all of them are kept, beyond that every peak has the same chance
+    to be in the sample (Algorithm R, SEED), so that the extreme value fits
+    (orcapysm1.extremes) of the sample stand for all the peaks.
+
+    The crossings of each chunk are taken about the running mean after the
+    chunk is merged, the open cycle at the end of a chunk is carried over to
+    the next one. The ripples of a broad band or noisy signal inside one
+    cycle are therefore not counted as peaks.
+
+    The Rayleigh Most Probable Maximum (MPM) is estimated from the standard
+    deviation and the number of peaks (mean up-crossings) in the storm,
+    the same basis as the OrcaFlex Rayleigh statistics.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+
+CHUNK_DURATION = 600.0
+MAX_PEAKS = 20000
+SEED = 0
+
+
+def cycle_extrema(X, cross, openVal, started, fn):
+    ''' Extremes (fn np.maximum / np.minimum) of the cycles of the chunk X
+    (nSamples x nVars), a cycle starts at each sample where cross is True.
+    openVal is the extreme of the cycle open at the start of the chunk and
+    started tells if that cycle began at a crossing. Returns the values and
+    the variable of the cycles closed in the chunk, and openVal and started
+    of the cycle left open '''
+    nB, nV = X.shape
+
+    # Column by column segments, each from a crossing (or the chunk start)
+    bounds = cross.T.copy()
+    bounds[:, 0] = True
+    bnd = np.flatnonzero(bounds.ravel())
+    col, row = bnd//nB, bnd % nB
+    seg = fn.reduceat(X.T.ravel(), bnd)
+
+    # The first segment continues the open cycle unless a crossing is there
+    cont = (row == 0) & ~cross[0, col]
+    seg[cont] = fn(seg[cont], openVal[col[cont]])
+    segStarted = np.where(cont, started[col], True)
+
+    # Every segment but the last of its column is a closed cycle
+    last = np.append(col[1:] != col[:-1], True)
+    closed = ~last & segStarted
+
+    # A crossing at the first sample closes the open cycle on its own,
+    # before the cycles of the chunk
+    pre = cross[0] & started
+    values = np.concatenate((openVal[pre], seg[closed]))
+    cols = np.concatenate((np.flatnonzero(pre), col[closed]))
+    return values, cols, seg[last], segStarted[last]
+
+
+def reservoir(sample, count, values, cols, rng):
+    ''' Merge the values of the variables cols (in the order of the
+    history) into the uniform random samples (nKeep x nVars) of each
+    variable, count (nVars) values of each variable were seen before '''
+    if len(values) == 0:
+        return
+    nKeep, nV = sample.shape
+    order = np.argsort(cols, kind='stable')
+    values, cols = values[order], cols[order]
+
+    # Position of each value in the history of its variable
+    counts = np.bincount(cols, minlength=nV)
+    c = count[cols]+np.arange(len(cols))-np.repeat(np.cumsum(counts)-counts, counts)
+
+    # The first nKeep fill the sample, the next one replaces a random
+    # entry with the probability nKeep / (c+1)
+    slot = np.where(c < nKeep, c, (rng.random(len(c))*(c+1)).astype(np.int64))
+    keep = slot < nKeep
+    flat = slot[keep]*nV+cols[keep]
+
+    # The latest value wins a slot drawn more than once in the chunk
+    _, last = np.unique(flat[::-1], return_index=True)
+    idx = len(flat)-1-last
+    sample.reshape(-1)[flat[idx]] = values[keep][idx]
+
+
+class RunningStats:
+    ''' Running statistics of nVars time histories fed chunk by chunk '''
+
+    def __init__(self, nVars, maxPeaks=MAX_PEAKS, seed=SEED):
+        self.n = 0
+        self.mean = np.zeros(nVars)
+        self.M2 = np.zeros(nVars)
+        self.max = np.full(nVars, -np.inf)
+        self.min = np.full(nVars, np.inf)
+        self.duration = 0.0
+
+        # Peaks (one per mean up-crossing) and Troughs (one per mean
+        # down-crossing)
+        self.nPeaks = np.zeros(nVars, dtype=int)
+        self.sumPeaks = np.zeros(nVars)
+        self.sumSqPeaks = np.zeros(nVars)
+        self.samplePeaks = np.full((maxPeaks, nVars), np.nan)
+        self.nTroughs = np.zeros(nVars, dtype=int)
+        self.sumTroughs = np.zeros(nVars)
+        self.sumSqTroughs = np.zeros(nVars)
+        self.sampleTroughs = np.full((maxPeaks, nVars), np.nan)
+        self.rng = np.random.default_rng(seed)
+
+        # Side of the mean of the last sample and the open cycles, to follow
+        # the cycles across the chunk boundaries
+        self.above = None
+        self.openPeak = np.full(nVars, -np.inf)
+        self.openTrough = np.full(nVars, np.inf)
+        self.peakStarted = np.zeros(nVars, dtype=bool)
+        self.troughStarted = np.zeros(nVars, dtype=bool)
+
+    def update(self, chunk, duration=0.0):
+        ''' Merge a chunk of samples (nSamples x nVars) '''
+        chunk = np.asarray(chunk, dtype=float)
+        if chunk.ndim == 1:
+            chunk = chunk[:, None]
+        nB = chunk.shape[0]
+        if nB == 0:
+            return
+
+        # Mean & Variance
+        meanB = chunk.mean(axis=0)
+        M2B = ((chunk-meanB)**2).sum(axis=0)
+        nAB = self.n+nB
+        delta = meanB-self.mean
+        self.mean = self.mean+delta*nB/nAB
+        self.M2 = self.M2+M2B+delta**2*self.n*nB/nAB
+        self.n = nAB
+        self.duration += duration
+
+        # Extrema
+        self.max = np.maximum(self.max, chunk.max(axis=0))
+        self.min = np.minimum(self.min, chunk.min(axis=0))
+
+        # Up / down crossings of the running mean
+        above = chunk > self.mean
+        prev = np.concatenate(((above[0] if self.above is None else self.above)[None], above[:-1]))
+        self.above = above[-1]
+        up = above & ~prev
+        down = ~above & prev
+
+        # Largest maximum of each up-crossing cycle, smallest minimum of each
+        # down-crossing cycle
+        peaks, cols, self.openPeak, self.peakStarted = cycle_extrema(
+            chunk, up, self.openPeak, self.peakStarted, np.maximum)
+        reservoir(self.samplePeaks, self.nPeaks, peaks, cols, self.rng)
+        self.nPeaks += np.bincount(cols, minlength=len(self.nPeaks))
+        self.sumPeaks += np.bincount(cols, peaks, minlength=len(self.nPeaks))
+        self.sumSqPeaks += np.bincount(cols, peaks**2, minlength=len(self.nPeaks))
+
+        troughs, cols, self.openTrough, self.troughStarted = cycle_extrema(
+            chunk, down, self.openTrough, self.troughStarted, np.minimum)
+        reservoir(self.sampleTroughs, self.nTroughs, troughs, cols, self.rng)
+        self.nTroughs += np.bincount(cols, minlength=len(self.nTroughs))
+        self.sumTroughs += np.bincount(cols, troughs, minlength=len(self.nTroughs))
+        self.sumSqTroughs += np.bincount(cols, troughs**2, minlength=len(self.nTroughs))
+
+    @property
+    def variance(self):
+        return self.M2/max(self.n, 1)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    @property
+    def rms(self):
+        return np.sqrt(self.variance+self.mean**2)
+
+    def peaks(self, k):
+        ''' Sampled peaks of variable k (all of them up to MAX_PEAKS),
+        largest first '''
+        p = self.samplePeaks[:, k]
+        return np.sort(p[np.isfinite(p)])[::-1]
+
+    def troughs(self, k):
+        ''' Sampled troughs of variable k (all of them up to MAX_PEAKS),
+        smallest first '''
+        p = self.sampleTroughs[:, k]
+        return np.sort(p[np.isfinite(p)])
+
+    def peak_amplitude_rms(self):
+        ''' RMS of the peak and trough amplitudes about the final mean '''
+        m = self.mean
+        nP = np.maximum(self.nPeaks, 1)
+        nT = np.maximum(self.nTroughs, 1)
+        sqP = (self.sumSqPeaks-2*m*self.sumPeaks+self.nPeaks*m**2)/nP
+        sqT = (self.sumSqTroughs-2*m*self.sumTroughs+self.nTroughs*m**2)/nT
+        return np.sqrt(np.maximum(sqP, 0)), np.sqrt(np.maximum(sqT, 0))
+
+    def rayleigh_mpm(self, stormDurationHours=3):
+        ''' Rayleigh Most Probable Maximum and Minimum over the storm '''
+        scale = stormDurationHours*3600.0/max(self.duration, 1e-9)
+        nStorm = np.maximum(self.nPeaks*scale, np.e)
+        mpmMax = self.mean+self.std*np.sqrt(2*np.log(nStorm))
+        nStorm = np.maximum(self.nTroughs*scale, np.e)
+        mpmMin = self.mean-self.std*np.sqrt(2*np.log(nStorm))
+        return mpmMax, mpmMin
+
+
+def key_specs(model, lines, vesName):
+    ''' TimeHistorySpecification list of the key results of a case : End A
+    Effective Tension of the lines followed by Vessel X and Y '''
+    import OrcFxAPI
+
+    specs = list()
+    for line in lines:
+        specs.append(OrcFxAPI.TimeHistorySpecification(model[line], 'Effective Tension', OrcFxAPI.oeEndA))
+    VOE = OrcFxAPI.oeVessel((0,0,0))
+    specs.append(OrcFxAPI.TimeHistorySpecification(model[vesName], 'X', VOE))
+    specs.append(OrcFxAPI.TimeHistorySpecification(model[vesName], 'Y', VOE))
+    return specs
+
+
+def stream_statistics(model, specs, chunkDuration=CHUNK_DURATION,
+                      startTime=None, stopTime=None):
+    ''' Running statistics of the OrcFxAPI TimeHistorySpecification list
+    specs, walking the simulation in chunks of chunkDuration seconds '''
+    import OrcFxAPI
+
+    if startTime is None:
+        startTime = model.simulationStartTime
+    if stopTime is None:
+        stopTime = model.simulationStopTime
+
+    stats = RunningStats(len(specs))
+    tLast = -np.inf
+    t0 = startTime
+    while t0 < stopTime:
+        t1 = min(t0+chunkDuration, stopTime)
+        period = OrcFxAPI.Period(t0, t1)
+
+        # Both ends of a Period are inclusive, skip the samples already used
+        times = model.SampleTimes(period)
+        keep = times > tLast
+        chunk = OrcFxAPI.GetMultipleTimeHistories(specs, period)[keep]
+        if keep.any():
+            stats.update(chunk, times[keep][-1]-max(tLast, times[keep][0]))
+            tLast = times[keep][-1]
+        t0 = t1
+    return stats
+
+
+def summary(stats, stormDurationHours=3):
+    ''' Max, Rayleigh MPM, Std Dev and Mean of the running statistics '''
+    mpmMax, mpmMin = stats.rayleigh_mpm(stormDurationHours)
+    return {'MAX': stats.max, 'MPM': mpmMax, 'STD': stats.std, 'MEAN': stats.mean}
+
+
+def relative_error(res, ref):
+    ''' Largest error of the Max, MPM and Std Dev of a summary relative to
+    the dynamic amplitude (MPM - Mean) of the reference summary '''
+    amp = np.maximum(np.abs(ref['MPM']-ref['MEAN']), 1e-9)
+    err = [np.abs(res[k]-ref[k])/amp for k in ('MAX', 'MPM', 'STD')]
+    return float(np.max(err))
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.sweep
+
+Description :
+
+    Quasi-Static Offset Sweep : Mooring Stiffness Curves
+
+        python -m orcapysm1 sweep [--workers N]
+
+    Starting from the intact static simulation file generated by the build
+    stage, the vessel is held fixed (not included in statics) at a
+    grid of horizontal offsets OFFSETS from its static equilibrium position,
+    in each of the directions HEADINGS (measured in the Global axes,
+    anticlockwise from Global X). Statics is calculated at every grid point
+    and the following results are collected:
+
+        Effective Tension at End A of every mooring line
+        Total restoring force of the mooring system on the vessel (sum of
+        the End A GX / GY / GZ forces of the lines), its horizontal
+        magnitude and its component along the offset direction
+
+    The grid points are split over N_WORKERS processes, each of them loads
+    the statics model once. The results are written to
+    stiffness_curves.xlsx : a table of all the grid points and the restoring
+    force and line tension curves against offset for each direction.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pandas as pd
+import os
+import math
+import concurrent.futures
+from . import check
+from .common import INPUT_FILE, basename, statics_file
+
+SWEEP_OUTPUT = 'stiffness_curves.xlsx'
+
+''' ---------------------------------------------------------------------------
+    Sweep Settings
+--------------------------------------------------------------------------- '''
+OFFSETS = np.arange(0.0, 30.01, 2.5)        # Meters from the static position
+HEADINGS = np.arange(0.0, 360.0, 45.0)      # Degrees from Global X
+
+N_WORKERS = os.cpu_count()
+
+
+def sweep_points(fileName, vesName, lines, points):
+    ''' Statics of the model with the vessel fixed at each (heading, offset)
+    of points, from its static equilibrium position '''
+    import OrcFxAPI
+
+    model_0 = OrcFxAPI.Model(fileName)
+    vessel_0 = model_0[vesName]
+
+    # Static equilibrium position of the intact model
+    X0 = vessel_0.StaticResult('X')
+    Y0 = vessel_0.StaticResult('Y')
+    vessel_0.InitialZ = vessel_0.StaticResult('Z')
+    vessel_0.InitialHeel = vessel_0.StaticResult('Rotation 1')
+    vessel_0.InitialTrim = vessel_0.StaticResult('Rotation 2')
+    vessel_0.InitialHeading = vessel_0.StaticResult('Rotation 3')
+    vessel_0.IncludedInStatics = 'None'
+
+    ROWS = list()
+    for heading, offset in points:
+        vessel_0.InitialX = X0+offset*math.cos(math.radians(heading))
+        vessel_0.InitialY = Y0+offset*math.sin(math.radians(heading))
+        model_0.CalculateStatics()
+
+        row = {'HEADING': heading, 'OFFSET': offset}
+        F = np.zeros(3)
+        for name in lines:
+            line = model_0[name]
+            row['TEN '+name] = line.StaticResult('Effective Tension', OrcFxAPI.oeEndA)
+            F += [line.StaticResult('End GX force', OrcFxAPI.oeEndA),
+                  line.StaticResult('End GY force', OrcFxAPI.oeEndA),
+                  line.StaticResult('End GZ force', OrcFxAPI.oeEndA)]
+        row['FX'], row['FY'], row['FZ'] = F
+        ROWS.append(row)
+
+    return ROWS
+
+
+def sweep(inputFile=INPUT_FILE, nWorkers=N_WORKERS):
+    ''' Statics over the grid of HEADINGS and OFFSETS, returns the table of
+    all the grid points '''
+
+    # All the Input sheets, parsed once
+    INPUT = check.read_input(inputFile)
+
+    vesName = INPUT['Ves_Gen'].VAL['NAME']
+    lines = list(INPUT['Moor_Lines'].index)
+
+    fileName = statics_file(basename(INPUT))
+
+    ''' -----------------------------------------------------------------------
+    Statics over the Grid, in Parallel
+    -------------------------------------------------------------------------'''
+    POINTS = [(h, r) for h in HEADINGS for r in OFFSETS]
+    CHUNKS = [POINTS[i::nWorkers] for i in range(nWorkers) if POINTS[i::nWorkers]]
+
+    ROWS = list()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=nWorkers) as pool:
+        futures = [pool.submit(sweep_points, fileName, vesName, lines, chunk) for chunk in CHUNKS]
+        for future in concurrent.futures.as_completed(futures):
+            ROWS.extend(future.result())
+
+    DF_SWEEP = pd.DataFrame(ROWS).sort_values(['HEADING', 'OFFSET']).reset_index(drop=True)
+
+    # Horizontal restoring force and its component along the offset
+    DF_SWEEP['FH'] = np.hypot(DF_SWEEP.FX, DF_SWEEP.FY)
+    DF_SWEEP['F_ALONG'] = DF_SWEEP.FX*np.cos(np.radians(DF_SWEEP.HEADING)) + \
+        DF_SWEEP.FY*np.sin(np.radians(DF_SWEEP.HEADING))
+
+    with pd.ExcelWriter(SWEEP_OUTPUT, mode='w') as writer:
+        DF_SWEEP.to_excel(writer, sheet_name='Offset Sweep', index=False)
+        DF_SWEEP.pivot(index='OFFSET', columns='HEADING', values='F_ALONG').to_excel(writer, sheet_name='Restoring Force')
+        for name in lines:
+            DF_SWEEP.pivot(index='OFFSET', columns='HEADING', values='TEN '+name).to_excel(writer, sheet_name='Tension '+name)
+
+    return DF_SWEEP
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.symmetry
+
+Description :
+
+    Mirror Image Cases of Symmetric Moorings
+
+        python -m orcapysm1 cases --mirror
+
+    The wind and current coefficients of the vessel type are defined with
+    xz plane symmetry (orcapysm1.build). When the rest of the model is also
+    symmetric about the xz plane of the vessel :
+
+        Vessel          TCG, Kxy, Kyz and HEEL are zero
+        Fairleads       Every Ves_FL point (X, Y, Z) has a mirror (X, -Y, Z)
+        Lines           Every line has a mirror line from the mirror
+                        fairlead, at AZIMUTH 360 - AZIMUTH, with the same
+                        anchor, lay, buoys and sections (all the other
+                        Moor_Lines columns)
+
+    a case whose environment is the mirror image of an earlier case of the
+    same family (same wave, wind and current, direction 2 x heading -
+    direction, mirror damaged line) gives the mirror image results. Only
+    the earlier case is generated and run, the mirrored cases are listed in
+    MIRROR_MANIFEST with their source case.
+
+    The post processing stages read the results of a mirrored case from
+    the time histories of its source case, with the mirror line names :
+
+        Line i                  Mirror line of i in the source case
+        End GX, GY force        Reflected in the mirror plane
+        Vessel X, Y             Reflected about the mirror plane through
+                                the Input vessel position
+        Rotation 1, 3           -Rotation 1, 2 x heading - Rotation 3
+
+    The statistics of a mirrored case are streamed statistics
+    (orcapysm1.stream), its MPM are the Rayleigh estimates.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pandas as pd
+import os
+from . import check
+from . import stream
+from . import archive
+from .common import MIRROR_MANIFEST, case_file, case_direction
+
+MIRROR_CASES = False
+POS_TOL = 0.01              # m, fairlead positions
+DIR_TOL = 0.01              # degrees, azimuths and directions
+
+ENV_KEYS = ['WAVE_TYPE', 'GAMMA', 'Hs', 'Tp', 'Vw', 'Vc']
+
+
+def same(a, b):
+    ''' Equal values of two Input cells (numbers within 1e-9, NaN == NaN) '''
+    if pd.isna(a) and pd.isna(b):
+        return True
+    if isinstance(a, (int, float, np.number)) and isinstance(b, (int, float, np.number)):
+        return bool(np.isclose(a, b, rtol=1e-9, atol=1e-9))
+    return a == b
+
+
+def angle_diff(a, b):
+    ''' Absolute difference of two directions in degrees, modulo 360 '''
+    return abs((a-b+180) % 360-180)
+
+
+def mirror_setup(INPUT):
+    ''' Mirror line of each line (LINE_MAP, None if the model is not
+    symmetric), heading (degrees) and origin (X, Y) of the mirror plane in
+    the OrcaFlex axes, and the reasons why the model is not symmetric '''
+    DF_GN = INPUT['General']
+    DF_VES_GEN = INPUT['Ves_Gen']
+    DF_FL = INPUT['Ves_FL']
+    DF_ML = INPUT['Moor_Lines']
+
+    # Vessel position and heading as built
+    if DF_GN.VAL['GRS'] == 'RHS':
+        heading = float(DF_VES_GEN.VAL['HEADING'])
+        origin = (float(DF_VES_GEN.VAL['XPOS']), float(DF_VES_GEN.VAL['YPOS']))
+    else:
+        heading = 360.0-DF_VES_GEN.VAL['HEADING']
+        origin = (float(DF_VES_GEN.VAL['XPOS']), -float(DF_VES_GEN.VAL['YPOS']))
+
+    REASONS = list()
+    for name in ['TCG', 'Kxy', 'Kyz', 'HEEL']:
+        if not same(DF_VES_GEN.VAL[name], 0):
+            REASONS.append('Ves_Gen '+name+' is not zero')
+
+    ''' -----------------------------------------------------------------------
+    Mirror Line : Mirror Fairlead, Mirror Azimuth and Same Makeup
+    -------------------------------------------------------------------------'''
+    FL = DF_FL[['X_FL', 'Y_FL', 'Z_FL']].to_numpy(dtype=float)
+    FL_INDEX = {flId: i for i, flId in enumerate(DF_FL.index)}
+    KEYS = [c for c in DF_ML.columns if c not in ['ENDA_CONN', 'AZIMUTH']]
+
+    LINE_MAP = dict()
+    for line in DF_ML.index:
+        fl = FL[FL_INDEX[DF_ML.ENDA_CONN[line]]]*[1, -1, 1]
+        for other in DF_ML.index:
+            flOther = FL[FL_INDEX[DF_ML.ENDA_CONN[other]]]
+            if (np.abs(flOther-fl).max() <= POS_TOL and
+                    angle_diff(DF_ML.AZIMUTH[other], 360-DF_ML.AZIMUTH[line]) <= DIR_TOL and
+                    all(same(DF_ML[k][line], DF_ML[k][other]) for k in KEYS)):
+                LINE_MAP[line] = other
+                break
+        else:
+            REASONS.append('Moor_Lines '+str(line)+' has no mirror line')
+
+    return (None if REASONS else LINE_MAP), heading, origin, REASONS
+
+
+def mirror_direction(direction, heading):
+    ''' Direction (degrees) of the mirror image of an environment '''
+    return (2*heading-direction) % 360
+
+
+def mirror_pairs(INPUT, BASENAME):
+    ''' Table of the mirrored cases : CASE_ID, FAMILY, SOURCE_ID (earlier
+    case of the family with the mirror environment) and its simulation file
+    SOURCE_SIM. Empty if the model is not symmetric '''
+    LINE_MAP, heading, origin, REASONS = mirror_setup(INPUT)
+    COLUMNS = ['CASE_ID', 'FAMILY', 'SOURCE_ID', 'SOURCE_SIM']
+    if LINE_MAP is None:
+        return pd.DataFrame(columns=COLUMNS)
+
+    GXDIR = INPUT['General'].VAL['GXDIR']
+
+    ROWS = list()
+    for family, sheet in [('INTACT', 'IntactCases'), ('DAMAGE', 'DamageCases')]:
+        SOURCES = list()
+        for ic, case in check.case_records(INPUT, sheet):
+            direction = case_direction(case['DIR_REF'], case['DIR_CONV'], case['DIR'], GXDIR, heading)
+            mirrorDir = mirror_direction(direction, heading)
+            damLine = LINE_MAP.get(case.get('DAM_LIN'))
+
+            # Earlier simulated case with the mirror environment
+            for source, sourceDir in SOURCES:
+                if (angle_diff(sourceDir, mirrorDir) <= DIR_TOL and
+                        all(same(case[k], source[k]) for k in ENV_KEYS) and
+                        (family == 'INTACT' or damLine == source['DAM_LIN'])):
+                    ROWS.append(dict(CASE_ID=case['CASE_ID'], FAMILY=family, SOURCE_ID=source['CASE_ID'],
+                                     SOURCE_SIM=case_file(BASENAME, family, source['CASE_ID'])))
+                    break
+            else:
+                SOURCES.append((case, direction))
+
+    return pd.DataFrame(ROWS, columns=COLUMNS)
+
+
+def mirrored(INPUT=None, manifest=MIRROR_MANIFEST):
+    ''' Source simulation file of each mirrored case (CASE_ID, FAMILY) of
+    the manifest written by the cases stage. With the Input sheets, a
+    manifest left over from a model which is no longer symmetric is
+    ignored '''
+    if not os.path.exists(manifest):
+        return dict()
+    if INPUT is not None and mirror_setup(INPUT)[0] is None:
+        return dict()
+    DF_MC = pd.read_csv(manifest)
+    return {(str(DF_MC.CASE_ID[i]), DF_MC.FAMILY[i]): DF_MC.SOURCE_SIM[i] for i in range(len(DF_MC))}
+
+
+def mirror_source(fileName, caseId, family, MIRRORS):
+    ''' Source simulation file of a mirrored case, None for a case with its
+    own simulation file or archive '''
+    if os.path.exists(fileName) or os.path.exists(archive.archive_file(fileName)):
+        return None
+    return MIRRORS.get((str(caseId), family))
+
+
+''' ---------------------------------------------------------------------------
+    Mirror Image Time Histories
+--------------------------------------------------------------------------- '''
+def reflection(heading):
+    ''' Reflection (2 x 2) of horizontal vectors in the vertical plane at
+    heading degrees from Global X '''
+    c, s = np.cos(np.radians(2*heading)), np.sin(np.radians(2*heading))
+    return np.array([[c, s], [s, -c]])
+
+
+def mirror_motions(motions, heading, origin):
+    ''' Mirror image of the 6 DOF vessel motions (samples x 6 : X, Y, Z,
+    Rotations 1, 2, 3) '''
+    M = np.array(motions, dtype=float)
+    M[:, :2] = (M[:, :2]-origin)@reflection(heading).T+origin
+    M[:, 3] = -M[:, 3]
+    M[:, 5] = 2*heading-M[:, 5]
+    return M
+
+
+def mirror_values(values, nLines, heading, origin):
+    ''' Mirror image of the values (samples x archive.variable_names) of
+    nLines lines and the vessel '''
+    V = np.array(values, dtype=float)
+    R = reflection(heading)
+    nL = len(archive.LINE_VARS)
+    for end in ['End A', 'End B']:
+        gx = archive.LINE_VARS.index(('End GX force', end))
+        gy = archive.LINE_VARS.index(('End GY force', end))
+        for j in range(nLines):
+            cols = [j*nL+gx, j*nL+gy]
+            V[:, cols] = V[:, cols]@R.T
+    V[:, nLines*nL:] = mirror_motions(V[:, nLines*nL:], heading, origin)
+    return V
+
+
+def mirror_statistics(sourceFile, lines, vesName, LINE_MAP, heading, origin):
+    ''' Running statistics of the archive.variable_names of the lines of a
+    mirrored case, from the time histories of its source case '''
+    sourceLines = [LINE_MAP[line] for line in lines]
+    stats = stream.RunningStats(len(archive.variable_names(lines, vesName)))
+    tLast = -np.inf
+    for times, values in archive.result_chunks(sourceFile, sourceLines, vesName):
+        stats.update(mirror_values(values, len(lines), heading, origin), times[-1]-max(tLast, times[0]))
+        tLast = times[-1]
+    return stats
+
+
+def mirror_results(sourceFile, lines, vesName, LINE_MAP, heading, origin, stormDurationHours=3):
+    ''' Statistics of a mirrored case in the layout of
+    post_dynamic.case_results '''
+    stats = mirror_statistics(sourceFile, lines, vesName, LINE_MAP, heading, origin)
+    return archive.statistics_results(stats, len(lines), stormDurationHours)
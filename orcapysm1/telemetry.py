@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.telemetry
+
+Description :
+
+    Solver Performance Telemetry of the Cases
+
+        python -m orcapysm1 telemetry [--query "STAGE == 'run'"]
+
+    The cases stage (statics of each generated case) and the run stage
+    (dynamics of each case) record one row per case and stage in
+    TELEMETRY_FILE :
+
+        generate    STATICS_TIME        Wall time of CalculateStatics (s)
+                    STATICS_ITERATIONS  Last iteration reported by the
+                                        statics progress handler
+        run         WALL_TIME           Wall time of the dynamics (s)
+                    WALL_PER_SIM_S      Wall time per simulated second
+                    DT_MEAN / MIN / MAX Implicit solver time step (s)
+                    ITER_MEAN / MAX     Implicit solver iterations per step
+        both        WARNINGS            Number of OrcaFlex warnings and the
+                    WARNING_TEXT        first one
+
+    A row is an OUTLIER when one of the OUTLIER_METRICS of the case is more
+    than OUTLIER_RATIO times the median of the same stage and family. The
+    outliers are usually statics convergence trouble or line compression,
+    to be fixed in the model rather than paid for on every run.
+
+    The table is a plain CSV, read with load() and filtered with a pandas
+    query string (query()).
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pandas as pd
+import os
+import re
+import time
+import socket
+
+TELEMETRY_FILE = 'telemetry.csv'
+
+''' ---------------------------------------------------------------------------
+    Outlier Settings
+--------------------------------------------------------------------------- '''
+OUTLIER_RATIO = 3.0
+OUTLIER_METRICS = ['STATICS_TIME', 'STATICS_ITERATIONS', 'WALL_PER_SIM_S', 'ITER_MEAN']
+
+KEYS = ['CASE_ID', 'FAMILY', 'STAGE']
+
+
+def model_warnings(model_0):
+    ''' Warnings of the last calculation of a model, as a list of texts '''
+    WARN = list()
+    for w in getattr(model_0, 'warnings', None) or ():
+        WARN.append(' : '.join(str(x) for x in w) if isinstance(w, tuple) else str(w))
+    return WARN
+
+
+def timed_statics(model_0):
+    ''' CalculateStatics with its wall time, iterations and warnings '''
+    ITER = [0]
+
+    def progress(model, text):
+        found = re.findall(r'iteration\s+(\d+)', str(text), re.IGNORECASE)
+        if found:
+            ITER[0] = max(ITER[0], int(found[-1]))
+        return False
+
+    model_0.staticsProgressHandler = progress
+    t0 = time.perf_counter()
+    try:
+        model_0.CalculateStatics()
+    finally:
+        model_0.staticsProgressHandler = None
+    wallTime = time.perf_counter()-t0
+
+    WARN = model_warnings(model_0)
+    return {'STATICS_TIME': wallTime,
+            'STATICS_ITERATIONS': ITER[0],
+            'WARNINGS': len(WARN),
+            'WARNING_TEXT': WARN[0] if WARN else ''}
+
+
+def dynamics_metrics(model_0, wallTime, duration):
+    ''' Wall time per simulated second, implicit time step and iteration
+    statistics and warnings of a finished dynamic simulation '''
+    import OrcFxAPI
+
+    METRICS = {'WALL_TIME': wallTime,
+               'WALL_PER_SIM_S': wallTime/max(duration, 1e-9)}
+
+    period = OrcFxAPI.Period(OrcFxAPI.PeriodNum.WholeSimulation)
+    gen = model_0.general
+    for var, tag in [('Implicit solver time step', 'DT'), ('Implicit solver iteration count', 'ITER')]:
+        try:
+            th = np.asarray(gen.TimeHistory(var, period))
+        except Exception:
+            # Explicit integration : no implicit solver results
+            th = np.full(1, np.nan)
+        METRICS[tag+'_MEAN'] = float(np.mean(th))
+        METRICS[tag+'_MIN'] = float(np.min(th))
+        METRICS[tag+'_MAX'] = float(np.max(th))
+
+    WARN = model_warnings(model_0)
+    METRICS['WARNINGS'] = len(WARN)
+    METRICS['WARNING_TEXT'] = WARN[0] if WARN else ''
+    return METRICS
+
+
+def flag_outliers(DF_TEL, ratio=OUTLIER_RATIO):
+    ''' OUTLIER and OUTLIER_METRIC columns : metrics above ratio times the
+    median of their stage and family '''
+    DF_TEL = DF_TEL.copy()
+    DF_TEL['OUTLIER'] = False
+    DF_TEL['OUTLIER_METRIC'] = ''
+    for metric in OUTLIER_METRICS:
+        if metric not in DF_TEL:
+            continue
+        values = pd.to_numeric(DF_TEL[metric], errors='coerce')
+        median = values.groupby([DF_TEL.STAGE, DF_TEL.FAMILY]).transform('median')
+        high = values > ratio*median
+        DF_TEL.loc[high, 'OUTLIER'] = True
+        DF_TEL.loc[high, 'OUTLIER_METRIC'] += metric+' '
+    DF_TEL['OUTLIER_METRIC'] = DF_TEL.OUTLIER_METRIC.str.strip()
+    return DF_TEL
+
+
+def load(telemetryFile=TELEMETRY_FILE):
+    ''' Telemetry table, empty if none was recorded '''
+    if not os.path.exists(telemetryFile):
+        return pd.DataFrame(columns=KEYS)
+    DF_TEL = pd.read_csv(telemetryFile, dtype={'CASE_ID': str}, keep_default_na=False, na_values=[''])
+    for col in ['WARNING_TEXT', 'OUTLIER_METRIC']:
+        if col in DF_TEL:
+            DF_TEL[col] = DF_TEL[col].fillna('')
+    return DF_TEL
+
+
+def record(ROWS, stage, telemetryFile=TELEMETRY_FILE):
+    ''' Add the rows (dicts with CASE_ID and FAMILY) of a stage to the
+    table, replacing the earlier rows of the same cases, and flag the
+    outliers again. Returns the table '''
+    if not ROWS:
+        return load(telemetryFile)
+    DF_NEW = pd.DataFrame(ROWS)
+    DF_NEW['CASE_ID'] = DF_NEW.CASE_ID.astype(str)
+    DF_NEW['STAGE'] = stage
+    DF_NEW['HOST'] = socket.gethostname()
+    DF_NEW['TIMESTAMP'] = time.strftime('%Y-%m-%d %H:%M:%S')
+
+    DF_TEL = load(telemetryFile)
+    if len(DF_TEL):
+        old = DF_TEL.set_index(KEYS).index.isin(DF_NEW.set_index(KEYS).index)
+        DF_TEL = pd.concat([DF_TEL[~old], DF_NEW], ignore_index=True)
+    else:
+        DF_TEL = DF_NEW
+
+    DF_TEL = flag_outliers(DF_TEL.drop(columns=['OUTLIER', 'OUTLIER_METRIC'], errors='ignore'))
+    tmpFile = telemetryFile+'.tmp'
+    DF_TEL.to_csv(tmpFile, index=False)
+    os.replace(tmpFile, telemetryFile)
+    return DF_TEL
+
+
+def query(expr=None, telemetryFile=TELEMETRY_FILE):
+    ''' Rows of the table matching a pandas query string, for example
+    "STAGE == 'run' and WALL_PER_SIM_S > 2" '''
+    DF_TEL = load(telemetryFile)
+    return DF_TEL.query(expr) if expr else DF_TEL
+
+
+def report(expr=None, telemetryFile=TELEMETRY_FILE):
+    ''' Outlier cases (or the rows matching expr), returns (ok, report) '''
+    DF_TEL = load(telemetryFile)
+    if not len(DF_TEL):
+        return True, telemetryFile+' : No telemetry recorded'
+    if expr:
+        DF = DF_TEL.query(expr)
+    else:
+        DF = DF_TEL[DF_TEL.OUTLIER.astype(str) == 'True']
+        if not len(DF):
+            return True, 'No outlier cases in '+str(len(DF_TEL))+' rows'
+    cols = [c for c in KEYS+['OUTLIER_METRIC']+OUTLIER_METRICS+['WARNINGS'] if c in DF]
+    return True, DF[cols].to_string(index=False)
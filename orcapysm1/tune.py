@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.tune
+
+Description :
+
+    Implicit Solver Settings Benchmark
+
+        python -m orcapysm1 tune [--workers N]
+
+    The build stage uses the Implicit time domain solution with the
+    default time step. This benchmark runs a representative case
+    (TUNE_CASE) for every combination of the General data values in
+    SOLVER_GRID, in parallel on N_WORKERS processes, and measures the wall
+    time of each run.
+
+    The first combination of the grid (smallest time step, tightest
+    tolerance) is the reference. The maximum, Rayleigh MPM and standard
+    deviation of the End A Effective Tensions and the vessel X / Y offsets of
+    each run are compared with the reference relative to the dynamic
+    amplitude. The fastest run with an error below TOLERANCE is selected.
+
+    Each run simulates TUNE_DURATION seconds (the storm length), so that the
+    drift and the stability of the coarser settings show in the results.
+
+    The benchmark is written to solver_tuning.xlsx and the selected settings
+    (together with SOLVER_FIXED) to solver_settings.csv. When this file is
+    present, the cases stage applies the settings (apply_settings) to the
+    General data of every case file it writes, so the intact statics model
+    (and its manual import of the vessel wave loads) is kept. The build
+    stage applies them to the statics model as well.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import pandas as pd
+import os
+import time
+import itertools
+import concurrent.futures
+from . import check
+from . import stream
+from .common import INPUT_FILE, SOLVER_SETTINGS, basename, case_file, progress
+
+TUNE_OUTPUT = 'solver_tuning.xlsx'
+
+''' ---------------------------------------------------------------------------
+    Benchmark Settings
+--------------------------------------------------------------------------- '''
+TUNE_CASE = None                # CASE_ID, None : first intact case
+StormDurationHours = 3
+TUNE_DURATION = StormDurationHours*3600.0    # Seconds of the main stage, None : as generated
+
+# General data held fixed and the grid of values to try, the first value of
+# each item is the reference (most accurate) setting
+SOLVER_FIXED = {'ImplicitUseVariableTimeStep': 'No'}
+SOLVER_GRID = {'ImplicitConstantTimeStep': [0.025, 0.05, 0.1, 0.2, 0.4],
+               'ImplicitTolerance': [1e-6, 1e-5, 1e-4]}
+
+TOLERANCE = 0.02                # Relative to the dynamic amplitude
+
+N_WORKERS = os.cpu_count()
+
+
+def apply_settings(gen, solverSettings=SOLVER_SETTINGS):
+    ''' Set the selected solver settings (the file solverSettings, when
+    available) on the General data gen, returns the settings applied '''
+    if solverSettings is None or not os.path.exists(solverSettings):
+        return dict()
+    SETTINGS = pd.read_csv(solverSettings).iloc[0].to_dict()
+    for name, value in SETTINGS.items():
+        setattr(gen, name, value)
+    return SETTINGS
+
+
+def run_settings(fileName, settings, lines, vesName, duration=TUNE_DURATION):
+    ''' Run a case with the given General data settings '''
+    import OrcFxAPI
+
+    model_0 = OrcFxAPI.Model(fileName)
+    gen = model_0.general
+    if duration is not None:
+        gen.StageDuration[1] = duration
+    for name, value in SOLVER_FIXED.items():
+        setattr(gen, name, value)
+    for name, value in settings.items():
+        setattr(gen, name, value)
+
+    tStart = time.perf_counter()
+    model_0.RunSimulation()
+    wallTime = time.perf_counter()-tStart
+
+    specs = stream.key_specs(model_0, lines, vesName)
+    stats = stream.stream_statistics(model_0, specs, startTime=0.0)
+
+    return dict(WALL_TIME=wallTime,
+                **stream.summary(stats, StormDurationHours))
+
+
+def tune(inputFile=INPUT_FILE, caseId=TUNE_CASE, duration=TUNE_DURATION,
+         solverSettings=SOLVER_SETTINGS, nWorkers=N_WORKERS):
+    ''' Run the solver grid on the case caseId, write the selected settings
+    to solverSettings and return them '''
+
+    # All the Input sheets, parsed once
+    INPUT = check.read_input(inputFile)
+
+    BASENAME = basename(INPUT)
+    vesName = INPUT['Ves_Gen'].VAL['NAME']
+
+    DF_ML = INPUT['Moor_Lines']
+    DF_ICM = check.case_matrix(INPUT, 'IntactCases', ['CASE_ID'])
+
+    lines = list(DF_ML.index)
+    if caseId is None:
+        caseId = DF_ICM.CASE_ID[0]
+
+    fileName = case_file(BASENAME, 'INTACT', caseId)
+
+    names = list(SOLVER_GRID)
+    GRID = [dict(zip(names, values)) for values in itertools.product(*SOLVER_GRID.values())]
+
+    ''' -----------------------------------------------------------------------
+    Run the Grid in Parallel
+    -------------------------------------------------------------------------'''
+    RESULTS = [None]*len(GRID)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=nWorkers) as pool:
+        futures = dict()
+        for ig, settings in enumerate(GRID):
+            futures[pool.submit(run_settings, fileName, settings, lines, vesName, duration)] = ig
+        for future in concurrent.futures.as_completed(futures):
+            RESULTS[futures[future]] = future.result()
+            progress(GRID[futures[future]], 'done')
+
+    ''' -----------------------------------------------------------------------
+    Comparison with the Reference Settings
+    -------------------------------------------------------------------------'''
+    ref = RESULTS[0]
+    ROWS = list()
+    for ig, settings in enumerate(GRID):
+        err = stream.relative_error(RESULTS[ig], ref)
+        ROWS.append(dict(settings, WALL_TIME=RESULTS[ig]['WALL_TIME'],
+                         SPEED_UP=ref['WALL_TIME']/RESULTS[ig]['WALL_TIME'],
+                         REL_ERROR=err, ACCEPT=err <= TOLERANCE))
+    DF_TUNE = pd.DataFrame(ROWS)
+
+    # Fastest accepted settings, the reference is always accepted
+    best = DF_TUNE[DF_TUNE.ACCEPT].WALL_TIME.idxmin()
+    SELECTED = dict(SOLVER_FIXED, **GRID[best])
+
+    with pd.ExcelWriter(TUNE_OUTPUT, mode='w') as writer:
+        DF_TUNE.to_excel(writer, sheet_name='Solver Benchmark', index=False)
+        pd.DataFrame([SELECTED]).to_excel(writer, sheet_name='Selected Settings', index=False)
+
+    pd.DataFrame([SELECTED]).to_csv(solverSettings, index=False)
+
+    progress('Selected Settings :', SELECTED)
+
+    return SELECTED
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : orcapysm1.workqueue
+
+Description :
+
+    Work Queue on a Shared File System, for Many Nodes
+
+        python -m orcapysm1 publish --queue QDIR [--skip generate]
+        python -m orcapysm1 work --queue QDIR [--workers N]
+        python -m orcapysm1 queue-status --queue QDIR
+
+    The tasks of every case (generate -> simulate -> post) are published as
+    small JSON files to a queue directory on a shared file system. Any
+    number of workers, on any node which mounts the project directory, then
+    claim and run the tasks:
+
+        QDIR/tasks/<id>.json    Task : function to call, arguments and the
+                                ids of the tasks it waits for (after)
+        QDIR/leases/<id>        Lease of the worker running the task
+        QDIR/done/<id>.pkl      Return value of the finished task
+        QDIR/failed/<id>.txt    Traceback of the failed task
+
+    A task is claimed by creating its lease file with O_CREAT | O_EXCL,
+    which succeeds for one worker only. While the task runs, a heartbeat
+    thread renews the lease (modification time) every HEARTBEAT seconds.
+    A lease not renewed for LEASE_TIME seconds belongs to a dead worker :
+    it is moved away with an atomic rename (again one worker only) and the
+    task is claimed again. The clocks of the nodes are to be synchronised
+    (NTP), the lease age is taken from the file modification time.
+
+    The simulate task of a case (simulate_case) adds its run to the
+    telemetry table, one worker at a time (file_lock), so that the planner
+    (orcapysm1.plan) is calibrated on the runs of every node. The post task
+    of a case (post_case) goes through the result cache, with the same
+    arguments as the post-dynamic stage. The last task (merge) waits for all the post tasks
+    and runs the post-dynamic stage, which reads every case from the cache
+    and writes the results and the envelope of the intact and damage cases
+    to output.xlsx and envelope.pkl.
+
+    The workers are to be started in the project directory (the file
+    names in the tasks are relative to it). The task functions are the
+    stage functions of the package, any importable 'module:function' can
+    be published with publish(), so the queue can be tried locally with a
+    few workers on a temporary directory.
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import os
+import time
+import json
+import pickle
+import socket
+import uuid
+import importlib
+import threading
+import traceback
+import concurrent.futures
+import pandas as pd
+from . import check
+from .common import INPUT_FILE, OUTPUT_FILE, basename, case_list, progress
+
+QUEUE_DIR = 'queue'
+
+''' ---------------------------------------------------------------------------
+    Lease Settings
+--------------------------------------------------------------------------- '''
+LEASE_TIME = 300.0          # Seconds without heartbeat before a lease expires
+HEARTBEAT = 60.0            # Seconds between the lease renewals
+POLL_INTERVAL = 10.0        # Seconds between the scans of an idle worker
+
+N_WORKERS = 1               # Worker processes started by work() on this node
+
+# Folders of the queue and the extension of their task files
+STATES = {'tasks': '.json', 'leases': '', 'done': '.pkl', 'failed': '.txt'}
+TASK_KINDS = ['generate', 'simulate', 'post', 'merge']
+MERGE_TASK = 'merge_results'
+
+
+def queue_path(queueDir, state, taskId=''):
+    ''' File of a task in one of the STATES folders of the queue '''
+    return os.path.join(queueDir, state, taskId+STATES[state] if taskId else '')
+
+
+def write_atomic(fileName, data, mode='wb'):
+    ''' Write a file in one step : a private temporary file is renamed '''
+    tmpFile = fileName+'.'+uuid.uuid4().hex+'.tmp'
+    with open(tmpFile, mode) as f:
+        f.write(data)
+    os.replace(tmpFile, fileName)
+
+
+def publish(queueDir, taskId, call, args=(), kwargs=None, after=()):
+    ''' Publish a task calling 'module:function' with args and kwargs once
+    the tasks after are done. A task already published is left as is '''
+    for state in STATES:
+        os.makedirs(queue_path(queueDir, state), exist_ok=True)
+
+    fileName = queue_path(queueDir, 'tasks', taskId)
+    if os.path.exists(fileName):
+        return False
+    task = {'id': taskId, 'call': call, 'args': list(args),
+            'kwargs': kwargs or dict(), 'after': list(after)}
+    write_atomic(fileName, json.dumps(task, default=str), 'w')
+    return True
+
+
+def file_lock(fileName, staleTime=LEASE_TIME, pollInterval=0.1):
+    ''' Take the lock fileName.lock, created with O_EXCL. A lock older than
+    staleTime was left by a dead worker and is taken over. Returns the
+    lock file, removed by the holder when done '''
+    lock = fileName+'.lock'
+    while True:
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return lock
+        except FileExistsError:
+            try:
+                if time.time()-os.stat(lock).st_mtime > staleTime:
+                    os.remove(lock)
+                    continue
+            except FileNotFoundError:
+                continue
+        time.sleep(pollInterval)
+
+
+def simulate_case(caseId, family, fileName, lines, vesName):
+    ''' orcapysm1.run.run_case of a case, its run is added to the telemetry
+    table (orcapysm1.plan calibration) as the run stage does '''
+    from . import run
+    from . import telemetry
+
+    RUN = dict(CASE_ID=caseId, FAMILY=family, **run.run_case(fileName, lines, vesName))
+
+    # One worker at a time updates the table
+    lock = file_lock(telemetry.TELEMETRY_FILE)
+    try:
+        telemetry.record([RUN], 'run')
+    finally:
+        os.remove(lock)
+    return RUN
+
+
+def post_case(fileName, lines, vesName):
+    ''' Results of a case through the result cache (orcapysm1.cache.call)
+    with the same arguments as the post-dynamic stage, so that the stage
+    finds them. post_dynamic (OrcFxAPI) is only imported by the worker '''
+    from . import cache
+    from . import post_dynamic
+
+    return cache.call(post_dynamic.case_results, fileName, lines, vesName,
+                      post_dynamic.STREAM_STATS, post_dynamic.StormDurationHours)
+
+
+def publish_cases(inputFile=INPUT_FILE, queueDir=QUEUE_DIR, skip=(), outputFile=OUTPUT_FILE):
+    ''' Publish the generate, simulate and post tasks of all the cases and
+    the merge task of their results. The kinds in skip (for example
+    generate, when the case files exist) are not published. The intact
+    statics file (build stage) must exist. Only the Input sheets are read,
+    so the tasks can be published from a node without OrcaFlex '''
+
+    check.preflight(inputFile)
+    INPUT = check.read_input(inputFile)
+
+    BASENAME = basename(INPUT)
+    vesName = str(INPUT['Ves_Gen'].VAL['NAME'])
+
+    # Row number of each case in its case matrix
+    ROWS = dict()
+    for family, sheet in [('INTACT', 'IntactCases'), ('DAMAGE', 'DamageCases')]:
+        for DF_CM in check.case_chunks(INPUT, sheet, ['CASE_ID']):
+            for ic, caseId in zip(DF_CM.index, DF_CM.CASE_ID):
+                ROWS[(family, str(caseId))] = ic
+
+    nTasks = 0
+    POSTS = list()
+    for caseId, family, fileName, lines in case_list(INPUT, BASENAME):
+        tag = family+'_'+str(caseId).replace(' ', '_')
+        lines = [str(l) for l in lines]
+        after = list()
+        if 'generate' not in skip:
+            nTasks += publish(queueDir, 'generate_'+tag, 'orcapysm1.cases:generate_case',
+                              [inputFile, family, ROWS[(family, str(caseId))]])
+            after = ['generate_'+tag]
+        if 'simulate' not in skip:
+            nTasks += publish(queueDir, 'simulate_'+tag, 'orcapysm1.workqueue:simulate_case',
+                              [str(caseId), family, fileName, lines, vesName], after=after)
+            after = ['simulate_'+tag]
+        if 'post' not in skip:
+            nTasks += publish(queueDir, 'post_'+tag, 'orcapysm1.workqueue:post_case',
+                              [fileName, lines, vesName], after=after)
+            POSTS.append('post_'+tag)
+
+    # Results of all the cases to output.xlsx and the envelope
+    if POSTS and 'merge' not in skip:
+        nTasks += publish(queueDir, MERGE_TASK, 'orcapysm1.post_dynamic:post_dynamic',
+                          [inputFile, outputFile], after=POSTS)
+    return nTasks
+
+
+def claim(queueDir, taskId, workerId, leaseTime=LEASE_TIME):
+    ''' Try to take the lease of a task, True if this worker holds it '''
+    lease = queue_path(queueDir, 'leases', taskId)
+    try:
+        fd = os.open(lease, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            age = time.time()-os.stat(lease).st_mtime
+        except FileNotFoundError:
+            return False
+        if age < leaseTime:
+            return False
+
+        # Expired lease : only one worker can move it away
+        stale = lease+'.'+workerId+'.expired'
+        try:
+            os.rename(lease, stale)
+        except OSError:
+            return False
+
+        # Renewed or claimed again in between : put it back
+        if time.time()-os.stat(stale).st_mtime < leaseTime:
+            try:
+                os.link(stale, lease)
+            except OSError:
+                pass
+            os.remove(stale)
+            return False
+        os.remove(stale)
+        return claim(queueDir, taskId, workerId, leaseTime)
+
+    with os.fdopen(fd, 'w') as f:
+        f.write(workerId)
+    return True
+
+
+def holds_lease(queueDir, taskId, workerId):
+    ''' True if the lease of the task is still held by this worker '''
+    try:
+        with open(queue_path(queueDir, 'leases', taskId)) as f:
+            return f.read() == workerId
+    except FileNotFoundError:
+        return False
+
+
+def heartbeat(queueDir, taskId, workerId, stop, interval=HEARTBEAT):
+    ''' Renew the lease of a running task until stop is set '''
+    while not stop.wait(interval):
+        if not holds_lease(queueDir, taskId, workerId):
+            progress(workerId, 'lost the lease of', taskId)
+            return
+        try:
+            os.utime(queue_path(queueDir, 'leases', taskId))
+        except FileNotFoundError:
+            return
+
+
+def run_task(task):
+    ''' Call the function of a task '''
+    moduleName, functionName = task['call'].split(':')
+    function = getattr(importlib.import_module(moduleName), functionName)
+    return function(*task['args'], **task['kwargs'])
+
+
+def task_states(queueDir):
+    ''' Ids of the published, leased, done and failed tasks '''
+    STATE = dict()
+    for state, ext in STATES.items():
+        folder = queue_path(queueDir, state)
+        names = os.listdir(folder) if os.path.isdir(folder) else []
+        STATE[state] = set(n[:len(n)-len(ext)] for n in names if n.endswith(ext) and
+                           not n.endswith('.tmp') and not n.endswith('.expired'))
+    return STATE
+
+
+def worker(queueDir=QUEUE_DIR, leaseTime=LEASE_TIME, heartbeatInterval=HEARTBEAT,
+           pollInterval=POLL_INTERVAL):
+    ''' Claim and run the ready tasks until none is left, returns the ids
+    of the tasks run by this worker '''
+    workerId = socket.gethostname()+'-'+str(os.getpid())+'-'+uuid.uuid4().hex[:8]
+    RAN = list()
+
+    while True:
+        STATE = task_states(queueDir)
+        finished = STATE['done'] | STATE['failed']
+        TASKS = dict()
+        for taskId in sorted(STATE['tasks']-finished):
+            with open(queue_path(queueDir, 'tasks', taskId)) as f:
+                TASKS[taskId] = json.load(f)
+
+        # Tasks waiting for a failed task can never run
+        blocked = set()
+        changed = True
+        while changed:
+            changed = False
+            for taskId, task in TASKS.items():
+                if taskId not in blocked and any(a in STATE['failed'] or a in blocked for a in task['after']):
+                    blocked.add(taskId)
+                    changed = True
+
+        pending = [t for t in TASKS if t not in blocked]
+        if not pending:
+            return RAN
+
+        ready = [t for t in pending if all(a in STATE['done'] for a in TASKS[t]['after'])]
+        taskId = None
+        for t in ready:
+            if claim(queueDir, t, workerId, leaseTime):
+                taskId = t
+                break
+
+        if taskId is None:
+            # Running on other workers or waiting for them
+            time.sleep(pollInterval)
+            continue
+
+        # Finished by another worker after the scan
+        if os.path.exists(queue_path(queueDir, 'done', taskId)):
+            os.remove(queue_path(queueDir, 'leases', taskId))
+            continue
+
+        stop = threading.Event()
+        beat = threading.Thread(target=heartbeat, args=(queueDir, taskId, workerId, stop, heartbeatInterval),
+                                daemon=True)
+        beat.start()
+        try:
+            result = run_task(TASKS[taskId])
+            write_atomic(queue_path(queueDir, 'done', taskId), pickle.dumps(result))
+            progress(workerId, 'done', taskId)
+        except Exception:
+            write_atomic(queue_path(queueDir, 'failed', taskId), traceback.format_exc(), 'w')
+            progress(workerId, 'failed', taskId)
+        finally:
+            stop.set()
+            beat.join()
+            if holds_lease(queueDir, taskId, workerId):
+                os.remove(queue_path(queueDir, 'leases', taskId))
+        RAN.append(taskId)
+
+
+def work(queueDir=QUEUE_DIR, nWorkers=N_WORKERS, leaseTime=LEASE_TIME,
+         heartbeatInterval=HEARTBEAT, pollInterval=POLL_INTERVAL):
+    ''' Run nWorkers workers on this node until the queue is finished '''
+    with concurrent.futures.ProcessPoolExecutor(max_workers=nWorkers) as pool:
+        futures = [pool.submit(worker, queueDir, leaseTime, heartbeatInterval, pollInterval)
+                   for i in range(nWorkers)]
+        return [taskId for future in futures for taskId in future.result()]
+
+
+def results(queueDir=QUEUE_DIR, prefix=''):
+    ''' Return values of the finished tasks whose id starts with prefix '''
+    RESULTS = dict()
+    for taskId in sorted(task_states(queueDir)['done']):
+        if taskId.startswith(prefix):
+            with open(queue_path(queueDir, 'done', taskId), 'rb') as f:
+                RESULTS[taskId] = pickle.load(f)
+    return RESULTS
+
+
+def status(queueDir=QUEUE_DIR):
+    ''' Number of tasks of each kind in each state, returns (ok, report) '''
+    STATE = task_states(queueDir)
+    ROWS = list()
+    for taskId in sorted(STATE['tasks']):
+        if taskId in STATE['done']:
+            state = 'DONE'
+        elif taskId in STATE['failed']:
+            state = 'FAILED'
+        elif taskId in STATE['leases']:
+            state = 'RUNNING'
+        else:
+            state = 'WAITING'
+        ROWS.append({'KIND': taskId.split('_')[0], 'STATE': state})
+    if not ROWS:
+        return True, queueDir+' : No tasks'
+    DF = pd.DataFrame(ROWS).groupby(['KIND', 'STATE']).size().unstack(fill_value=0)
+    return not STATE['failed'], DF.to_string()
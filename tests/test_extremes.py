@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : tests.test_extremes
+
+Description :
+
+    Extreme Value Fits and Quantiles (orcapysm1.extremes)
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pytest
+from scipy import stats
+from orcapysm1 import extremes
+
+E = np.array([0.5, 1.0, np.log(1000.0), 12.0])
+F = -np.expm1(-E)
+
+
+def test_rayleigh_quantile():
+    sigma = 2.5
+    assert np.allclose(extremes.quantile('Rayleigh', (sigma,), E), stats.rayleigh.ppf(F, scale=sigma))
+
+
+def test_weibull_quantile():
+    k, lam = 1.7, 3.0
+    assert np.allclose(extremes.quantile('Weibull', (k, lam), E), stats.weibull_min.ppf(F, k, scale=lam))
+
+
+def test_gumbel_quantile():
+    mu, beta = 4.0, 0.8
+    assert np.allclose(extremes.quantile('Gumbel', (mu, beta), E), stats.gumbel_r.ppf(F, mu, beta))
+
+
+@pytest.mark.parametrize('k', [0.2, -0.1, 0.0])
+def test_gpd_quantile(k):
+    ''' Hosking's sign of the shape : scipy c = -k '''
+    u, sigma = 1.5, 0.7
+    assert np.allclose(extremes.quantile('GPD', (u, k, sigma), E),
+                       stats.genpareto.ppf(F, -k, loc=u, scale=sigma))
+
+
+def padded(*rows):
+    ''' Rows of amplitudes padded with NaN '''
+    A = np.full((len(rows), max(len(r) for r in rows)), np.nan)
+    for i, r in enumerate(rows):
+        A[i, :len(r)] = r
+    return A
+
+
+def test_moment_fits():
+    rng = np.random.default_rng(3)
+    n = 200000
+    A = padded(stats.rayleigh.rvs(scale=2.0, size=n, random_state=rng),
+               stats.weibull_min.rvs(1.6, scale=3.0, size=n, random_state=rng),
+               stats.gumbel_r.rvs(5.0, 0.6, size=n, random_state=rng))
+
+    (sigma,), nUsed = extremes.fit('Rayleigh', A[:1])
+    assert sigma[0] == pytest.approx(2.0, rel=0.01)
+    assert nUsed[0] == n
+
+    (k, lam), _ = extremes.fit('Weibull', A[1:2])
+    assert k[0] == pytest.approx(1.6, rel=0.02)
+    assert lam[0] == pytest.approx(3.0, rel=0.02)
+
+    (mu, beta), _ = extremes.fit('Gumbel', A[2:])
+    assert mu[0] == pytest.approx(5.0, rel=0.01)
+    assert beta[0] == pytest.approx(0.6, rel=0.02)
+
+
+def test_gumbel_fit_positive_amplitudes_only():
+    rng = np.random.default_rng(4)
+    A = stats.gumbel_r.rvs(5.0, 0.6, size=5000, random_state=rng)
+    P, nUsed = extremes.fit('Gumbel', padded(A, np.concatenate([A, -rng.random(500), [0.0]])))
+    assert nUsed[0] == nUsed[1] == 5000
+    assert np.allclose(P[0][0], P[0][1]) and np.allclose(P[1][0], P[1][1])
+
+
+def test_gpd_fit():
+    rng = np.random.default_rng(5)
+    A = padded(stats.genpareto.rvs(-0.1, scale=1.0, size=400000, random_state=rng))
+    (u, k, sigma), nUsed = extremes.fit('GPD', A)
+    assert u[0] == pytest.approx(np.quantile(A[0], extremes.GPD_QUANTILE))
+    assert nUsed[0] == pytest.approx((1-extremes.GPD_QUANTILE)*A.shape[1], rel=0.01)
+
+    # Exceedances of a GPD are a GPD of the same shape
+    assert k[0] == pytest.approx(0.1, abs=0.03)
+
+
+def test_storm_extremes():
+    P = (np.array([2.0]),)
+    nUsed, scale = np.array([1000]), np.array([36.0])
+    mpm, ext = extremes.storm_extremes('Rayleigh', P, nUsed, scale, riskFactor=10)
+    N = 1000*36.0
+    assert mpm[0] == pytest.approx(2.0*np.sqrt(2*np.log(N)))
+
+    # EXTREME : exceeded with the probability riskFactor % in the storm
+    assert stats.rayleigh.cdf(ext[0], scale=2.0)**N == pytest.approx(0.9)
+
+
+def test_fit_batch():
+    rng = np.random.default_rng(6)
+    A = padded(stats.rayleigh.rvs(scale=1.0, size=3000, random_state=rng),
+               stats.rayleigh.rvs(scale=2.0, size=2000, random_state=rng))
+    RES = extremes.fit_batch(A, np.array([10.0, 10.0]), nBootstrap=50)
+    for dist in extremes.DISTRIBUTIONS:
+        assert RES[dist+'_MPM'].shape == (2,)
+        assert np.all(RES[dist+'_MPM_LOW'] <= RES[dist+'_MPM_HIGH'])
+    assert RES['Rayleigh_MPM'][1]/RES['Rayleigh_MPM'][0] == pytest.approx(2.0, rel=0.05)
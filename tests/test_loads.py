@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : tests.test_loads
+
+Description :
+
+    Load Coefficients with xz Plane Symmetry (orcapysm1.loads)
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pandas as pd
+from orcapysm1 import loads
+
+
+def table():
+    ''' Coefficients from 0 to 180 degrees, every 15 degrees '''
+    DIR = np.arange(0, 181, 15.0)
+    r = np.radians(DIR)
+    return pd.DataFrame({'DIR': DIR,
+                         'SURGE': np.cos(r), 'SWAY': np.sin(r), 'HEAVE': 0.1+0*r,
+                         'ROLL': 0.3*np.sin(r), 'PITCH': 0.2*np.cos(r), 'YAW': np.sin(2*r)})
+
+
+def test_table_directions():
+    DF_C = table()
+    C = loads.coefficients(DF_C, DF_C.DIR)
+    assert np.allclose(C, DF_C[loads.DOF].to_numpy())
+
+
+def test_interpolation():
+    DF_C = table()
+    C = loads.coefficients(DF_C, [7.5, 172.5])
+    assert np.allclose(C[0], DF_C[loads.DOF].iloc[:2].mean())
+    assert np.allclose(C[1], DF_C[loads.DOF].iloc[-2:].mean())
+
+
+def test_xz_symmetry():
+    ''' 360 - theta mirrors the sway, roll and yaw coefficients '''
+    DF_C = table()
+    theta = np.array([10.0, 45.0, 90.0, 137.0, 179.0])
+    C = loads.coefficients(DF_C, theta)
+    M = loads.coefficients(DF_C, 360-theta)
+    assert np.allclose(M, C*loads.XZ_SIGN)
+    assert np.allclose(M[:, [0, 2, 4]], C[:, [0, 2, 4]])
+    assert np.allclose(M[:, [1, 3, 5]], -C[:, [1, 3, 5]])
+
+
+def test_wrapped_directions():
+    DF_C = table()
+    theta = np.array([30.0, 200.0, 330.0])
+    assert np.allclose(loads.coefficients(DF_C, theta-360), loads.coefficients(DF_C, theta))
+    assert np.allclose(loads.coefficients(DF_C, theta+720), loads.coefficients(DF_C, theta))
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : tests.test_plan
+
+Description :
+
+    Cost Fit and Schedule of the Run Plan (orcapysm1.plan)
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pytest
+from orcapysm1 import plan
+
+
+def test_fit_least_squares():
+    x = np.array([100.0, 200.0, 300.0, 400.0])
+    slope, intercept = plan.fit(x, 5.0+2.0*x, default=1.0)
+    assert slope == pytest.approx(2.0)
+    assert intercept == pytest.approx(5.0)
+
+
+def test_fit_defaults_without_points():
+    x = np.array([np.nan, 0.0, 100.0])
+    y = np.array([1.0, 2.0, np.nan])
+    assert plan.fit(x, y, default=3.0, defaultIntercept=7.0) == (3.0, 7.0)
+
+
+def test_fit_median_ratio():
+    ''' Too few points, too close together or a negative intercept : the
+    median ratio through the origin '''
+    assert plan.fit(np.array([10.0]), np.array([40.0]), default=1.0) == (4.0, 0.0)
+
+    x = np.array([100.0, 101.0, 102.0])
+    slope, intercept = plan.fit(x, 3.0*x, default=1.0)
+    assert (slope, intercept) == (pytest.approx(3.0), 0.0)
+
+    x = np.array([100.0, 200.0, 300.0])
+    slope, intercept = plan.fit(x, 3.0*x-50.0, default=1.0)
+    assert slope == pytest.approx(np.median((3.0*x-50.0)/x))
+    assert intercept == 0.0
+
+
+def test_schedule():
+    ''' Longest first : each run starts on the slot free first, the runs
+    of a slot do not overlap '''
+    WALL = np.array([3.0, 10.0, 2.0, 7.0, 5.0, 3.0])
+    SLOT, START, END = plan.schedule(WALL, 2)
+    assert END.max() == pytest.approx(15.0)
+    assert list(SLOT[[1, 3]]) == [0, 1] and list(START[[1, 3]]) == [0.0, 0.0]
+    for k in range(2):
+        order = np.argsort(START[SLOT == k])
+        assert np.all(START[SLOT == k][order][1:] >= END[SLOT == k][order][:-1])
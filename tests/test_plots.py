@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : tests.test_plots
+
+Description :
+
+    Largest Triangle Three Buckets Downsampling (orcapysm1.plots.lttb)
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+from orcapysm1 import plots
+
+
+def lttb_loop(x, y, nOut):
+    ''' LTTB of one series, point by point '''
+    n = len(y)
+    edges = np.linspace(1, n-1, nOut-1).astype(int)
+    idx = [0]
+    for i in range(nOut-2):
+        b0, b1 = edges[i], edges[i+1]
+        if i+1 < nOut-2:
+            c0, c1 = edges[i+1], edges[i+2]
+            nx, ny = x[c0:c1].mean(), y[c0:c1].mean()
+        else:
+            nx, ny = x[-1], y[-1]
+        xa, ya = x[idx[-1]], y[idx[-1]]
+        area = [abs((xa-nx)*(y[j]-ya)-(xa-x[j])*(ny-ya)) for j in range(b0, b1)]
+        idx.append(b0+int(np.argmax(area)))
+    return idx+[n-1]
+
+
+def test_lttb_matches_loop():
+    rng = np.random.default_rng(7)
+    x = np.arange(5000)*0.1
+    Y = np.cumsum(rng.normal(size=(5000, 3)), axis=0)
+    idx = plots.lttb(x, Y, 300)
+    assert idx.shape == (300, 3)
+    for k in range(3):
+        assert list(idx[:, k]) == lttb_loop(x, Y[:, k], 300)
+
+
+def test_lttb_keeps_ends_and_spikes():
+    x = np.arange(10000, dtype=float)
+    Y = np.zeros((10000, 2))
+    Y[1234, 0] = 50.0
+    Y[8765, 1] = -50.0
+    idx = plots.lttb(x, Y, 100)
+    assert np.all(idx[0] == 0) and np.all(idx[-1] == 9999)
+    assert np.all(np.diff(idx, axis=0) > 0)
+    assert 1234 in idx[:, 0] and 8765 in idx[:, 1]
+
+
+def test_lttb_short_series():
+    x = np.arange(50, dtype=float)
+    idx = plots.lttb(x, np.ones((50, 2)), 100)
+    assert np.array_equal(idx, np.repeat(np.arange(50)[:, None], 2, axis=1))
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : tests.test_spectra
+
+Description :
+
+    Running Welch PSD and Band Split (orcapysm1.spectra)
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pytest
+from scipy import signal
+from orcapysm1 import spectra
+
+
+def test_running_welch_matches_scipy():
+    rng = np.random.default_rng(8)
+    dt, nSeg = 0.2, 512
+    X = rng.normal(size=(20000, 3))+np.arange(3)
+
+    welch = spectra.RunningWelch(3, dt, nSeg)
+    i0 = 0
+    while i0 < len(X):
+        n = int(rng.integers(1, 3000))
+        welch.update(X[i0:i0+n])
+        i0 += n
+    f, P = welch.psd()
+
+    fRef, PRef = signal.welch(X, fs=1/dt, window='hann', nperseg=nSeg, noverlap=nSeg-welch.step,
+                              detrend='constant', axis=0)
+    assert np.allclose(f, fRef)
+    assert np.allclose(P, PRef.T)
+
+
+def test_short_history():
+    ''' Shorter than a segment : one segment of the whole history '''
+    rng = np.random.default_rng(9)
+    X = rng.normal(size=(300, 2))
+    welch = spectra.RunningWelch(2, 0.5, 1000)
+    welch.update(X)
+    f, P = welch.psd()
+    fRef, PRef = signal.welch(X, fs=2.0, window='hann', nperseg=300, noverlap=150, axis=0)
+    assert np.allclose(f, fRef)
+    assert np.allclose(P, PRef.T)
+
+
+def test_band_split():
+    ''' Two sines, one each side of the dividing period '''
+    dt = 0.5
+    t = np.arange(200000)*dt
+    x = 3.0*np.sin(2*np.pi*t/100.0)+1.0*np.sin(2*np.pi*t/10.0)
+
+    welch = spectra.RunningWelch(1, dt, 8192)
+    welch.update(x[:, None])
+    f, P = welch.psd()
+    STD, LF, WF, LF_FRAC, LF_TP, WF_TP = spectra.band_split(f, P, dividingPeriod=25.0)[0]
+    assert STD == pytest.approx(x.std(), rel=0.01)
+    assert LF == pytest.approx(3.0/np.sqrt(2), rel=0.01)
+    assert WF == pytest.approx(1.0/np.sqrt(2), rel=0.01)
+    assert LF_FRAC == pytest.approx(0.9, rel=0.01)
+    assert LF_TP == pytest.approx(100.0, rel=0.02)
+    assert WF_TP == pytest.approx(10.0, rel=0.02)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : tests.test_stream
+
+Description :
+
+    Running Statistics (orcapysm1.stream) against the Full Arrays
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import numpy as np
+import pytest
+from orcapysm1 import stream
+
+
+def history(n=20000, nVars=3, seed=1):
+    ''' Narrow band random histories about a non zero mean '''
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)*0.1
+    X = np.zeros((n, nVars))
+    for k in range(nVars):
+        for w in rng.uniform(0.4, 0.8, 8):
+            X[:, k] += rng.normal()*np.cos(w*t+rng.uniform(0, 2*np.pi))
+    return X+np.arange(nVars)*10.0
+
+
+def cycle_peaks(x, m):
+    ''' Largest maximum between two successive up-crossings of the mean m
+    and smallest minimum between two successive down-crossings '''
+    above = x > m
+    prev = np.concatenate(([above[0]], above[:-1]))
+    up = np.flatnonzero(above & ~prev)
+    down = np.flatnonzero(~above & prev)
+    peaks = np.array([x[a:b].max() for a, b in zip(up[:-1], up[1:])])
+    troughs = np.array([x[a:b].min() for a, b in zip(down[:-1], down[1:])])
+    return peaks, troughs
+
+
+def feed(X, chunk, **kwargs):
+    stats = stream.RunningStats(X.shape[1], **kwargs)
+    for i0 in range(0, len(X), chunk):
+        stats.update(X[i0:i0+chunk], duration=0.1*len(X[i0:i0+chunk]))
+    return stats
+
+
+@pytest.mark.parametrize('chunk', [20000, 997, 50])
+def test_moments_and_extrema(chunk):
+    X = history()
+    stats = feed(X, chunk)
+    assert stats.n == len(X)
+    assert np.allclose(stats.mean, X.mean(axis=0))
+    assert np.allclose(stats.std, X.std(axis=0))
+    assert np.allclose(stats.rms, np.sqrt((X**2).mean(axis=0)))
+    assert np.array_equal(stats.max, X.max(axis=0))
+    assert np.array_equal(stats.min, X.min(axis=0))
+    assert stats.duration == pytest.approx(0.1*len(X))
+
+
+def test_peaks_one_chunk():
+    X = history()
+    stats = feed(X, len(X))
+    for k in range(X.shape[1]):
+        peaks, troughs = cycle_peaks(X[:, k], X[:, k].mean())
+        assert stats.nPeaks[k] == len(peaks)
+        assert stats.nTroughs[k] == len(troughs)
+        assert np.allclose(stats.peaks(k), np.sort(peaks)[::-1])
+        assert np.allclose(stats.troughs(k), np.sort(troughs))
+
+
+@pytest.mark.parametrize('chunk', [997, 50])
+def test_peaks_across_chunks(chunk):
+    ''' The running mean settles after a few chunks, the cycles are the
+    same as those about the final mean but for a few near the start '''
+    X = history()
+    stats = feed(X, chunk)
+    for k in range(X.shape[1]):
+        peaks, troughs = cycle_peaks(X[:, k], X[:, k].mean())
+        assert abs(stats.nPeaks[k]-len(peaks)) <= 0.02*len(peaks)
+        assert abs(stats.nTroughs[k]-len(troughs)) <= 0.02*len(troughs)
+        assert stats.peaks(k)[0] == peaks.max()
+        assert stats.troughs(k)[0] == troughs.min()
+
+
+def test_peak_amplitude_rms():
+    X = history()
+    stats = feed(X, len(X))
+    rmsP, rmsT = stats.peak_amplitude_rms()
+    for k in range(X.shape[1]):
+        m = X[:, k].mean()
+        peaks, troughs = cycle_peaks(X[:, k], m)
+        assert rmsP[k] == pytest.approx(np.sqrt(np.mean((peaks-m)**2)))
+        assert rmsT[k] == pytest.approx(np.sqrt(np.mean((troughs-m)**2)))
+
+
+def test_peak_sample_is_uniform():
+    ''' With more peaks than maxPeaks, each peak is kept with the
+    probability maxPeaks / nPeaks and the true count is kept '''
+    X = history(n=40000, nVars=1)
+    peaks = cycle_peaks(X[:, 0], X[:, 0].mean())[0]
+    maxPeaks = len(peaks)//8
+
+    kept = np.zeros(len(peaks))
+    for seed in range(200):
+        stats = stream.RunningStats(1, maxPeaks=maxPeaks, seed=seed)
+        stats.update(X)
+        assert stats.nPeaks[0] == len(peaks)
+        sample = stats.peaks(0)
+        assert len(sample) == maxPeaks
+        kept += np.isin(peaks, sample)
+    assert kept.mean()/200 == pytest.approx(maxPeaks/len(peaks), rel=0.01)
+    assert np.all(kept > 0)
+
+
+def test_rayleigh_mpm():
+    X = history()
+    stats = feed(X, 997)
+    mpmMax, mpmMin = stats.rayleigh_mpm(stormDurationHours=3)
+    N = stats.nPeaks*3*3600/stats.duration
+    assert np.allclose(mpmMax, stats.mean+stats.std*np.sqrt(2*np.log(N)))
+    assert np.all(mpmMin < stats.mean)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+""" ***************************************************************************
+
+Python Module Name : tests.test_workqueue
+
+Description :
+
+    Leases and Task Order of the File Work Queue (orcapysm1.workqueue)
+
+@author: Praveen Kumar Ch (praveench1888@gmail.com)
+
+*************************************************************************** """
+import os
+import time
+from orcapysm1 import workqueue
+
+
+def expire(queueDir, taskId, age):
+    ''' Last heartbeat of a lease age seconds ago '''
+    lease = workqueue.queue_path(queueDir, 'leases', taskId)
+    t = time.time()-age
+    os.utime(lease, (t, t))
+
+
+def test_publish_once(tmp_path):
+    q = str(tmp_path)
+    assert workqueue.publish(q, 'a', 'operator:add', [1, 2])
+    assert not workqueue.publish(q, 'a', 'operator:sub', [1, 2])
+    assert workqueue.task_states(q)['tasks'] == {'a'}
+
+
+def test_lease_held(tmp_path):
+    q = str(tmp_path)
+    workqueue.publish(q, 'a', 'operator:add', [1, 2])
+    assert workqueue.claim(q, 'a', 'w1', leaseTime=60)
+    assert not workqueue.claim(q, 'a', 'w2', leaseTime=60)
+    assert workqueue.holds_lease(q, 'a', 'w1')
+    assert not workqueue.holds_lease(q, 'a', 'w2')
+
+
+def test_expired_lease_claimed_again(tmp_path):
+    ''' A worker which stopped renewing its lease loses the task '''
+    q = str(tmp_path)
+    workqueue.publish(q, 'a', 'operator:add', [1, 2])
+    assert workqueue.claim(q, 'a', 'w1', leaseTime=60)
+    expire(q, 'a', 30)
+    assert not workqueue.claim(q, 'a', 'w2', leaseTime=60)
+    expire(q, 'a', 120)
+    assert workqueue.claim(q, 'a', 'w2', leaseTime=60)
+    assert workqueue.holds_lease(q, 'a', 'w2')
+    assert not workqueue.holds_lease(q, 'a', 'w1')
+    assert os.listdir(os.path.join(q, 'leases')) == ['a']
+
+
+def test_worker_order_and_failures(tmp_path):
+    ''' Tasks run after those they wait for, a failed task blocks the
+    tasks waiting for it and not the others '''
+    q = str(tmp_path)
+    workqueue.publish(q, 'sum', 'operator:add', [1, 2], after=['first'])
+    workqueue.publish(q, 'first', 'operator:mul', [3, 4])
+    workqueue.publish(q, 'bad', 'operator:truediv', [1, 0])
+    workqueue.publish(q, 'blocked', 'operator:add', [5, 6], after=['bad'])
+
+    RAN = workqueue.worker(q, pollInterval=0.01)
+    assert RAN.index('first') < RAN.index('sum')
+    assert 'blocked' not in RAN
+
+    STATE = workqueue.task_states(q)
+    assert STATE['done'] == {'first', 'sum'}
+    assert STATE['failed'] == {'bad'}
+    assert STATE['leases'] == set()
+    assert workqueue.results(q) == {'first': 12, 'sum': 3}
+    with open(workqueue.queue_path(q, 'failed', 'bad')) as f:
+        assert 'ZeroDivisionError' in f.read()
+
+
+def test_failed_task_retried(tmp_path):
+    ''' Removing the failed file of a task runs it and the tasks waiting
+    for it again '''
+    q = str(tmp_path)
+    workqueue.publish(q, 'bad', 'operator:truediv', [1, 0])
+    workqueue.publish(q, 'next', 'operator:add', [1, 1], after=['bad'])
+    assert workqueue.worker(q, pollInterval=0.01) == ['bad']
+
+    os.remove(workqueue.queue_path(q, 'failed', 'bad'))
+    workqueue.write_atomic(workqueue.queue_path(q, 'tasks', 'bad'),
+                           '{"id": "bad", "call": "operator:truediv", "args": [1, 2], '
+                           '"kwargs": {}, "after": []}', 'w')
+    assert workqueue.worker(q, pollInterval=0.01) == ['bad', 'next']
+    assert workqueue.results(q) == {'bad': 0.5, 'next': 2}
+
+
+def test_task_leased_elsewhere(tmp_path):
+    ''' A worker waits for a task leased by another worker, then runs it
+    once the lease expires '''
+    q = str(tmp_path)
+    workqueue.publish(q, 'a', 'operator:add', [1, 2])
+    assert workqueue.claim(q, 'a', 'other', leaseTime=0.2)
+    RAN = workqueue.worker(q, leaseTime=0.2, pollInterval=0.05)
+    assert RAN == ['a']
+
+
+def test_file_lock(tmp_path):
+    ''' One holder at a time, a lock left by a dead worker is taken over '''
+    fileName = str(tmp_path/'telemetry.csv')
+    lock = workqueue.file_lock(fileName)
+    assert os.path.exists(lock)
+    t = time.time()-120
+    os.utime(lock, (t, t))
+    assert workqueue.file_lock(fileName, staleTime=60) == lock
+    os.remove(lock)
+    assert os.listdir(str(tmp_path)) == []